@@ -25,6 +25,7 @@ def main():
     packages = [
         "pymongo>=4.0.0",
         "pandas>=1.3.0",
+        "numpy>=1.17.0",
         "faker>=13.0.0",
         "jupyter>=1.0.0",
         "notebook>=6.0.0"
@@ -54,7 +55,7 @@ def main():
         
     else:
         print("\n⚠️ Some packages failed to install. Please install them manually:")
-        print("   pip install pymongo pandas faker jupyter notebook")
+        print("   pip install pymongo pandas numpy faker jupyter notebook")
     
     print(f"\n📂 Project structure created in: {os.getcwd()}")
     print("🎉 Setup complete! Happy coding!")
@@ -0,0 +1,358 @@
+"""
+Eduhub MongoDB Project - Benchmark Harness
+
+Times the public read, write and aggregation methods of EduHubDatabase against a local
+mongod: every benchmark gets a warmup, many timed iterations (optionally from several
+threads) and reports p50/p95/p99 latency and throughput. Results are saved as JSON and can
+be compared against a saved baseline.
+
+Usage:
+    python src/eduhub_benchmark.py run --scale 1 --iterations 50 --output baseline.json
+    python src/eduhub_benchmark.py run --scale 1 --concurrency 8 --output current.json
+    python src/eduhub_benchmark.py compare baseline.json current.json --threshold 0.10
+
+The benchmark populates (and clears) its own database, eduhub_benchmark by default.
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+import pymongo
+
+from eduhub_queries import (EduHubDatabase, SCALE_FACTOR_COUNTS, SEEDED_REFERENCE_DATE, format_latency,
+                            measure_latency)
+
+# Items per call of the bulk_* benchmarks
+BULK_SIZE = 100
+
+# metadata document marking a database whose data the write benchmarks have changed
+WRITES_MARKER_ID = "benchmark_writes"
+
+# Metrics compared by the compare command, and whether higher values are better
+COMPARED_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "throughput_ops": True}
+
+def _sample_ids(db, collection_name, id_field, count, query=None):
+    """Return up to count business IDs of a collection"""
+    cursor = db[collection_name].find(query or {}, {"_id": 0, id_field: 1}).limit(count)
+    return [doc[id_field] for doc in cursor]
+
+def _insert_fresh_students(database, run_id, count):
+    """Insert students that have no enrollments yet, so enrollment benchmarks never hit duplicates"""
+    students = [{
+        "userId": f"BS_{run_id}_{i}",
+        "email": f"bench.{run_id}.{i}@example.com",
+        "firstName": "Bench",
+        "lastName": f"Student {i}",
+        "role": "student",
+        "dateJoined": datetime.now(),
+        "profile": {"bio": "", "avatar": "", "skills": []},
+        "isActive": True
+    } for i in range(count)]
+    if students:
+        database.db.users.insert_many(students)
+    return [student["userId"] for student in students]
+
+def build_benchmarks(database, seed=42, calls_per_benchmark=100):
+    """Build the benchmark cases for the current dataset
+
+    Args:
+        database: Populated EduHubDatabase
+        seed: Seed for the random choice of arguments
+        calls_per_benchmark: Warmup plus timed calls per benchmark (sizes the pools of fresh IDs)
+
+    Returns:
+        list: (name, kind, func, setup) tuples where kind is "read", "aggregation" or "write" and
+            setup is None or an untimed callable to run just before the benchmark
+    """
+    db = database.db
+    rng = random.Random(seed)
+    run_id = int(time.time())
+    counter = itertools.count()
+
+    students = _sample_ids(db, "users", "userId", 1000, {"role": "student"})
+    instructors = _sample_ids(db, "users", "userId", 100, {"role": "instructor"})
+    courses = list(db.courses.find({}, {"_id": 0, "courseId": 1, "category": 1, "tags": 1, "price": 1,
+                                        "title": 1}).limit(1000))
+    submissions = _sample_ids(db, "submissions", "submissionId", 1000)
+    if not students or not instructors or not courses or not submissions:
+        raise ValueError("The benchmark database is empty; run without --skip-populate first")
+
+    # IDs consumed by destructive benchmarks, one per call. Each pool is filled by the setup of its
+    # benchmark, so the reads and aggregations run on the populated data alone
+    pools = {}
+    setups = {
+        "enroll_student_in_course": lambda: pools.update(
+            fresh_students=deque(_insert_fresh_students(database, f"{run_id}S", calls_per_benchmark))),
+        "delete_enrollment": lambda: pools.update(
+            enrollments_to_delete=deque(_sample_ids(db, "enrollments", "enrollmentId", calls_per_benchmark))),
+        "remove_lesson_from_course": lambda: pools.update(
+            lessons_to_remove=deque(_sample_ids(db, "lessons", "lessonId", calls_per_benchmark))),
+        "bulk_enroll_students": lambda: pools.update(
+            fresh_bulk_students=deque(_insert_fresh_students(database, f"{run_id}B", calls_per_benchmark * BULK_SIZE)))
+    }
+
+    def course():
+        return rng.choice(courses)
+
+    def word():
+        words = course()["title"].split()
+        return words[0] if words else "Course"
+
+    def popped(name):
+        # An exhausted pool fails the call instead of timing a no-op
+        try:
+            return pools[name].popleft()
+        except (KeyError, IndexError):
+            raise RuntimeError(f"{name} fixture pool exhausted") from None
+
+    def price_range():
+        price = course().get("price", 0)
+        return price * 0.5, price * 1.5
+
+    reads = [
+        ("find_all_active_students", lambda: database.find_all_active_students()),
+        ("get_user_by_id", lambda: database.get_user_by_id(rng.choice(students))),
+        ("get_course_by_id", lambda: database.get_course_by_id(course()["courseId"])),
+        ("get_course_with_instructor_info", lambda: database.get_course_with_instructor_info(course()["courseId"])),
+        ("get_courses_by_category", lambda: database.get_courses_by_category(course()["category"])),
+        ("find_students_in_course", lambda: database.find_students_in_course(course()["courseId"])),
+        ("get_course_roster", lambda: database.get_course_roster(course()["courseId"])),
+        ("get_course_roster_by_progress",
+         lambda: database.get_course_roster(course()["courseId"], sort_by="progress", descending=True)),
+        ("search_courses_by_title", lambda: database.search_courses_by_title(word())),
+        ("search_courses", lambda: database.search_courses(word())),
+        ("search_courses_by_prefix", lambda: database.search_courses_by_prefix(word()[:3])),
+        ("find_courses_by_price_range", lambda: database.find_courses_by_price_range(*price_range())),
+        ("get_recent_users", lambda: database.get_recent_users(6)),
+        ("find_courses_with_tags", lambda: database.find_courses_with_tags(course()["tags"][:1])),
+        ("get_assignments_due_next_week", lambda: database.get_assignments_due_next_week()),
+        ("page_active_students", lambda: database.page_active_students()),
+        ("page_courses_by_category", lambda: database.page_courses_by_category(course()["category"])),
+        ("page_courses_by_price_range", lambda: database.page_courses_by_price_range(*price_range())),
+        ("page_recent_users", lambda: database.page_recent_users(6)),
+        ("page_courses_with_tags", lambda: database.page_courses_with_tags(course()["tags"][:1])),
+        ("iter_active_students", lambda: list(database.iter_active_students({"userId": 1}))),
+        ("iter_courses_by_category", lambda: list(database.iter_courses_by_category(course()["category"]))),
+        ("iter_courses_by_price_range", lambda: list(database.iter_courses_by_price_range(*price_range()))),
+        ("iter_recent_users", lambda: list(database.iter_recent_users(6, {"userId": 1}))),
+        ("iter_courses_with_tags", lambda: list(database.iter_courses_with_tags(course()["tags"][:1]))),
+        ("autocomplete_courses", lambda: database.autocomplete_courses(word()[:rng.randint(1, 4)])),
+        ("filter_courses_by_tags", lambda: database.filter_courses_by_tags(any_tags=course()["tags"][:2])),
+        ("get_database_info", lambda: database.get_database_info()),
+        ("get_collection_statistics", lambda: database.get_collection_statistics())
+    ]
+    aggregations = [
+        ("get_course_enrollment_statistics", lambda: database.get_course_enrollment_statistics()),
+        ("get_student_performance_analysis", lambda: database.get_student_performance_analysis()),
+        ("iter_student_performance", lambda: list(database.iter_student_performance(top_n=20))),
+        ("get_instructor_analytics", lambda: database.get_instructor_analytics()),
+        ("get_instructor_revenue", lambda: database.get_instructor_revenue(days=30)),
+        ("get_advanced_analytics", lambda: database.get_advanced_analytics()),
+        ("get_advanced_analytics_concurrent", lambda: database.get_advanced_analytics(concurrent=True))
+    ]
+    writes = [
+        ("add_new_student", lambda: database.add_new_student(
+            f"new.{run_id}.{next(counter)}@example.com", "Bench", "Student")),
+        ("validate_and_insert_user", lambda: database.validate_and_insert_user({
+            "userId": f"BV_{run_id}_{next(counter)}", "email": f"valid.{run_id}.{next(counter)}@example.com",
+            "firstName": "Bench", "lastName": "User", "role": "student"})),
+        ("create_new_course", lambda: database.create_new_course(
+            f"Benchmark Course {next(counter)}", "Benchmark course", rng.choice(instructors),
+            course()["category"], "beginner", 10, 49.99, ["Benchmark"])),
+        ("enroll_student_in_course", lambda: database.enroll_student_in_course(
+            popped("fresh_students"), course()["courseId"])),
+        ("add_lesson_to_course", lambda: database.add_lesson_to_course(
+            course()["courseId"], "Benchmark Lesson", "Content", 30)),
+        ("update_user_profile", lambda: database.update_user_profile(
+            rng.choice(students), bio=f"Updated bio {next(counter)}")),
+        ("mark_course_as_published", lambda: database.mark_course_as_published(course()["courseId"])),
+        ("update_assignment_grade", lambda: database.update_assignment_grade(
+            rng.choice(submissions), rng.randint(60, 100), "Benchmark feedback")),
+        ("add_tags_to_course", lambda: database.add_tags_to_course(course()["courseId"], ["Benchmark"])),
+        ("soft_delete_user", lambda: database.soft_delete_user(rng.choice(students))),
+        ("delete_enrollment", lambda: database.delete_enrollment(popped("enrollments_to_delete"))),
+        ("remove_lesson_from_course", lambda: database.remove_lesson_from_course(popped("lessons_to_remove"))),
+        ("bulk_enroll_students", lambda: database.bulk_enroll_students(
+            [(popped("fresh_bulk_students"), course()["courseId"]) for _ in range(BULK_SIZE)])),
+        ("bulk_add_lessons", lambda: database.bulk_add_lessons([
+            {"course_id": course()["courseId"], "title": "Bulk Lesson", "content": "Content", "duration": 20}
+            for _ in range(BULK_SIZE)])),
+        ("bulk_update_grades", lambda: database.bulk_update_grades(
+            [(rng.choice(submissions), rng.randint(60, 100)) for _ in range(BULK_SIZE)])),
+        ("bulk_update_profiles", lambda: database.bulk_update_profiles(
+            [{"user_id": rng.choice(students), "bio": "Bulk bio"} for _ in range(BULK_SIZE)])),
+        ("bulk_add_tags", lambda: database.bulk_add_tags(
+            [(course()["courseId"], ["Bulk"]) for _ in range(BULK_SIZE)]))
+    ]
+    # Writes run last so they do not change the data the reads are measured on
+    return ([(name, "read", func, None) for name, func in reads]
+            + [(name, "aggregation", func, None) for name, func in aggregations]
+            + [(name, "write", func, setups.get(name)) for name, func in writes])
+
+def run_benchmarks(uri, database_name="eduhub_benchmark", scale=1, seed=42, iterations=50, warmup=5,
+                   concurrency=1, only=None, populate=True, workers=1):
+    """Populate a benchmark database and time every benchmark case
+
+    Returns:
+        dict: {"meta": {...}, "results": {name: latency stats and kind}}
+    """
+    database = EduHubDatabase(uri, database_name=database_name)
+    # Date-window reads select the same documents of the seeded dataset on any day
+    database.clock = lambda: SEEDED_REFERENCE_DATE
+    try:
+        if populate:
+            database.populate_scaled_data(scale, seed=seed, workers=workers)
+            database.db.metadata.delete_one({"_id": WRITES_MARKER_ID})
+        elif database.db.metadata.find_one({"_id": WRITES_MARKER_ID}):
+            raise ValueError("The write benchmarks of an earlier run changed the benchmark data; "
+                             "run without --skip-populate")
+        # Write fixtures are only created in the write phase, so these are the documents the
+        # reads and aggregations run on
+        counts = {name: database.db[name].estimated_document_count()
+                  for name in ["users", "courses", "lessons", "assignments", "enrollments", "submissions"]}
+
+        benchmarks = build_benchmarks(database, seed, warmup + iterations)
+        if only:
+            benchmarks = [case for case in benchmarks if any(pattern in case[0] for pattern in only)]
+
+        results = {}
+        print(f"⏱️ Running {len(benchmarks)} benchmarks ({iterations} iterations, {warmup} warmup, "
+              f"concurrency {concurrency})...")
+        for name, kind, func, setup in benchmarks:
+            if kind == "write":
+                # Later runs must repopulate instead of measuring on the changed data
+                database.db.metadata.update_one({"_id": WRITES_MARKER_ID},
+                                                {"$set": {"updatedAt": datetime.now()}}, upsert=True)
+            # The database methods print a status line per call; keep them out of the report
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                if setup is not None:
+                    setup()
+                stats = measure_latency(func, iterations, warmup, concurrency)
+            results[name] = dict(stats, kind=kind)
+            print(f"   {name:<36} {format_latency(stats)}"
+                  + (f" ⚠️ {stats['errors']} errors (first: {stats['first_error']})" if stats["errors"] else ""))
+
+        meta = {
+            "timestamp": datetime.now().isoformat(),
+            "scale": scale,
+            "seed": seed,
+            "reference_date": SEEDED_REFERENCE_DATE.isoformat(),
+            "iterations": iterations,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "documents": counts,
+            "server_version": database.client.server_info().get("version"),
+            "pymongo_version": pymongo.version,
+            "python_version": platform.python_version(),
+            "platform": platform.platform()
+        }
+        return {"meta": meta, "results": results}
+    finally:
+        database.close_connection()
+
+def compare_results(baseline, current, threshold=0.10):
+    """Compare two benchmark result sets
+
+    Args:
+        baseline: Results loaded from the baseline JSON file
+        current: Results loaded from the current JSON file
+        threshold: Relative change beyond which a metric counts as a regression
+
+    Returns:
+        dict: {"rows": [...], "regressions": [...], "missing": [...], "new": [...]}
+    """
+    base_results, current_results = baseline["results"], current["results"]
+    comparison = {
+        "rows": [],
+        "regressions": [],
+        "missing": sorted(set(base_results) - set(current_results)),
+        "new": sorted(set(current_results) - set(base_results))
+    }
+    for name in sorted(set(base_results) & set(current_results)):
+        row = {"name": name, "kind": current_results[name].get("kind")}
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = base_results[name].get(metric), current_results[name].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            row[metric] = {"baseline": before, "current": after, "change": round(change, 4)}
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                comparison["regressions"].append({"name": name, "metric": metric, "change": round(change, 4)})
+        comparison["rows"].append(row)
+    return comparison
+
+def _print_comparison(comparison, threshold):
+    """Print a comparison as a table of p50/p95/p99/throughput changes"""
+    print(f"{'benchmark':<36} {'p50':>10} {'p95':>10} {'p99':>10} {'ops/s':>10}")
+    regressed = {(item["name"], item["metric"]) for item in comparison["regressions"]}
+    for row in comparison["rows"]:
+        cells = []
+        for metric in COMPARED_METRICS:
+            if metric not in row:
+                cells.append(f"{'-':>10}")
+                continue
+            marker = "!" if (row["name"], metric) in regressed else " "
+            cells.append(f"{row[metric]['change'] * 100:>+8.1f}%{marker}")
+        print(f"{row['name']:<36} " + " ".join(cells))
+    if comparison["missing"]:
+        print(f"ℹ️ Missing from current run: {', '.join(comparison['missing'])}")
+    if comparison["new"]:
+        print(f"ℹ️ New benchmarks: {', '.join(comparison['new'])}")
+    if comparison["regressions"]:
+        print(f"❌ {len(comparison['regressions'])} metrics regressed by more than {threshold:.0%}")
+    else:
+        print(f"✅ No regressions beyond {threshold:.0%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EduHubDatabase methods against a local mongod")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Populate a benchmark database and time every method")
+    run_parser.add_argument("--uri", default="mongodb://localhost:27017/", help="MongoDB connection string")
+    run_parser.add_argument("--database", default="eduhub_benchmark", help="Scratch database (it is cleared)")
+    run_parser.add_argument("--scale", type=int, default=1,
+                            help=f"Scale factor (scale=1 gives {SCALE_FACTOR_COUNTS['enrollments']} enrollments)")
+    run_parser.add_argument("--seed", type=int, default=42, help="Seed for the dataset and the call arguments")
+    run_parser.add_argument("--iterations", type=int, default=50, help="Timed calls per benchmark")
+    run_parser.add_argument("--warmup", type=int, default=5, help="Untimed calls per benchmark")
+    run_parser.add_argument("--concurrency", type=int, default=1, help="Threads issuing the timed calls")
+    run_parser.add_argument("--workers", type=int, default=1, help="Processes generating the dataset")
+    run_parser.add_argument("--only", nargs="*", help="Only run benchmarks whose name contains one of these")
+    run_parser.add_argument("--skip-populate", action="store_true", help="Reuse the existing benchmark data")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+
+    compare_parser = subparsers.add_parser("compare", help="Diff a benchmark run against a baseline")
+    compare_parser.add_argument("baseline", help="Baseline results JSON")
+    compare_parser.add_argument("current", help="Current results JSON")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative change counted as a regression (default 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_benchmarks(args.uri, args.database, args.scale, args.seed, args.iterations, args.warmup,
+                                 args.concurrency, args.only, not args.skip_populate, args.workers)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    comparison = compare_results(baseline, current, args.threshold)
+    _print_comparison(comparison, args.threshold)
+    return 1 if comparison["regressions"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Eduhub MongoDB Project - Query Plan Regression Check
+
+Runs every EduHubDatabase read and analytics method against a seeded local mongod, records
+the queries they send, and explains each one (find and aggregate, including the $lookup
+stages). The check fails on:
+    - a COLLSCAN (or a $lookup collection scan) not listed in ALLOWED_COLLSCANS
+    - an in-memory SORT stage
+    - keysExamined or docsExamined more than MAX_EXAMINED_RATIO times nReturned
+    - plan drift: a query whose stages or indexes differ from the saved snapshot
+    - a workload call that raises or sends no query, and a query that cannot be explained
+    - an analytics method in NON_EMPTY_METHODS returning no rows on the seeded dataset
+
+Usage:
+    python src/eduhub_plan_check.py --update     # record the snapshot after reviewing the plans
+    python src/eduhub_plan_check.py              # check against the snapshot (exit 1 on failures)
+
+The check populates (and clears) its own database, eduhub_plan_check by default.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+from eduhub_queries import (EduHubDatabase, EduHubWorkloadRecorder, SCHEMA_VERSION, SEEDED_REFERENCE_DATE,
+                            build_read_workload, explain_query, summarize_plan)
+
+# Examined keys or documents allowed per returned document
+MAX_EXAMINED_RATIO = 10
+
+# Methods whose base query is expected to scan its whole collection, by collection
+ALLOWED_COLLSCANS = {
+    "get_course_enrollment_statistics": {"courses"},
+    "get_student_performance_analysis": {"submissions"},
+    "iter_student_performance": {"submissions"},
+    "get_instructor_analytics": {"courses"},
+    "get_advanced_analytics": {"enrollments", "courses"}
+}
+
+# Methods that return rows on any seeded dataset; an empty result points to a broken join or
+# filter, which the plans alone do not show
+NON_EMPTY_METHODS = ("get_course_enrollment_statistics", "get_student_performance_analysis",
+                     "iter_student_performance", "get_instructor_analytics")
+
+# Plan stages compared against the snapshot; execution counts vary too much to pin
+SNAPSHOT_FIELDS = ("stages", "indexes")
+
+def capture_plans(database):
+    """Record the workload's queries and explain each of them
+
+    Returns:
+        tuple: ({query label: {method, collection, operation, stages, indexes, keysExamined,
+            docsExamined, nReturned, lookupCollectionScans}}, [(label, problem)] for workload calls
+            that failed or sent no query and queries that could not be explained)
+    """
+    plans = {}
+    failures = []
+    calls_seen = {}
+    for method_name, args, kwargs in build_read_workload(database):
+        calls_seen[method_name] = calls_seen.get(method_name, 0) + 1
+        call_label = method_name if calls_seen[method_name] == 1 else f"{method_name}#{calls_seen[method_name]}"
+        recorder = EduHubWorkloadRecorder(database)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            entries = recorder.run([(method_name, args, kwargs)])
+        failures.extend((call_label, f"workload call failed: {error}") for _, error in recorder.failures)
+        if not entries and not recorder.failures:
+            failures.append((call_label, "no queries recorded"))
+        # Queries sent from worker threads arrive in any order; keep labels stable across runs
+        entries = sorted(entries, key=lambda entry: (entry["collection"], entry["operation"]))
+        for position, entry in enumerate(entries, 1):
+            label = f"{call_label} {position}: {entry['operation']} {entry['collection']}"
+            try:
+                plan = summarize_plan(explain_query(database.db, entry))
+            except Exception as e:
+                failures.append((label, f"could not explain: {e}"))
+                continue
+            plan.update(method=method_name, collection=entry["collection"], operation=entry["operation"],
+                        stages=sorted(plan["stages"]), indexes=sorted(plan["indexes"]))
+            plans[label] = plan
+    return plans, failures
+
+def find_empty_results(database):
+    """Run the workload calls of NON_EMPTY_METHODS and report those returning no rows
+
+    Returns:
+        list: (method name, problem) tuples
+    """
+    problems = []
+    for method_name, args, kwargs in build_read_workload(database):
+        if method_name not in NON_EMPTY_METHODS:
+            continue
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                rows = list(getattr(database, method_name)(*args, **kwargs))
+        except Exception as e:
+            problems.append((method_name, f"workload call failed: {e}"))
+            continue
+        if not rows:
+            problems.append((method_name, "returned no rows on the seeded dataset"))
+    return problems
+
+def find_violations(plans):
+    """Check captured plans for collection scans, in-memory sorts and wasted index work
+
+    Returns:
+        list: (query label, problem) tuples
+    """
+    violations = []
+    for label, plan in plans.items():
+        full_scan_allowed = plan["collection"] in ALLOWED_COLLSCANS.get(plan["method"], ())
+        if "COLLSCAN" in plan["stages"] and not full_scan_allowed:
+            violations.append((label, "COLLSCAN"))
+        if plan["lookupCollectionScans"]:
+            violations.append((label, f"{plan['lookupCollectionScans']} $lookup collection scans"))
+        if "SORT" in plan["stages"]:
+            violations.append((label, "in-memory SORT"))
+        if full_scan_allowed:
+            continue
+        returned = max(plan["nReturned"], 1)
+        for metric in ("keysExamined", "docsExamined"):
+            if plan[metric] > MAX_EXAMINED_RATIO * returned:
+                violations.append((label, f"{metric} {plan[metric]} for {plan['nReturned']} returned"))
+    return violations
+
+def find_drift(plans, snapshot):
+    """Compare captured plans with a saved snapshot
+
+    Returns:
+        list: (query label, description) tuples for changed, new and missing queries
+    """
+    drift = []
+    saved = snapshot.get("plans", {})
+    for label, plan in plans.items():
+        if label not in saved:
+            drift.append((label, "new query (not in snapshot)"))
+            continue
+        for field in SNAPSHOT_FIELDS:
+            if plan[field] != saved[label][field]:
+                drift.append((label, f"{field} {saved[label][field]} -> {plan[field]}"))
+    drift.extend((label, "query no longer issued") for label in saved if label not in plans)
+    return drift
+
+def build_snapshot(plans, scale, seed):
+    """Snapshot of the reviewed plans, keyed by query label"""
+    return {
+        "schemaVersion": SCHEMA_VERSION,
+        "scale": scale,
+        "seed": seed,
+        "plans": {label: {field: plan[field] for field in ("method", "collection", "operation") + SNAPSHOT_FIELDS}
+                  for label, plan in sorted(plans.items())}
+    }
+
+def run_plan_check(uri, database_name="eduhub_plan_check", scale=1, seed=42, snapshot_path="query_plans.json",
+                   update=False, populate=True):
+    """Capture plans, report violations and drift, and optionally rewrite the snapshot
+
+    Returns:
+        int: 0 when every plan passes, 1 otherwise
+    """
+    database = EduHubDatabase(uri, database_name=database_name)
+    # Date-window reads select the same documents of the seeded dataset on any day
+    database.clock = lambda: SEEDED_REFERENCE_DATE
+    try:
+        if populate:
+            database.populate_scaled_data(scale, seed=seed)
+        plans, failures = capture_plans(database)
+        failures += find_empty_results(database)
+    finally:
+        database.close_connection()
+    for label, problem in failures:
+        print(f"❌ {label}: {problem}")
+    if not plans:
+        print("❌ No query plans captured")
+        return 1
+
+    print(f"🔍 Captured {len(plans)} query plans")
+    for label, plan in plans.items():
+        print(f"   {label:<64} {', '.join(plan['stages'])} [{', '.join(plan['indexes']) or 'no index'}]")
+
+    violations = find_violations(plans)
+    for label, problem in violations:
+        print(f"❌ {label}: {problem}")
+    # Failed calls and unexplained queries count as violations, so the check cannot pass vacuously
+    violations = failures + violations
+
+    if update:
+        with open(snapshot_path, "w") as f:
+            json.dump(build_snapshot(plans, scale, seed), f, indent=2)
+        print(f"✅ Snapshot written to {snapshot_path}")
+        return 1 if violations else 0
+
+    drift = []
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+        if snapshot.get("schemaVersion") != SCHEMA_VERSION:
+            print(f"ℹ️ Snapshot is from schema version {snapshot.get('schemaVersion')}, "
+                  f"current is {SCHEMA_VERSION}")
+        drift = find_drift(plans, snapshot)
+        for label, description in drift:
+            print(f"🔄 Plan changed for {label}: {description}")
+    else:
+        print(f"ℹ️ No snapshot at {snapshot_path}; run with --update to record one")
+
+    if violations or drift:
+        print(f"❌ Plan check failed: {len(violations)} violations, {len(drift)} plan changes "
+              f"(review and rerun with --update if the changes are intended)")
+        return 1
+    print("✅ All query plans use their indexes and match the snapshot")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check EduHubDatabase query plans for scans and drift")
+    parser.add_argument("--uri", default="mongodb://localhost:27017/", help="MongoDB connection string")
+    parser.add_argument("--database", default="eduhub_plan_check", help="Scratch database (it is cleared)")
+    parser.add_argument("--scale", type=int, default=1, help="Scale factor of the seeded dataset")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the dataset")
+    parser.add_argument("--snapshot", default="query_plans.json", help="Plan snapshot JSON")
+    parser.add_argument("--update", action="store_true", help="Rewrite the snapshot with the current plans")
+    parser.add_argument("--skip-populate", action="store_true", help="Reuse the existing data")
+    args = parser.parse_args(argv)
+    return run_plan_check(args.uri, args.database, args.scale, args.seed, args.snapshot, args.update,
+                          not args.skip_populate)
+
+if __name__ == "__main__":
+    sys.exit(main())
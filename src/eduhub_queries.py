@@ -7,18 +7,42 @@ Author: Goodrich Okoro
 Date: June 2025
 """
 
-from pymongo import MongoClient
+from pymongo import IndexModel, InsertOne, MongoClient, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime, timedelta
-import pandas as pd
+import base64
+import bisect
 import json
+import copy
 import random
+import functools
+import heapq
+import itertools
 import re 
+import threading
+import unicodedata
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Real educational data generator class
 class EduHubDataGenerator:
     """Generates realistic educational data for the EduHub platform"""
     
-    def __init__(self):
+    def __init__(self, seed=None, reference_date=None):
+        """
+        Args:
+            seed: Optional seed for a private RNG stream. The same seed always yields the same data
+            reference_date: Date that relative dates are computed from. Seeded generators default
+                to SEEDED_REFERENCE_DATE so that runs on different days produce identical documents
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._np_rng = None
+        if reference_date is None and seed is not None:
+            reference_date = SEEDED_REFERENCE_DATE
+        self.reference_date = reference_date
+        
         # Real instructor names and their specializations
         self.instructors_data = [
             {"firstName": "Sarah", "lastName": "Johnson", "email": "sarah.johnson@eduhub.com", "specialization": "Data Science", "bio": "PhD in Computer Science with 10+ years experience in machine learning and data analytics. Former Google AI researcher."},
@@ -197,6 +221,52 @@ class EduHubDataGenerator:
             ]
         }
         
+        # Realistic submission content templates
+        self.submission_content_templates = [
+            "Completed the assignment as requested. Implemented all required features and tested thoroughly. The solution follows best practices and includes proper documentation.",
+            "This project demonstrates my understanding of the concepts covered in class. I've included extensive comments and examples to show my thought process.",
+            "Successfully implemented the requirements with additional features for enhanced functionality. Spent extra time on optimization and user experience.",
+            "Encountered some challenges during implementation but found creative solutions. The final result meets all specifications and includes error handling.",
+            "Applied the techniques learned in lectures to solve this problem. The solution is scalable and well-structured with clean, readable code."
+        ]
+        
+        # Realistic feedback templates
+        self.feedback_templates = [
+            "Excellent work! Your solution demonstrates strong understanding of the concepts. Code is clean and well-documented.",
+            "Good effort. The implementation is correct but could benefit from better error handling and code organization.",
+            "Well done! Creative approach to the problem. Consider optimizing the algorithm for better performance.",
+            "Solid work. All requirements met. Nice use of design patterns and best practices.",
+            "Great attention to detail. The documentation and testing are particularly impressive.",
+            "Good solution overall. Some minor issues with edge cases, but the core logic is sound."
+        ]
+        
+        # Realistic lesson material URLs
+        self.material_urls = [
+            "https://eduhub-materials.s3.amazonaws.com/slides.pdf",
+            "https://eduhub-materials.s3.amazonaws.com/exercises.pdf",
+            "https://eduhub-materials.s3.amazonaws.com/code-examples.zip",
+            "https://eduhub-materials.s3.amazonaws.com/reference-guide.pdf",
+            "https://eduhub-materials.s3.amazonaws.com/dataset.csv"
+        ]
+        
+        # Realistic attachment URLs
+        self.attachment_types = [
+            "https://github.com/student/assignment-repo",
+            "https://student-portfolio.herokuapp.com/project",
+            "https://colab.research.google.com/drive/assignment-notebook",
+            "https://eduhub-submissions.s3.amazonaws.com/project-demo.mp4",
+            "https://eduhub-submissions.s3.amazonaws.com/source-code.zip",
+            "https://eduhub-submissions.s3.amazonaws.com/report.pdf"
+        ]
+        
+    @property
+    def np_rng(self):
+        """NumPy stream for the batch API, derived from the same seed and created on first use"""
+        if self._np_rng is None:
+            np = _import_numpy()
+            self._np_rng = np.random.default_rng(None if self.seed is None else random.Random(f"{self.seed}:numpy").getrandbits(64))
+        return self._np_rng
+    
     def get_random_date(self, start_days_ago, end_days_ago=0):
         """Generate a random date between start_days_ago and end_days_ago
         
@@ -204,11 +274,12 @@ class EduHubDataGenerator:
             start_days_ago: Number of days ago for start date (positive for past, negative for future)
             end_days_ago: Number of days ago for end date (positive for past, negative for future)
         """
-        start_date = datetime.now() - timedelta(days=start_days_ago)
-        end_date = datetime.now() - timedelta(days=end_days_ago)
+        now = self.reference_date or datetime.now()
+        start_date = now - timedelta(days=start_days_ago)
+        end_date = now - timedelta(days=end_days_ago)
         time_between = end_date - start_date
         days_between = abs(time_between.days)
-        random_days = random.randrange(days_between + 1)
+        random_days = self.rng.randrange(days_between + 1)
         
         if start_date < end_date:
             return start_date + timedelta(days=random_days)
@@ -226,33 +297,1448 @@ class EduHubDataGenerator:
     def get_material_urls(self, count=None):
         """Generate realistic material URLs"""
         if count is None:
-            count = random.randint(1, 3)
-        materials = [
-            "https://eduhub-materials.s3.amazonaws.com/slides.pdf",
-            "https://eduhub-materials.s3.amazonaws.com/exercises.pdf",
-            "https://eduhub-materials.s3.amazonaws.com/code-examples.zip",
-            "https://eduhub-materials.s3.amazonaws.com/reference-guide.pdf",
-            "https://eduhub-materials.s3.amazonaws.com/dataset.csv"
-        ]
-        return random.sample(materials, min(count, len(materials)))
+            count = self.rng.randint(1, 3)
+        return self.rng.sample(self.material_urls, min(count, len(self.material_urls)))
+        
+    def get_random_grade(self):
+        """Pick a grade from a realistic distribution (mostly B+ to A)"""
+        return self.rng.choices(
+            [95, 90, 85, 88, 92, 78, 82, 96, 87, 91],
+            weights=[10, 15, 12, 13, 14, 8, 10, 12, 8, 15]
+        )[0]
+    
+    # Batch (columnar) generation API: whole columns at once as NumPy arrays.
+    # Call .tolist() on the results before putting values in documents, since BSON
+    # cannot encode NumPy scalars.
+    
+    def random_dates(self, n, start_days_ago, end_days_ago=0):
+        """Generate n random dates between start_days_ago and end_days_ago (see get_random_date)
+        
+        Returns:
+            numpy.ndarray: datetime64[us] array; .tolist() yields datetime objects
+        """
+        np = _import_numpy()
+        now = np.datetime64(self.reference_date or datetime.now(), "us")
+        nearest, furthest = sorted((start_days_ago, end_days_ago))
+        earliest = now - np.timedelta64(furthest, "D")
+        offsets = self.np_rng.integers(0, furthest - nearest + 1, size=n)
+        return earliest + offsets.astype("timedelta64[D]")
+    
+    def random_integers(self, n, low, high):
+        """Generate n random integers in [low, high], like random.randint"""
+        return self.np_rng.integers(low, high + 1, size=n)
+    
+    def random_grades(self, n):
+        """Generate n grades from the same distribution as get_random_grade"""
+        np = _import_numpy()
+        grades = np.array([95, 90, 85, 88, 92, 78, 82, 96, 87, 91])
+        weights = np.array([10, 15, 12, 13, 14, 8, 10, 12, 8, 15])
+        return self.np_rng.choice(grades, size=n, p=weights / weights.sum())
+    
+    def random_progress(self, n):
+        """Generate n course progress percentages (0-100)"""
+        return self.random_integers(n, 0, 100)
+    
+    def random_ratings(self, n, low=3.5, high=5.0):
+        """Generate n course ratings rounded to one decimal"""
+        np = _import_numpy()
+        return np.round(self.np_rng.uniform(low, high, size=n), 1)
+    
+    def random_prices(self, n, low, high):
+        """Generate n prices between low and high ending in .99"""
+        np = _import_numpy()
+        return np.floor(self.np_rng.uniform(low, high, size=n)) + 0.99
+    
+    def random_choices(self, n, options, weights=None):
+        """Pick n values from options (with optional relative weights)
+        
+        Returns:
+            numpy.ndarray: Indexes into options, so any option type can be used
+        """
+        np = _import_numpy()
+        p = None
+        if weights is not None:
+            p = np.asarray(weights, dtype=float)
+            p = p / p.sum()
+        return self.np_rng.choice(len(options), size=n, p=p)
+    
+    def random_flags(self, n, probability=0.5):
+        """Generate n booleans that are True with the given probability"""
+        return self.np_rng.random(n) < probability
+    
+    def random_subsets(self, n, options, min_size, max_size):
+        """Generate n random subsets of options, each with min_size to max_size distinct items"""
+        np = _import_numpy()
+        orders = np.argsort(self.np_rng.random((n, len(options))), axis=1)
+        sizes = self.random_integers(n, min_size, min(max_size, len(options)))
+        return [[options[j] for j in order[:size]] for order, size in zip(orders.tolist(), sizes.tolist())]
+    
+    def allocate_course_enrollments(self, total, course_count, student_count, zipf_exponent=None):
+        """Split a number of enrollments across courses, each capped at the number of students
+        
+        Args:
+            total: Number of enrollments to distribute
+            course_count: Number of courses
+            student_count: Number of students (maximum enrollments per course)
+            zipf_exponent: Optional Zipf exponent; course popularity ranks are shuffled by the RNG
+            
+        Returns:
+            list: Enrollment count per course index
+        """
+        if total > course_count * student_count:
+            raise ValueError(f"Cannot create {total} unique enrollments from "
+                             f"{student_count} students x {course_count} courses")
+        
+        if zipf_exponent:
+            ranked_courses = self.rng.sample(range(course_count), course_count)
+            weights = [1.0 / (rank + 1) ** zipf_exponent for rank in range(course_count)]
+        else:
+            ranked_courses = list(range(course_count))
+            weights = [1.0] * course_count
+        
+        # Assign shares from the most popular course down; the remainder always fits the
+        # remaining courses, so the last course takes exactly what is left
+        counts = [0] * course_count
+        remaining = total
+        remaining_weight = sum(weights)
+        for rank, course_index in enumerate(ranked_courses):
+            share = min(student_count, int(round(remaining * weights[rank] / remaining_weight)))
+            if rank == course_count - 1:
+                share = remaining
+            counts[course_index] = share
+            remaining -= share
+            remaining_weight -= weights[rank]
+        
+        return counts
+    
+    def sample_enrollment_pairs(self, student_count, course_count, count, zipf_exponent=None):
+        """Sample unique (student_index, course_index) pairs without rejection
+        
+        Uniform popularity samples directly from the student x course pair-index space; skewed
+        popularity samples each course's roster without replacement. Both are linear in count.
+        """
+        if count > student_count * course_count:
+            raise ValueError(f"Cannot create {count} unique enrollments from "
+                             f"{student_count} students x {course_count} courses")
+        
+        if not zipf_exponent:
+            return [divmod(pair_index, course_count)
+                    for pair_index in self.rng.sample(range(student_count * course_count), count)]
+        
+        pairs = []
+        counts = self.allocate_course_enrollments(count, course_count, student_count, zipf_exponent)
+        for course_index, course_enrollments in enumerate(counts):
+            for student_index in self.rng.sample(range(student_count), course_enrollments):
+                pairs.append((student_index, course_index))
+        self.rng.shuffle(pairs)
+        return pairs
+    
+    def for_shard(self, stream, shard_index):
+        """Return a generator with an independent RNG stream for one shard of a collection's ID space
+        
+        The stream depends only on (seed, stream, shard_index), never on which worker runs it.
+        """
+        return EduHubDataGenerator(seed=f"{self.seed}:{stream}:{shard_index}", reference_date=self.reference_date)
+    
+    def get_lesson_content(self, title, category):
+        """Generate detailed lesson content based on title and category"""
+        content_templates = {
+            "Programming": f"In this lesson, you'll learn about {title.lower()}. We'll cover the fundamental concepts, best practices, and provide hands-on examples to reinforce your understanding. By the end of this lesson, you'll be able to apply these concepts in real-world programming scenarios.",
+            "Data Science": f"This lesson focuses on {title.lower()} in the context of data science. You'll explore practical applications, work with real datasets, and understand how this concept fits into the broader data science workflow. We'll use Python libraries and tools to demonstrate key concepts.",
+            "Web Development": f"Learn {title.lower()} for modern web development. This lesson covers both theoretical concepts and practical implementation. You'll build interactive examples and understand how to integrate these concepts into full-stack applications.",
+            "AI/ML": f"Explore {title.lower()} in artificial intelligence and machine learning. This lesson combines theoretical foundations with practical implementation using popular frameworks like TensorFlow and PyTorch. You'll work on real AI projects and understand the mathematical concepts behind the algorithms.",
+            "Cloud Computing": f"Master {title.lower()} in cloud environments. This lesson covers AWS services, best practices for cloud architecture, and hands-on labs to reinforce learning. You'll understand how to implement scalable and cost-effective cloud solutions.",
+            "Cybersecurity": f"Understand {title.lower()} from a cybersecurity perspective. This lesson covers threat assessment, security protocols, and practical defense strategies. You'll learn to identify vulnerabilities and implement security measures to protect systems and data."
+        }
+        
+        return content_templates.get(category, content_templates["Programming"])
+    
+    def get_assignment_description(self, title, category):
+        """Generate detailed assignment description based on title and category"""
+        descriptions = {
+            "Programming": f"Complete a {title.lower()} project that demonstrates your understanding of programming concepts covered in class. This assignment will test your ability to write clean, efficient code and implement best practices.",
+            "Data Science": f"Your task is to {title.lower()} using the techniques and tools we've discussed. You'll need to clean data, perform analysis, create visualizations, and present your findings in a clear, professional manner.",
+            "Web Development": f"Develop a {title.lower()} that showcases modern web development practices. Focus on responsive design, user experience, and clean code architecture. Include both frontend and backend components.",
+            "AI/ML": f"Implement a {title.lower()} using machine learning techniques. Your solution should include data preprocessing, model selection, training, evaluation, and a clear explanation of your approach and results."
+        }
+        
+        return descriptions.get(category, descriptions["Programming"])
+    
+    def get_assignment_instructions(self, title, category):
+        """Generate detailed assignment instructions"""
+        instructions = {
+            "Programming": "Submit your code in a GitHub repository with a README file explaining your approach. Include unit tests and documentation. Code should follow PEP 8 style guidelines.",
+            "Data Science": "Submit a Jupyter notebook with your analysis, along with a PDF report summarizing your findings. Include data visualizations and statistical analysis. Ensure your code is well-commented.",
+            "Web Development": "Deploy your application and submit the live URL along with your source code. Include a README with setup instructions and a brief description of your architecture choices.",
+            "AI/ML": "Submit your trained model, source code, and a technical report explaining your methodology. Include performance metrics and a discussion of potential improvements."
+        }
+        
+        return instructions.get(category, instructions["Programming"])
+    
+    # Scale-factor shard generation (see EduHubDatabase.populate_scaled_data).
+    # Documents are built from columns produced by the batch generation API.
+    
+    def generate_scaled_shard(self, task):
+        """Generate all documents of one scale-factor shard as (collection_name, document) pairs"""
+        collection = task["collection"]
+        if collection == "users":
+            return list(self.generate_scaled_users(task["start"], task["stop"], task["counts"]))
+        if collection == "courses":
+            return list(self.generate_scaled_courses(task["courses"]))
+        if collection == "lessons":
+            return list(self.generate_scaled_lessons(task["courses"]))
+        if collection == "assignments":
+            return list(self.generate_scaled_assignments(task["courses"]))
+        if collection == "enrollments":
+            return list(self.generate_scaled_enrollments(task["courses"], task["counts"]))
+        raise ValueError(f"Unknown shard collection: {collection}")
+    
+    def generate_scaled_users(self, start, stop, counts):
+        """Yield users with global user indexes in [start, stop); instructors come first"""
+        instructor_indexes = range(start, min(stop, counts["instructors"]))
+        student_indexes = range(max(start, counts["instructors"]) - counts["instructors"], stop - counts["instructors"])
+        
+        instructor_dates = self.random_dates(len(instructor_indexes), 730, 365).tolist()
+        for i, date_joined in zip(instructor_indexes, instructor_dates):
+            instructor_data = self.instructors_data[i % len(self.instructors_data)]
+            yield "users", self._scaled_user(
+                instructor_data, i // len(self.instructors_data), f"IN_{str(i+1).zfill(3)}", "instructor",
+                date_joined, instructor_data["bio"],
+                [instructor_data["specialization"], "Teaching", "Curriculum Design", "Mentoring"])
+        
+        student_dates = self.random_dates(len(student_indexes), 365, 0).tolist()
+        for i, date_joined in zip(student_indexes, student_dates):
+            student_data = self.students_data[i % len(self.students_data)]
+            yield "users", self._scaled_user(
+                student_data, i // len(self.students_data), f"ST_{str(i+1).zfill(3)}", "student", date_joined,
+                f"Passionate learner interested in {', '.join(student_data['interests'][:2])} and modern technology.",
+                student_data["interests"])
+    
+    def _scaled_user(self, profile_data, cohort, user_id, role, date_joined, bio, skills):
+        """Build one scale-factor user document from a real profile"""
+        # Keep emails unique once the real profiles are exhausted
+        email = profile_data["email"] if cohort == 0 else profile_data["email"].replace("@", f"{cohort}@")
+        full_name = f"{profile_data['firstName']} {profile_data['lastName']}"
+        return {
+            "userId": user_id,
+            "email": email,
+            "firstName": profile_data["firstName"],
+            "lastName": profile_data["lastName"],
+            "role": role,
+            "dateJoined": date_joined,
+            "profile": {
+                "bio": bio,
+                "avatar": self.get_avatar_url(full_name),
+                "skills": skills
+            },
+            "isActive": True
+        }
+    
+    def generate_scaled_courses(self, courses):
+        """Yield course documents for a slice of the scale plan's course catalogue"""
+        n = len(courses)
+        created = self.random_dates(n, 180, 30).tolist()
+        updated = self.random_dates(n, 30, 0).tolist()
+        published = self.random_flags(n, 0.75).tolist()  # 75% published
+        ratings = self.random_ratings(n).tolist()
+        
+        for i, course in enumerate(courses):
+            course_data = self.courses_data[course["template"]]
+            title = course_data["title"]
+            if course["section"] > 1:
+                title = f"{title} - Section {course['section']}"
+            yield "courses", {
+                "courseId": course["courseId"],
+                "title": title,
+                **_title_search_keys(title),
+                "description": course_data["description"],
+                "instructorId": course["instructorId"],
+                "category": course["category"],
+                "level": course_data["level"],
+                "duration": course_data["duration"],
+                "price": course_data["price"],
+                "tags": course_data["tags"],
+                "createdAt": created[i],
+                "updatedAt": updated[i],
+                "isPublished": published[i],
+                "rating": ratings[i]
+            }
+    
+    def generate_scaled_lessons(self, courses):
+        """Yield a fixed number of ordered lessons per course"""
+        lessons_per_course = SCALE_FACTOR_COUNTS["lessons_per_course"]
+        n = len(courses) * lessons_per_course
+        durations = self.random_integers(n, 20, 45).tolist()
+        materials = self.random_subsets(n, self.material_urls, 1, 3)
+        created = self.random_dates(n, 90, 0).tolist()
+        
+        row = 0
+        for course in courses:
+            category_lessons = self.lessons_content.get(course["category"], self.lessons_content["Programming"])
+            for i in range(lessons_per_course):
+                lesson_title = category_lessons[i % len(category_lessons)]
+                yield "lessons", {
+                    "lessonId": f"LE_{str(course['index'] * lessons_per_course + i + 1).zfill(3)}",
+                    "courseId": course["courseId"],
+                    "title": lesson_title,
+                    "content": self.get_lesson_content(lesson_title, course["category"]),
+                    "duration": durations[row],
+                    "order": i + 1,
+                    "videoUrl": self.get_video_url(lesson_title),
+                    "materials": materials[row],
+                    "createdAt": created[row]
+                }
+                row += 1
+    
+    def generate_scaled_assignments(self, courses):
+        """Yield a fixed number of assignments per course"""
+        assignments_per_course = SCALE_FACTOR_COUNTS["assignments_per_course"]
+        n = len(courses) * assignments_per_course
+        topics = self.np_rng.random(n).tolist()
+        due = self.random_dates(n, -7, -30).tolist()  # Due in 7-30 days (future dates)
+        max_points = [[100, 100, 100, 80, 90][j] for j in self.random_choices(n, range(5)).tolist()]
+        created = self.random_dates(n, 60, 30).tolist()
+        
+        row = 0
+        for course in courses:
+            category_assignments = self.assignment_topics.get(course["category"], self.assignment_topics["Programming"])
+            for i in range(assignments_per_course):
+                assignment_title = category_assignments[int(topics[row] * len(category_assignments))]
+                yield "assignments", {
+                    "assignmentId": f"AS_{str(course['index'] * assignments_per_course + i + 1).zfill(3)}",
+                    "courseId": course["courseId"],
+                    "title": assignment_title,
+                    "description": self.get_assignment_description(assignment_title, course["category"]),
+                    "dueDate": due[row],
+                    "maxPoints": max_points[row],
+                    "createdAt": created[row],
+                    "instructions": self.get_assignment_instructions(assignment_title, course["category"])
+                }
+                row += 1
+    
+    def generate_scaled_enrollments(self, courses, counts):
+        """Yield enrollments and their submissions course by course
+        
+        Students are sampled without replacement per course, and IDs start at the offsets
+        precomputed in the scale plan, so shards can be generated independently.
+        """
+        assignments_per_course = SCALE_FACTOR_COUNTS["assignments_per_course"]
+        statuses = ["active", "completed", "dropped"]
+        for course in courses:
+            roster = self.rng.sample(range(counts["students"]), course["enrollments"])
+            n = len(roster)
+            enrolled = self.random_dates(n, 60, 0).tolist()  # Within last 2 months
+            status = self.random_choices(n, statuses).tolist()
+            progress = self.random_progress(n).tolist()
+            completed = self.random_flags(n).tolist()
+            completion = self.random_dates(n, 30, 0).tolist()
+            for i, student_index in enumerate(roster):
+                yield "enrollments", {
+                    "enrollmentId": f"EN_{str(course['enrollmentOffset'] + i + 1).zfill(3)}",
+                    "studentId": f"ST_{str(student_index+1).zfill(3)}",
+                    "courseId": course["courseId"],
+                    "enrollmentDate": enrolled[i],
+                    "status": statuses[status[i]],
+                    "progress": progress[i],
+                    "completionDate": completion[i] if completed[i] else None
+                }
+            
+            submitters = self.rng.sample(roster, course["submissions"])
+            n = len(submitters)
+            assignment = self.random_integers(n, 0, assignments_per_course - 1).tolist()
+            graded = self.random_flags(n, 0.8).tolist()  # 80% of submissions are graded
+            grades = self.random_grades(n).tolist()
+            feedback = self.random_choices(n, self.feedback_templates).tolist()
+            graded_dates = self.random_dates(n, 14, 0).tolist()  # Graded within 2 weeks
+            submitted = self.random_dates(n, 30, 0).tolist()  # Within last month
+            content = self.random_choices(n, self.submission_content_templates).tolist()
+            attachments = self.random_subsets(n, self.attachment_types, 1, 3)
+            for i, student_index in enumerate(submitters):
+                assignment_index = course["index"] * assignments_per_course + assignment[i]
+                yield "submissions", {
+                    "submissionId": f"SU_{str(course['submissionOffset'] + i + 1).zfill(3)}",
+                    "assignmentId": f"AS_{str(assignment_index+1).zfill(3)}",
+                    "studentId": f"ST_{str(student_index+1).zfill(3)}",
+                    "submissionDate": submitted[i],
+                    "content": self.submission_content_templates[content[i]],
+                    "attachments": attachments[i],
+                    "grade": grades[i] if graded[i] else None,
+                    "feedback": self.feedback_templates[feedback[i]] if graded[i] else None,
+                    "gradedDate": graded_dates[i] if graded[i] else None
+                }
+
+def _normalize_search_text(text):
+    """Lowercase text, strip accents and collapse whitespace for prefix search (titleSearch)"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+def _title_search_keys(title):
+    """titleSearch and titleWords (its distinct words) of a course title"""
+    normalized = _normalize_search_text(title)
+    return {"titleSearch": normalized, "titleWords": list(dict.fromkeys(normalized.split()))}
+
+def _start_of_day(value):
+    """Midnight of a date or datetime, the key of daily rollups"""
+    return datetime(value.year, value.month, value.day)
+
+def _chunked(iterable, size):
+    """Yield lists of at most size items from any iterable"""
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+def _generate_scaled_shard(seed, reference_date, task):
+    """Worker entry point: generate one scale-factor shard in its own RNG stream"""
+    generator = EduHubDataGenerator(seed, reference_date).for_shard(task["collection"], task["shard"])
+    return generator.generate_scaled_shard(task)
+
+# The shared data generator is created on first use rather than at import time
+_default_data_generator = None
+
+def get_default_data_generator():
+    """Return the shared, unseeded data generator, creating it on first use"""
+    global _default_data_generator
+    if _default_data_generator is None:
+        _default_data_generator = EduHubDataGenerator()
+    return _default_data_generator
+
+def __getattr__(name):
+    # Keep `eduhub_queries.data_generator` working without instantiating it on import
+    if name == "data_generator":
+        return get_default_data_generator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _import_numpy():
+    """Import NumPy on first use; only the batch generation API needs it"""
+    import numpy
+    return numpy
 
-# Initialize the data generator
-data_generator = EduHubDataGenerator()
+# Bump whenever get_collection_validators() or INDEX_SPECS change, so existing
+# databases are bootstrapped again on the next connection (missing indexes are created
+# and existing collections get the current validator through collMod)
+SCHEMA_VERSION = 10
+
+# Per-course enrollment counters kept in courses.enrollmentCounts: the total and one per status
+ENROLLMENT_COUNTERS = ("total", "active", "completed", "dropped")
+
+# Seconds after which materialized enrollment statistics are rebuilt before a read, unless
+# enable_enrollment_stats() or the read sets another bound
+ENROLLMENT_STATS_MAX_STALENESS = 3600
+
+# "Now" of seeded datasets: generated dates fall in the weeks and months before it. Pin
+# EduHubDatabase.clock to it to make date-window reads on seeded data reproducible
+SEEDED_REFERENCE_DATE = datetime(2024, 1, 1)
+
+# Documents generated per unit of scale factor (TPC-style sizing: scale=1000 gives ~1M enrollments)
+SCALE_FACTOR_COUNTS = {
+    "instructors": 5,
+    "students": 200,
+    "courses": 10,
+    "lessons_per_course": 5,
+    "assignments_per_course": 2,
+    "enrollments": 1000,
+    "submission_rate": 0.8  # Submissions per enrollment
+}
+
+# Upper bound on documents per generation shard; shard boundaries (and therefore RNG streams)
+# depend only on this constant, so output is identical for any worker count
+SHARD_SIZE = 10000
+
+# Upper bound on the page size of the course search methods
+MAX_SEARCH_RESULTS = 100
+
+class EduHubIdAllocator:
+    """Hands out sequential business IDs (e.g. ST_001) from blocks leased on a counters collection
+    
+    Each lease is one atomic $inc on the counters collection, so concurrent processes never
+    receive the same ID and only touch the server once per block (hi/lo allocation). IDs left
+    in a block when a process exits are never reused, so sequences may contain gaps.
+    """
+    
+    # ID prefix -> (collection, ID field) used to seed a counter from existing documents
+    ID_FIELDS = {
+        "ST": ("users", "userId"),
+        "IN": ("users", "userId"),
+        "CO": ("courses", "courseId"),
+        "EN": ("enrollments", "enrollmentId"),
+        "LE": ("lessons", "lessonId"),
+        "AS": ("assignments", "assignmentId"),
+        "SU": ("submissions", "submissionId")
+    }
+    
+    def __init__(self, db, block_size=100):
+        """
+        Args:
+            db: pymongo Database holding the counters collection
+            block_size: Number of IDs leased per round trip
+        """
+        if block_size <= 0:
+            raise ValueError("block_size must be a positive integer")
+        self.db = db
+        self.block_size = block_size
+        self._blocks = {}      # prefix -> [next value, last value] of the current lease
+        self._synced = set()   # prefixes whose counter was checked against existing IDs
+        self._lock = threading.Lock()
+    
+    def next_id(self, prefix):
+        """Return the next ID for a prefix, leasing a new block only when the current one is used up"""
+        with self._lock:
+            block = self._blocks.get(prefix)
+            if block is None or block[0] > block[1]:
+                block = self._lease_block(prefix)
+                self._blocks[prefix] = block
+            value = block[0]
+            block[0] += 1
+        return f"{prefix}_{str(value).zfill(3)}"
+    
+    def _lease_block(self, prefix):
+        """Atomically reserve the next block_size values of a counter"""
+        if prefix not in self._synced:
+            self.sync_counter(prefix)
+            self._synced.add(prefix)
+        counter = self.db.counters.find_one_and_update(
+            {"_id": prefix},
+            {"$inc": {"value": self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        last = counter["value"]
+        return [last - self.block_size + 1, last]
+    
+    def sync_counter(self, prefix):
+        """Raise a counter to at least the highest existing numeric ID for its prefix
+        
+        Uses $max, so concurrent callers and repeated calls are safe.
+        """
+        collection_name, field = self.ID_FIELDS[prefix]
+        result = list(self.db[collection_name].aggregate([
+            {"$match": {field: {"$regex": f"^{prefix}_"}}},
+            {"$group": {
+                "_id": None,
+                "highest": {"$max": {"$toInt": {"$arrayElemAt": [{"$split": [f"${field}", "_"]}, 1]}}}
+            }}
+        ]))
+        highest = result[0]["highest"] if result else 0
+        self.db.counters.update_one({"_id": prefix}, {"$max": {"value": highest}}, upsert=True)
+    
+    def reset(self):
+        """Forget leased blocks, e.g. after the underlying data was cleared"""
+        with self._lock:
+            self._blocks.clear()
+            self._synced.clear()
+
+class EduHubCache:
+    """Thread-safe in-process LRU cache with per-entry TTLs and tag-based invalidation
+    
+    Entries are tagged with the entities they were built from (e.g. ("course", "CO_001")),
+    so a write can invalidate exactly the entries that depend on the changed document.
+    Values are deep-copied on the way in and out, so callers cannot mutate cached data.
+    """
+    
+    # Sentinel returned by get() on a miss (None and [] are valid cached values)
+    MISSING = object()
+    
+    def __init__(self, max_size=1024, ttl=300):
+        """
+        Args:
+            max_size: Maximum number of entries before the least recently used one is evicted
+            ttl: Default time to live of an entry in seconds
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()        # key -> (expires_at, value, tags)
+        self._keys_by_tag = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key):
+        """Return a copy of a live entry, or EduHubCache.MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return self.MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+    
+    def set(self, key, value, tags=(), ttl=None):
+        """Store a copy of value under key, tagged with the entities it depends on"""
+        value = copy.deepcopy(value)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value, tuple(tags))
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate(self, *tags):
+        """Drop every entry tagged with any of the given tags"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+    
+    def clear(self):
+        """Drop all entries (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+    
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+    
+    def _remove(self, key):
+        """Remove an entry and its tag references (caller holds the lock)"""
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+class EduHubAutocomplete:
+    """In-memory type-ahead index over course titles and tags
+    
+    Every word-start suffix of a normalized title and every normalized tag is kept in one sorted
+    list of (term, courseId) pairs, so the candidates for a prefix form a contiguous slice found
+    with bisect. Completions are ranked by rating or enrollment count without a database round trip.
+    """
+    
+    RANK_FIELDS = ("rating", "enrollments")
+    
+    # Prefixes of up to SHORT_PREFIX_LENGTH characters select the largest slices, so their best
+    # TOP_K courses are kept ranked and updated in place on every change instead of walking the slice
+    SHORT_PREFIX_LENGTH = 3
+    TOP_K = 25
+    
+    # Other completions of recently typed prefixes are memoized (LRU); a change only drops the
+    # prefixes of the changed course's terms
+    MEMO_SIZE = 4096
+    
+    def __init__(self, rank_by="rating", published_only=True):
+        """
+        Args:
+            rank_by: "rating" or "enrollments"
+            published_only: Only complete published courses
+        """
+        if rank_by not in self.RANK_FIELDS:
+            raise ValueError(f"rank_by must be one of {', '.join(self.RANK_FIELDS)}")
+        self.rank_by = rank_by
+        self.published_only = published_only
+        self._terms = []      # sorted (term, courseId) pairs
+        self._courses = {}    # courseId -> {"title", "score", "enrollments", "terms": {term: label}}
+        self._top = {}        # short prefix -> up to TOP_K sorted rank keys (missing: rebuilt on demand)
+        self._memo = OrderedDict()  # prefix -> {k: completions}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._courses)
+    
+    def build(self, courses, enrollment_counts=None):
+        """Replace the index with the given course documents
+        
+        Args:
+            courses: Course documents (courseId, title, tags, rating and isPublished are used)
+            enrollment_counts: Optional dict of courseId -> number of enrollments
+        """
+        enrollment_counts = enrollment_counts or {}
+        entries = {}
+        for course in courses:
+            entry = self._entry(course, enrollment_counts.get(course["courseId"], 0))
+            if entry is not None:
+                entries[course["courseId"]] = entry
+        terms = sorted((term, course_id) for course_id, entry in entries.items() for term in entry["terms"])
+        candidates = defaultdict(list)
+        for course_id, entry in entries.items():
+            for prefix in self._short_prefixes(entry["terms"]):
+                candidates[prefix].append(self._rank_key(course_id, entry))
+        top = {prefix: heapq.nsmallest(self.TOP_K, keys) for prefix, keys in candidates.items()}
+        with self._lock:
+            self._courses = entries
+            self._terms = terms
+            self._top = top
+            self._memo.clear()
+    
+    def upsert_course(self, course, enrollment_count=None):
+        """Add or refresh one course (e.g. after its tags or publication state changed)
+        
+        Args:
+            course: Course document
+            enrollment_count: New enrollment count (keeps the known count when omitted)
+        """
+        with self._lock:
+            previous = self._courses.get(course["courseId"])
+            if enrollment_count is None:
+                enrollment_count = previous["enrollments"] if previous else 0
+            self._remove(course["courseId"])
+            entry = self._entry(course, enrollment_count)
+            if entry is not None:
+                self._courses[course["courseId"]] = entry
+                for term in entry["terms"]:
+                    bisect.insort(self._terms, (term, course["courseId"]))
+                self._rerank(course["courseId"], entry)
+                self._forget(entry["terms"])
+    
+    def remove_course(self, course_id):
+        """Drop a course from the index"""
+        with self._lock:
+            self._remove(course_id)
+    
+    def add_enrollments(self, course_id, count=1):
+        """Adjust the enrollment count used for ranking"""
+        with self._lock:
+            entry = self._courses.get(course_id)
+            if entry is not None:
+                entry["enrollments"] += count
+                if self.rank_by == "enrollments":
+                    entry["score"] = entry["enrollments"]
+                    self._rerank(course_id, entry)
+                    self._forget(entry["terms"])
+    
+    def complete(self, prefix, k=10):
+        """Return the k best courses with a title word or tag starting with prefix
+        
+        Args:
+            prefix: Typed text (case, accents and extra whitespace are ignored)
+            k: Maximum number of completions
+            
+        Returns:
+            list: Dicts with courseId, title, match (the completed title or tag) and score
+        """
+        normalized = _normalize_search_text(prefix)
+        if not normalized or k <= 0:
+            return []
+        with self._lock:
+            if len(normalized) <= self.SHORT_PREFIX_LENGTH and k <= self.TOP_K:
+                if normalized not in self._top:
+                    self._top[normalized] = self._rank_slice(normalized, self.TOP_K)
+                return [self._completion(course_id, normalized)
+                        for _, _, course_id in self._top[normalized][:k]]
+            
+            cached = self._memo.get(normalized, {})
+            if k in cached:
+                self._memo.move_to_end(normalized)
+                return [dict(completion) for completion in cached[k]]
+            
+            completions = [self._completion(course_id, normalized)
+                           for _, _, course_id in self._rank_slice(normalized, k)]
+            self._memo.setdefault(normalized, {})[k] = completions
+            self._memo.move_to_end(normalized)
+            if len(self._memo) > self.MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return [dict(completion) for completion in completions]
+    
+    def _rank_slice(self, prefix, k):
+        """Rank keys of the k best courses having a term starting with prefix (walks the whole slice)"""
+        start = bisect.bisect_left(self._terms, (prefix,))
+        end = bisect.bisect_left(self._terms, (prefix + "\U0010ffff",), lo=start)
+        course_ids = {course_id for _, course_id in self._terms[start:end]}
+        return heapq.nsmallest(k, (self._rank_key(course_id, self._courses[course_id]) for course_id in course_ids))
+    
+    def _completion(self, course_id, prefix):
+        """Completion dict of a course for a prefix, matched on its first term starting with prefix"""
+        entry = self._courses[course_id]
+        term = min(term for term in entry["terms"] if term.startswith(prefix))
+        return {"courseId": course_id, "title": entry["title"], "match": entry["terms"][term],
+                "score": entry["score"]}
+    
+    @staticmethod
+    def _rank_key(course_id, entry):
+        """Sort key of a course: best score first, then title and courseId"""
+        return (-entry["score"], entry["title"], course_id)
+    
+    def _short_prefixes(self, terms):
+        """Prefixes of the terms that have a maintained top list"""
+        return {term[:length] for term in terms for length in range(1, min(len(term), self.SHORT_PREFIX_LENGTH) + 1)}
+    
+    def _rerank(self, course_id, entry):
+        """Move a new or rescored course within the top lists of its short prefixes (caller holds the lock)"""
+        key = self._rank_key(course_id, entry)
+        for prefix in self._short_prefixes(entry["terms"]):
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            position = next((index for index, item in enumerate(top) if item[2] == course_id), None)
+            if position is None:
+                # A list shorter than TOP_K already holds every match, so a missing course is new
+                if len(top) < self.TOP_K or key < top[-1]:
+                    bisect.insort(top, key)
+                    del top[self.TOP_K:]
+                continue
+            del top[position]
+            if len(top) == self.TOP_K - 1 and key > top[-1]:
+                # It fell to the end of a full list, where an unlisted course may now outrank it
+                del self._top[prefix]
+            else:
+                bisect.insort(top, key)
+    
+    def _forget(self, terms):
+        """Drop memoized completions of every prefix of the given terms (caller holds the lock)"""
+        for term in terms:
+            for length in range(1, len(term) + 1):
+                self._memo.pop(term[:length], None)
+    
+    def _entry(self, course, enrollment_count):
+        """Build the index entry of a course, or None if it should not be completed"""
+        if self.published_only and not course.get("isPublished", False):
+            return None
+        title = course.get("title", "")
+        terms = {}
+        words = _normalize_search_text(title).split(" ")
+        for position in range(len(words)):
+            terms.setdefault(" ".join(words[position:]), title)
+        for tag in course.get("tags", []):
+            terms.setdefault(_normalize_search_text(tag), tag)
+        terms.pop("", None)
+        score = course.get("rating", 0) if self.rank_by == "rating" else enrollment_count
+        return {"title": title, "score": score, "enrollments": enrollment_count, "terms": terms}
+    
+    def _remove(self, course_id):
+        """Remove a course's terms, top list places and memoized completions (caller holds the lock)"""
+        entry = self._courses.pop(course_id, None)
+        if entry is None:
+            return
+        for term in entry["terms"]:
+            index = bisect.bisect_left(self._terms, (term, course_id))
+            if index < len(self._terms) and self._terms[index] == (term, course_id):
+                del self._terms[index]
+        for prefix in self._short_prefixes(entry["terms"]):
+            top = self._top.get(prefix)
+            position = None if top is None else next(
+                (index for index, item in enumerate(top) if item[2] == course_id), None)
+            if position is None:
+                continue
+            if len(top) == self.TOP_K:
+                # The next best course is not listed; rebuild this list on demand
+                del self._top[prefix]
+            else:
+                del top[position]
+        self._forget(entry["terms"])
+
+class EduHubTagIndex:
+    """In-memory inverted index from tags, categories, levels and prices to bitsets of course positions
+    
+    Each course gets a fixed bit position; a tag maps to a Python int with the bits of its
+    courses set, so AND/OR/NOT tag queries and facet counts are a few big-integer operations
+    instead of a database aggregation.
+    """
+    
+    def __init__(self, published_only=True):
+        """
+        Args:
+            published_only: Only index published courses
+        """
+        self.published_only = published_only
+        self._positions = {}          # courseId -> bit position
+        # bit position -> courseId; a removed course keeps its slot (only its bits are cleared)
+        # and gets the same position back if it is indexed again
+        self._course_ids = []
+        self._documents = {}          # bit position -> (tags, category, level, price)
+        self._tags = defaultdict(int)
+        self._categories = defaultdict(int)
+        self._levels = defaultdict(int)
+        self._prices = defaultdict(int)
+        self._price_values = []       # sorted distinct prices
+        self._alive = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._documents)
+    
+    def build(self, courses):
+        """Replace the index with the given course documents
+        
+        Args:
+            courses: Course documents (courseId, tags, category, level, price and isPublished are used)
+        """
+        course_ids, documents = [], {}
+        tag_positions, category_positions, level_positions = defaultdict(list), defaultdict(list), defaultdict(list)
+        price_positions = defaultdict(list)
+        for course in courses:
+            if not self._indexed(course):
+                continue
+            position = len(course_ids)
+            course_ids.append(course["courseId"])
+            document = self._document(course)
+            documents[position] = document
+            tags, category, level, price = document
+            for tag in tags:
+                tag_positions[tag].append(position)
+            category_positions[category].append(position)
+            level_positions[level].append(position)
+            price_positions[price].append(position)
+        
+        size = len(course_ids)
+        with self._lock:
+            self._course_ids = course_ids
+            self._positions = {course_id: position for position, course_id in enumerate(course_ids)}
+            self._documents = documents
+            self._tags = defaultdict(int, {tag: _bitset(positions, size) for tag, positions in tag_positions.items()})
+            self._categories = defaultdict(int, {key: _bitset(positions, size)
+                                                 for key, positions in category_positions.items()})
+            self._levels = defaultdict(int, {key: _bitset(positions, size) for key, positions in level_positions.items()})
+            self._prices = defaultdict(int, {key: _bitset(positions, size) for key, positions in price_positions.items()})
+            self._price_values = sorted(self._prices)
+            self._alive = (1 << size) - 1
+    
+    def upsert_course(self, course):
+        """Add or refresh one course (e.g. after its tags or publication state changed)"""
+        with self._lock:
+            position = self._positions.get(course["courseId"])
+            if position is not None:
+                self._clear(position)
+            if not self._indexed(course):
+                return
+            if position is None:
+                position = len(self._course_ids)
+                self._positions[course["courseId"]] = position
+                self._course_ids.append(course["courseId"])
+            
+            document = self._document(course)
+            tags, category, level, price = document
+            bit = 1 << position
+            for tag in tags:
+                self._tags[tag] |= bit
+            self._categories[category] |= bit
+            self._levels[level] |= bit
+            if price not in self._prices:
+                bisect.insort(self._price_values, price)
+            self._prices[price] |= bit
+            self._documents[position] = document
+            self._alive |= bit
+    
+    def remove_course(self, course_id):
+        """Drop a course from the index"""
+        with self._lock:
+            position = self._positions.get(course_id)
+            if position is not None:
+                self._clear(position)
+    
+    def query(self, all_tags=None, any_tags=None, none_tags=None, category=None, level=None,
+              min_price=None, max_price=None, limit=None, facets=True):
+        """Find courses matching a tag expression and optional filters
+        
+        Args:
+            all_tags: Courses must have every one of these tags (AND)
+            any_tags: Courses must have at least one of these tags (OR)
+            none_tags: Courses must have none of these tags (NOT)
+            category: Exact category
+            level: Exact level
+            min_price: Minimum price (inclusive)
+            max_price: Maximum price (inclusive)
+            limit: Maximum number of course IDs to return (count and facets cover all matches)
+            facets: Also count matching courses per tag
+            
+        Returns:
+            dict: {"courseIds": [...], "count": int, "facets": {tag: count}}
+        """
+        with self._lock:
+            mask = self._alive
+            for tag in all_tags or ():
+                mask &= self._tags.get(tag, 0)
+            if any_tags is not None:
+                any_mask = 0
+                for tag in any_tags:
+                    any_mask |= self._tags.get(tag, 0)
+                mask &= any_mask
+            for tag in none_tags or ():
+                mask &= ~self._tags.get(tag, 0)
+            if category is not None:
+                mask &= self._categories.get(category, 0)
+            if level is not None:
+                mask &= self._levels.get(level, 0)
+            if min_price is not None or max_price is not None:
+                mask &= self._price_mask(min_price, max_price)
+            
+            result = {
+                "courseIds": [self._course_ids[position] for position in _bit_positions(mask, limit)],
+                "count": _popcount(mask)
+            }
+            if facets:
+                result["facets"] = {tag: count for tag, count in
+                                    ((tag, _popcount(mask & tag_mask)) for tag, tag_mask in self._tags.items())
+                                    if count}
+        return result
+    
+    def _indexed(self, course):
+        """Whether a course belongs in the index"""
+        return course.get("isPublished", False) or not self.published_only
+    
+    @staticmethod
+    def _document(course):
+        """Fields of a course kept by the index"""
+        return (tuple(set(course.get("tags", []))), course.get("category"), course.get("level"),
+                course.get("price", 0))
+    
+    def _price_mask(self, min_price, max_price):
+        """Bitset of the courses priced within [min_price, max_price] (caller holds the lock)"""
+        start = 0 if min_price is None else bisect.bisect_left(self._price_values, min_price)
+        end = len(self._price_values) if max_price is None else bisect.bisect_right(self._price_values, max_price)
+        mask = 0
+        for price in self._price_values[start:end]:
+            mask |= self._prices[price]
+        return mask
+    
+    def _clear(self, position):
+        """Remove the bits of the course at position (caller holds the lock)"""
+        document = self._documents.pop(position, None)
+        if document is None:
+            return
+        tags, category, level, price = document
+        clear = ~(1 << position)
+        for tag in tags:
+            self._tags[tag] &= clear
+            if not self._tags[tag]:
+                del self._tags[tag]
+        self._categories[category] &= clear
+        self._levels[level] &= clear
+        self._prices[price] &= clear
+        if not self._prices[price]:
+            del self._prices[price]
+            del self._price_values[bisect.bisect_left(self._price_values, price)]
+        self._alive &= clear
+
+def _bitset(positions, size):
+    """Build an int with the given bit positions set, in time linear in the number of positions"""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+def _bit_positions(mask, limit=None):
+    """Return the set bit positions of an int in ascending order (at most limit of them)"""
+    positions = []
+    for byte_index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        while byte:
+            if limit is not None and len(positions) >= limit:
+                return positions
+            low = byte & -byte
+            positions.append(byte_index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+if hasattr(int, "bit_count"):
+    # Python 3.10+ counts bits without building a string
+    _popcount = int.bit_count
+else:
+    def _popcount(mask):
+        """Number of set bits"""
+        return bin(mask).count("1")
 
 class EduHubDatabase:
-    def __init__(self, connection_string="mongodb://localhost:27017/"):
+    def __init__(self, connection_string="mongodb://localhost:27017/", id_block_size=100, bootstrap=True,
+                 denormalize_instructors=False, database_name="eduhub_db"):
         """
         Initialize the EduHub database connection
         
         Args:
             connection_string (str): MongoDB connection string
+            id_block_size (int): Number of IDs leased per round trip by the ID allocator
+            bootstrap (bool): Create collections and indexes unless the recorded schema version
+                is current. Pass False to skip bootstrapping entirely (e.g. short-lived workers)
+            denormalize_instructors (bool): Embed an instructor summary in every course so course
+                reads skip the users $lookup. Run sync_instructor_summaries() once on existing data
+            database_name (str): Database to use (e.g. a scratch database for benchmarks)
         """
         self.client = MongoClient(connection_string)
-        self.db = self.client['eduhub_db']
+        self.db = self.client[database_name]
+        self._data_generator = None
+        self.id_allocator = EduHubIdAllocator(self.db, id_block_size)
+        self.cache = None
+        self.autocomplete = None
+        self.tag_index = None
+        self.enrollment_stats_enabled = False
+        self.enrollment_stats_staleness = ENROLLMENT_STATS_MAX_STALENESS
+        self.denormalize_instructors = denormalize_instructors
+        # Time source of the relative date windows of reads (recent users, assignments due,
+        # revenue windows); e.g. lambda: SEEDED_REFERENCE_DATE for reproducible benchmarks
+        self.clock = datetime.now
+        if bootstrap:
+            self.ensure_schema()
+    
+    @property
+    def data_generator(self):
+        """Data generator used for sample data (the shared generator unless a seed was given)"""
+        if self._data_generator is None:
+            self._data_generator = get_default_data_generator()
+        return self._data_generator
+    
+    @data_generator.setter
+    def data_generator(self, generator):
+        self._data_generator = generator
+    
+    def enable_autocomplete(self, rank_by="rating", published_only=True):
+        """Load course titles and tags into an in-memory autocomplete index
+        
+        The index is refreshed by create_new_course, add_tags_to_course, bulk_add_tags,
+        mark_course_as_published and enroll_student_in_course. Call again to pick up changes
+        made by other processes.
+        
+        Args:
+            rank_by: Rank completions by "rating" or by "enrollments"
+            published_only: Only complete published courses
+            
+        Returns:
+            EduHubAutocomplete: The loaded index
+        """
+        autocomplete = EduHubAutocomplete(rank_by, published_only)
+        enrollment_counts = {}
+        if rank_by == "enrollments":
+            enrollment_counts = {row["_id"]: row["count"] for row in self.db.enrollments.aggregate([
+                {"$group": {"_id": "$courseId", "count": {"$sum": 1}}}
+            ])}
+        autocomplete.build(self.db.courses.find({}, self.COURSE_INDEX_FIELDS), enrollment_counts)
+        self.autocomplete = autocomplete
+        print(f"✅ Autocomplete index loaded with {len(autocomplete)} courses")
+        return autocomplete
+    
+    def autocomplete_courses(self, prefix, k=10):
+        """Complete a typed prefix from the in-memory index (loaded on first use)"""
+        if self.autocomplete is None:
+            self.enable_autocomplete()
+        return self.autocomplete.complete(prefix, k)
+    
+    def enable_tag_index(self, published_only=True):
+        """Load course tags, categories, levels and prices into an in-memory bitset index
+        
+        The index is refreshed by create_new_course, add_tags_to_course, bulk_add_tags and
+        mark_course_as_published. Call again to pick up changes made by other processes.
+        
+        Args:
+            published_only: Only index published courses
+            
+        Returns:
+            EduHubTagIndex: The loaded index
+        """
+        tag_index = EduHubTagIndex(published_only)
+        tag_index.build(self.db.courses.find({}, self.COURSE_INDEX_FIELDS))
+        self.tag_index = tag_index
+        print(f"✅ Tag index loaded with {len(tag_index)} courses")
+        return tag_index
+    
+    def filter_courses_by_tags(self, all_tags=None, any_tags=None, none_tags=None, category=None, level=None,
+                               min_price=None, max_price=None, limit=None, facets=True):
+        """Filter the catalog by tag expression and attributes from the in-memory tag index
+        
+        See EduHubTagIndex.query for the arguments; the index is loaded on first use.
+        
+        Returns:
+            dict: {"courseIds": [...], "count": int, "facets": {tag: count}}
+        """
+        if self.tag_index is None:
+            self.enable_tag_index()
+        return self.tag_index.query(all_tags, any_tags, none_tags, category, level,
+                                    min_price, max_price, limit, facets)
+    
+    # Course fields read into the autocomplete and tag indexes
+    COURSE_INDEX_FIELDS = {"_id": 0, "courseId": 1, "title": 1, "tags": 1, "rating": 1, "isPublished": 1,
+                           "category": 1, "level": 1, "price": 1}
+    
+    def _refresh_course_indexes(self, course_ids):
+        """Reload changed courses into the enabled in-memory course indexes"""
+        indexes = [index for index in (self.autocomplete, self.tag_index) if index is not None]
+        if not indexes or not course_ids:
+            return
+        for course in self.db.courses.find({"courseId": {"$in": list(course_ids)}}, self.COURSE_INDEX_FIELDS):
+            for index in indexes:
+                index.upsert_course(course)
+    
+    def _reload_course_indexes(self):
+        """Rebuild the enabled in-memory course indexes from the database"""
+        if self.autocomplete is not None:
+            self.enable_autocomplete(self.autocomplete.rank_by, self.autocomplete.published_only)
+        if self.tag_index is not None:
+            self.enable_tag_index(self.tag_index.published_only)
+    
+    def _record_enrollment_changes(self, counter_deltas):
+        """Apply enrollment changes to the course counters, enabled indexes and materialized statistics
+        
+        Args:
+            counter_deltas: {course_id: {counter: change}} with counters from ENROLLMENT_COUNTERS,
+                e.g. {"CO_001": {"total": 1, "active": 1}} for a new enrollment
+        """
+        operations = [UpdateOne({"courseId": course_id},
+                                {"$inc": {f"enrollmentCounts.{counter}": delta for counter, delta in deltas.items()}})
+                      for course_id, deltas in counter_deltas.items() if any(deltas.values())]
+        if not operations:
+            return
+        try:
+            self.db.courses.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # The enrollment write itself succeeded; reconcile_course_counters() repairs the counters
+            print(f"❌ Error updating course enrollment counters: {e}")
+        self._invalidate_cache(*[("course", course_id) for course_id in counter_deltas])
+        
+        course_deltas = {course_id: deltas.get("total", 0) for course_id, deltas in counter_deltas.items()
+                         if deltas.get("total")}
+        if not course_deltas:
+            return
+        if self.autocomplete is not None:
+            for course_id, delta in course_deltas.items():
+                self.autocomplete.add_enrollments(course_id, delta)
+        if self.enrollment_stats_enabled:
+            try:
+                self._apply_enrollment_stats_deltas(course_deltas)
+            except Exception as e:
+                # The write itself succeeded; the next rebuild repairs the statistics
+                print(f"❌ Error updating enrollment statistics: {e}")
+    
+    # Cache tag used for documents of each collection (see EduHubCache)
+    CACHE_TAGS = {"users": "user", "courses": "course"}
+    
+    def enable_cache(self, max_size=1024, ttl=300):
+        """Serve by-ID reads from an in-process LRU/TTL cache invalidated by the write methods
+        
+        Args:
+            max_size: Maximum number of cached results
+            ttl: Seconds before a cached result expires (bounds staleness from other processes)
+            
+        Returns:
+            EduHubCache: The cache, e.g. to inspect cache.stats()
+        """
+        self.cache = EduHubCache(max_size, ttl)
+        return self.cache
+    
+    def disable_cache(self):
+        """Stop caching reads"""
+        self.cache = None
+    
+    def _read_through(self, key, loader, tags):
+        """Return a cached result or load and cache it; empty results are not cached
+        
+        Args:
+            key: Cache key
+            loader: Function running the actual query
+            tags: Function mapping the loaded result to the entity tags it depends on
+        """
+        if self.cache is None:
+            return loader()
+        value = self.cache.get(key)
+        if value is not EduHubCache.MISSING:
+            return value
+        value = loader()
+        if value:
+            self.cache.set(key, value, tags(value))
+        return value
+    
+    def _invalidate_cache(self, *tags):
+        """Drop cached reads that depend on the given entity tags"""
+        if self.cache is not None:
+            self.cache.invalidate(*tags)
+    
+    # Instructor fields embedded in courses when denormalize_instructors is enabled
+    INSTRUCTOR_SUMMARY_FIELDS = {"_id": 0, "userId": 1, "firstName": 1, "lastName": 1, "email": 1,
+                                 "profile.bio": 1, "isActive": 1}
+    
+    # Course fields returned by get_course_with_instructor_info
+    COURSE_WITH_INSTRUCTOR_FIELDS = {
+        "courseId": 1,
+        "title": 1,
+        "description": 1,
+        "instructorId": 1,
+        "category": 1,
+        "level": 1,
+        "duration": 1,
+        "price": 1,
+        "tags": 1,
+        "rating": 1,
+        "instructor.firstName": 1,
+        "instructor.lastName": 1,
+        "instructor.email": 1,
+        "instructor.profile.bio": 1
+    }
+    
+    @staticmethod
+    def _instructor_summary(user):
+        """Build the summary embedded in courses from a user document"""
+        return {
+            "firstName": user.get("firstName"),
+            "lastName": user.get("lastName"),
+            "email": user.get("email"),
+            "profile": {"bio": user.get("profile", {}).get("bio", "")},
+            "isActive": user.get("isActive", True)
+        }
+    
+    def sync_instructor_summaries(self, instructor_ids=None, batch_size=1000):
+        """Backfill or repair the instructor summaries embedded in courses
+        
+        Args:
+            instructor_ids: Only resync courses of these instructors (defaults to all courses;
+                courses whose instructor no longer exists then lose their stale summary)
+            batch_size: Maximum number of instructors per bulk_write call
+            
+        Returns:
+            int: Number of course documents modified
+        """
+        query = {"role": "instructor"}
+        if instructor_ids is not None:
+            query["userId"] = {"$in": list(instructor_ids)}
+        
+        modified = 0
+        synced_ids = []
+        try:
+            instructors = self.db.users.find(query, self.INSTRUCTOR_SUMMARY_FIELDS)
+            for chunk in _chunked(instructors, batch_size):
+                operations = [UpdateMany({"instructorId": user["userId"]},
+                                         {"$set": {"instructor": self._instructor_summary(user)}})
+                              for user in chunk]
+                modified += self.db.courses.bulk_write(operations, ordered=False).modified_count
+                synced_ids.extend(user["userId"] for user in chunk)
+            
+            orphans = {"instructor": {"$exists": True}, "instructorId": {"$nin": synced_ids}}
+            if instructor_ids is not None:
+                orphans["instructorId"]["$in"] = list(instructor_ids)
+            modified += self.db.courses.update_many(orphans, {"$unset": {"instructor": ""}}).modified_count
+        except Exception as e:
+            print(f"❌ Error syncing instructor summaries: {e}")
+            return modified
+        
+        if self.cache is not None:
+            self.cache.clear()
+        print(f"✅ Instructor summaries synced for {len(synced_ids)} instructors. Modified courses: {modified}")
+        return modified
+    
+    def _fan_out_instructor_updates(self, updates):
+        """Propagate user field changes to the summaries embedded in their courses
+        
+        Args:
+            updates: List of (user_id, {summary_field: value}) pairs, e.g. ("IN_001", {"profile.bio": "..."})
+        """
+        if not self.denormalize_instructors:
+            return 0
+        operations = [UpdateMany({"instructorId": user_id, "instructor": {"$exists": True}},
+                                 {"$set": {f"instructor.{field}": value for field, value in fields.items()}})
+                      for user_id, fields in updates if fields]
+        if not operations:
+            return 0
+        return self.db.courses.bulk_write(operations, ordered=False).modified_count
+    
+    def ensure_schema(self):
+        """Bootstrap collections and indexes only if the recorded schema version is not current
+        
+        Returns:
+            bool: True if the schema was (re)created, False if it was already up to date
+        """
+        metadata = self.db.metadata.find_one({"_id": "schema"})
+        if metadata and metadata.get("version") == SCHEMA_VERSION:
+            return False
+        
         self.setup_collections()
+        return True
         
+    # Index definitions per collection: (keys, options)
+    INDEX_SPECS = {
+        # Users collection indexes
+        "users": [
+            ("userId", {"unique": True}),
+            ("email", {"unique": True}),
+            # Serves role filters and keyset pages of a role ordered by userId
+            ([("role", 1), ("userId", 1)], {}),
+            # Join-date filters and keyset pages of recent users ordered by (dateJoined, userId)
+            ([("dateJoined", 1), ("userId", 1)], {})
+        ],
+        # Courses collection indexes
+        "courses": [
+            ("courseId", {"unique": True}),
+            ("title", {}),
+            # Anchored prefix search on the normalized title, paged by courseId
+            ([("titleSearch", 1), ("courseId", 1)], {}),
+            # Multikey index for partial title search (a prefix of any title word)
+            ([("titleWords", 1), ("courseId", 1)], {}),
+            # Serves category filters and keyset pages of a category ordered by courseId
+            ([("category", 1), ("courseId", 1)], {}),
+            ("instructorId", {}),
+            # Price filters and keyset pages of a price range ordered by (price, courseId)
+            ([("price", 1), ("courseId", 1)], {}),
+            # Multikey index for tag filters and keyset pages of a tag ordered by courseId
+            ([("tags", 1), ("courseId", 1)], {}),
+            ([("title", "text"), ("description", "text")], {})
+        ],
+        # Enrollments collection indexes
+        "enrollments": [
+            ("enrollmentId", {"unique": True}),
+            # Also serves studentId-only queries (prefix)
+            ([("studentId", 1), ("courseId", 1)], {"unique": True}),
+            # Roster pages of a course in each supported order (see get_course_roster)
+            ([("courseId", 1), ("enrollmentId", 1)], {}),
+            ([("courseId", 1), ("progress", 1), ("enrollmentId", 1)], {}),
+            ([("courseId", 1), ("enrollmentDate", 1), ("enrollmentId", 1)], {}),
+            ("enrollmentDate", {})
+        ],
+        # Lessons collection indexes
+        "lessons": [
+            ("lessonId", {"unique": True}),
+            ([("courseId", 1), ("order", 1)], {})
+        ],
+        # Assignments collection indexes
+        "assignments": [
+            ("assignmentId", {"unique": True}),
+            ("courseId", {}),
+            ("dueDate", {})
+        ],
+        # Submissions collection indexes
+        "submissions": [
+            ("submissionId", {"unique": True}),
+            ([("studentId", 1), ("assignmentId", 1)], {}),
+            ("assignmentId", {})
+        ],
+        # Instructor revenue rollups: one document per instructor per day
+        "instructor_revenue_daily": [
+            # Windows of one instructor, and the upsert target of enrollment writes
+            ([("instructorId", 1), ("day", 1)], {"unique": True}),
+            # Windows across all instructors
+            ("day", {})
+        ]
+    }
+    
     def setup_collections(self):
-        """Set up all collections with validation rules"""
+        """Set up all collections with validation rules
+        
+        Collections are bootstrapped concurrently; each one is created with its validator and
+        then gets all of its indexes in a single createIndexes command.
+        """
+        validators = self.get_collection_validators()
+        with ThreadPoolExecutor(max_workers=len(validators)) as executor:
+            list(executor.map(self._bootstrap_collection, validators.keys()))
+        print("✅ All Indexes created successfully")
+        
+        # Record the schema version so later connections can skip this work
+        self.db.metadata.update_one(
+            {"_id": "schema"},
+            {"$set": {"version": SCHEMA_VERSION, "updatedAt": datetime.now()}},
+            upsert=True
+        )
+    
+    def get_collection_validators(self):
+        """Return the $jsonSchema validator of every collection"""
         
         # Users collection validation - Complete schema
         user_validator = {
@@ -296,6 +1782,10 @@ class EduHubDatabase:
                 "properties": {
                     "courseId": {"bsonType": "string"},
                     "title": {"bsonType": "string"},
+                    # Normalized title for anchored prefix search (see _normalize_search_text)
+                    "titleSearch": {"bsonType": "string"},
+                    # Words of titleSearch for word-prefix search
+                    "titleWords": {"bsonType": "array", "items": {"bsonType": "string"}},
                     "description": {"bsonType": "string"},
                     "instructorId": {"bsonType": "string"},
                     "category": {"bsonType": "string"},
@@ -312,7 +1802,14 @@ class EduHubDatabase:
                     "createdAt": {"bsonType": "date"},
                     "updatedAt": {"bsonType": "date"},
                     "isPublished": {"bsonType": "bool"},
-                    "rating": {"bsonType": "number"}
+                    "rating": {"bsonType": "number"},
+                    # Instructor summary embedded when denormalize_instructors is enabled
+                    "instructor": {"bsonType": "object"},
+                    # Enrollment counters maintained by the enrollment write paths
+                    "enrollmentCounts": {
+                        "bsonType": "object",
+                        "properties": {counter: {"bsonType": "number"} for counter in ENROLLMENT_COUNTERS}
+                    }
                 }
             }
         }
@@ -336,7 +1833,9 @@ class EduHubDatabase:
                         "minimum": 0,
                         "maximum": 100
                     },
-                    "completionDate": {"bsonType": ["date", "null"]}
+                    "completionDate": {"bsonType": ["date", "null"]},
+                    # Course price when the student enrolled (revenue rollups)
+                    "pricePaid": {"bsonType": "number"}
                 }
             }
         }
@@ -403,68 +1902,60 @@ class EduHubDatabase:
             }
         }
         
-        # Create collections with validation
-        validators = {
+        # Daily instructor revenue rollups validation
+        revenue_validator = {
+            "$jsonSchema": {
+                "bsonType": "object",
+                "required": ["instructorId", "day", "revenue", "enrollments"],
+                "properties": {
+                    "instructorId": {"bsonType": "string"},
+                    "day": {"bsonType": "date"},
+                    "revenue": {"bsonType": "number"},
+                    "enrollments": {"bsonType": "number"}
+                }
+            }
+        }
+        
+        return {
             "users": user_validator,
             "courses": course_validator,
             "enrollments": enrollment_validator,
             "lessons": lesson_validator,
             "assignments": assignment_validator,
-            "submissions": submission_validator
+            "submissions": submission_validator,
+            "instructor_revenue_daily": revenue_validator
         }
-        for collection_name, validator in validators.items():
-            try:
-                self.db.create_collection(collection_name, validator=validator)
-                print(f"✅ Created collection '{collection_name}' with validation")
-            except Exception as e:
-                if "already exists" in str(e).lower():
-                    print(f"ℹ️ Collection '{collection_name}' already exists")
-                else:
-                    print(f"⚠️ Error creating collection '{collection_name}': {e}")
-                pass  # Collection might already exist
-        
-        # Create indexes for performance
-        self.create_indexes()
+    
+    def _bootstrap_collection(self, collection_name):
+        """Create one collection with its validator, then its indexes"""
+        validator = self.get_collection_validators()[collection_name]
+        try:
+            self.db.create_collection(collection_name, validator=validator)
+            print(f"✅ Created collection '{collection_name}' with validation")
+        except Exception as e:
+            if "already exists" in str(e).lower():
+                # Bring the existing collection's validator up to date (e.g. after a schema bump)
+                try:
+                    self.db.command("collMod", collection_name, validator=validator)
+                    print(f"ℹ️ Collection '{collection_name}' already exists; validator updated")
+                except Exception as e:
+                    print(f"⚠️ Error updating validator of '{collection_name}': {e}")
+            else:
+                print(f"⚠️ Error creating collection '{collection_name}': {e}")
         
+        self._create_collection_indexes(collection_name)
+    
     def create_indexes(self):
         """Create indexes for performance optimization"""
-        
-        # Users collection indexes
-        self.db.users.create_index("userId", unique=True)
-        self.db.users.create_index("email", unique=True)
-        self.db.users.create_index("role")
-        
-        # Courses collection indexes
-        self.db.courses.create_index("courseId", unique=True)
-        self.db.courses.create_index("title")
-        self.db.courses.create_index("category")
-        self.db.courses.create_index("instructorId")
-        self.db.courses.create_index([("title", "text"), ("description", "text")])
-        
-        # Enrollments collection indexes
-        self.db.enrollments.create_index("enrollmentId", unique=True)
-        self.db.enrollments.create_index([("studentId", 1), ("courseId", 1)], unique=True)
-        self.db.enrollments.create_index("studentId")
-        self.db.enrollments.create_index("courseId")
-        self.db.enrollments.create_index("enrollmentDate")
-        
-        # Lessons collection indexes
-        self.db.lessons.create_index("lessonId", unique=True)
-        self.db.lessons.create_index("courseId")
-        self.db.lessons.create_index([("courseId", 1), ("order", 1)])
-        
-        # Assignments collection indexes
-        self.db.assignments.create_index("assignmentId", unique=True)
-        self.db.assignments.create_index("courseId")
-        self.db.assignments.create_index("dueDate")
-        
-        # Submissions collection indexes
-        self.db.submissions.create_index("submissionId", unique=True)
-        self.db.submissions.create_index([("studentId", 1), ("assignmentId", 1)])
-        self.db.submissions.create_index("assignmentId")
-        self.db.submissions.create_index("studentId")
+        with ThreadPoolExecutor(max_workers=len(self.INDEX_SPECS)) as executor:
+            list(executor.map(self._create_collection_indexes, self.INDEX_SPECS.keys()))
         
         print("✅ All Indexes created successfully")
+    
+    def _create_collection_indexes(self, collection_name):
+        """Create all indexes of one collection in a single createIndexes command"""
+        models = [IndexModel(keys, **options) for keys, options in self.INDEX_SPECS[collection_name]]
+        self.db[collection_name].create_indexes(models)
         
     # PART 1: DATABASE SETUP AND DATA MODELING
 
@@ -488,8 +1979,22 @@ class EduHubDatabase:
     
     # PART 2: DATA POPULATION
 
-    def populate_sample_data(self):
-        """Populate the database with comprehensive sample data"""
+    def populate_sample_data(self, scale=None, batch_size=1000, seed=None, workers=1, zipf_exponent=None):
+        """Populate the database with comprehensive sample data
+        
+        Args:
+            scale: Optional TPC-style scale factor. When set, documents are streamed from
+                generators into bounded insert_many batches instead of the fixed sample set
+            batch_size: Maximum number of documents per insert_many call in scale mode
+            seed: Optional seed; the same seed always produces identical documents
+            workers: Number of worker processes used to generate shards in scale mode
+            zipf_exponent: Optional Zipf exponent for skewed course popularity (None for uniform)
+        """
+        if scale is not None:
+            return self.populate_scaled_data(scale, batch_size, seed, workers, zipf_exponent)
+        
+        if seed is not None:
+            self.data_generator = EduHubDataGenerator(seed=seed)
         
         print("🔄 Starting data population...")
         
@@ -502,30 +2007,38 @@ class EduHubDatabase:
         print(f"✅ Inserted {len(users)} users")
         
         # Generate courses (8 courses)
-        courses = self.generate_sample_courses(8)
+        courses = self.generate_sample_courses(8, users)
         self.db.courses.insert_many(courses)
         print(f"✅ Inserted {len(courses)} courses")
         
         # Generate lessons (25 lessons)
-        lessons = self.generate_sample_lessons(25)
+        lessons = self.generate_sample_lessons(25, courses)
         self.db.lessons.insert_many(lessons)
         print(f"✅ Inserted {len(lessons)} lessons")
         
         # Generate assignments (10 assignments)
-        assignments = self.generate_sample_assignments(10)
+        assignments = self.generate_sample_assignments(10, courses)
         self.db.assignments.insert_many(assignments)
         print(f"✅ Inserted {len(assignments)} assignments")
         
         # Generate enrollments (15 enrollments)
-        enrollments = self.generate_sample_enrollments(15)
+        enrollments = self.generate_sample_enrollments(15, zipf_exponent, users, courses)
         self.db.enrollments.insert_many(enrollments)
         print(f"✅ Inserted {len(enrollments)} enrollments")
         
         # Generate submissions (12 submissions)
-        submissions = self.generate_sample_submissions(12)
+        submissions = self.generate_sample_submissions(12, assignments, enrollments)
         self.db.submissions.insert_many(submissions)
         print(f"✅ Inserted {len(submissions)} submissions")
         
+        if self.denormalize_instructors:
+            self.sync_instructor_summaries()
+        self.reconcile_course_counters()
+        self.rebuild_instructor_revenue()
+        self._reload_course_indexes()
+        if self.enrollment_stats_enabled:
+            self.rebuild_enrollment_stats()
+        
         print("🎉 Data population completed successfully!")
 
     def generate_sample_users(self, count):
@@ -533,9 +2046,9 @@ class EduHubDatabase:
         users = []
         
         # Generate instructors using real data
-        instructor_count = min(count // 4, len(data_generator.instructors_data))
+        instructor_count = min(count // 4, len(self.data_generator.instructors_data))
         for i in range(instructor_count):
-            instructor_data = data_generator.instructors_data[i]
+            instructor_data = self.data_generator.instructors_data[i]
             full_name = f"{instructor_data['firstName']} {instructor_data['lastName']}"
             user = {
                 "userId": f"IN_{str(i+1).zfill(3)}",
@@ -543,10 +2056,10 @@ class EduHubDatabase:
                 "firstName": instructor_data['firstName'],
                 "lastName": instructor_data['lastName'],
                 "role": "instructor",
-                "dateJoined": data_generator.get_random_date(730, 365),  # 2 years to 1 year ago
+                "dateJoined": self.data_generator.get_random_date(730, 365),  # 2 years to 1 year ago
                 "profile": {
                     "bio": instructor_data['bio'],
-                    "avatar": data_generator.get_avatar_url(full_name),
+                    "avatar": self.data_generator.get_avatar_url(full_name),
                     "skills": [instructor_data['specialization'], "Teaching", "Curriculum Design", "Mentoring"]
                 },
                 "isActive": True
@@ -556,8 +2069,8 @@ class EduHubDatabase:
         # Generate students using real data
         student_count = count - instructor_count
         for i in range(student_count):
-            if i < len(data_generator.students_data):
-                student_data = data_generator.students_data[i]
+            if i < len(self.data_generator.students_data):
+                student_data = self.data_generator.students_data[i]
                 full_name = f"{student_data['firstName']} {student_data['lastName']}"
                 bio = f"Passionate learner interested in {', '.join(student_data['interests'][:2])} and modern technology."
             else:
@@ -566,14 +2079,14 @@ class EduHubDatabase:
                 last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis"]
                 interests = ["Programming", "Data Science", "Web Development", "Mobile Development", "AI/ML"]
                 
-                first_name = random.choice(first_names)
-                last_name = random.choice(last_names)
+                first_name = self.data_generator.rng.choice(first_names)
+                last_name = self.data_generator.rng.choice(last_names)
                 full_name = f"{first_name} {last_name}"
                 student_data = {
                     "firstName": first_name,
                     "lastName": last_name,
                     "email": f"{first_name.lower()}.{last_name.lower()}@student.com",
-                    "interests": random.sample(interests, 3)
+                    "interests": self.data_generator.rng.sample(interests, 3)
                 }
                 bio = f"Student exploring {', '.join(student_data['interests'][:2])} with a focus on practical applications."
             
@@ -583,10 +2096,10 @@ class EduHubDatabase:
                 "firstName": student_data['firstName'],
                 "lastName": student_data['lastName'],
                 "role": "student",
-                "dateJoined": data_generator.get_random_date(365, 0),  # Within last year
+                "dateJoined": self.data_generator.get_random_date(365, 0),  # Within last year
                 "profile": {
                     "bio": bio,
-                    "avatar": data_generator.get_avatar_url(full_name),
+                    "avatar": self.data_generator.get_avatar_url(full_name),
                     "skills": student_data['interests']
                 },
                 "isActive": True
@@ -595,28 +2108,38 @@ class EduHubDatabase:
         
         return users
     
-    def generate_sample_courses(self, count):
-        """Generate sample courses using realistic educational data"""
-        instructors = list(self.db.users.find({"role": "instructor"}))
+    def generate_sample_courses(self, count, instructors=None):
+        """Generate sample courses using realistic educational data
+        
+        Args:
+            count: Number of courses to generate
+            instructors: Instructor documents already in memory (read from the database if omitted)
+        """
+        if instructors is None:
+            instructors = list(self.db.users.find({"role": "instructor"}))
+        else:
+            instructors = [user for user in instructors if user.get("role") == "instructor"]
+        
+        # Category -> instructor index, built once per distinct category
+        instructors_by_category = {}
         
         courses = []
-        for i in range(min(count, len(data_generator.courses_data))):
-            course_data = data_generator.courses_data[i]
+        for i in range(min(count, len(self.data_generator.courses_data))):
+            course_data = self.data_generator.courses_data[i]
             
             # Match instructor specialization with course category when possible
-            suitable_instructor = None
-            for instructor in instructors:
-                instructor_specialization = instructor.get("profile", {}).get("skills", [])[0] if instructor.get("profile", {}).get("skills") else ""
-                if course_data["category"] in instructor_specialization or instructor_specialization in course_data["category"]:
-                    suitable_instructor = instructor
-                    break
+            category = course_data["category"]
+            if category not in instructors_by_category:
+                instructors_by_category[category] = self._find_suitable_instructor(instructors, category)
+            suitable_instructor = instructors_by_category[category]
             
             if not suitable_instructor:
-                suitable_instructor = random.choice(instructors)
+                suitable_instructor = self.data_generator.rng.choice(instructors)
             
             course = {
                 "courseId": f"CO_{str(i+1).zfill(3)}",
                 "title": course_data["title"],
+                **_title_search_keys(course_data["title"]),
                 "description": course_data["description"],
                 "instructorId": suitable_instructor["userId"],
                 "category": course_data["category"],
@@ -624,18 +2147,32 @@ class EduHubDatabase:
                 "duration": course_data["duration"],
                 "price": course_data["price"],
                 "tags": course_data["tags"],
-                "createdAt": data_generator.get_random_date(180, 30),  # 6 months to 1 month ago
-                "updatedAt": data_generator.get_random_date(30, 0),    # Within last month
-                "isPublished": random.choice([True, True, True, False]),  # 75% published
-                "rating": round(random.uniform(3.5, 5.0), 1)  # Higher ratings for realistic courses
+                "createdAt": self.data_generator.get_random_date(180, 30),  # 6 months to 1 month ago
+                "updatedAt": self.data_generator.get_random_date(30, 0),    # Within last month
+                "isPublished": self.data_generator.rng.choice([True, True, True, False]),  # 75% published
+                "rating": round(self.data_generator.rng.uniform(3.5, 5.0), 1)  # Higher ratings for realistic courses
             }
             courses.append(course)
             
         return courses
     
-    def generate_sample_lessons(self, count):
-        """Generate sample lessons with realistic educational content"""
-        courses = list(self.db.courses.find())
+    def _find_suitable_instructor(self, instructors, category):
+        """Return the first instructor whose specialization matches a course category, if any"""
+        for instructor in instructors:
+            instructor_specialization = instructor.get("profile", {}).get("skills", [])[0] if instructor.get("profile", {}).get("skills") else ""
+            if category in instructor_specialization or instructor_specialization in category:
+                return instructor
+        return None
+    
+    def generate_sample_lessons(self, count, courses=None):
+        """Generate sample lessons with realistic educational content
+        
+        Args:
+            count: Number of lessons to generate
+            courses: Course documents already in memory (read from the database if omitted)
+        """
+        if courses is None:
+            courses = list(self.db.courses.find())
         lessons = []
         
         lessons_per_course = count // len(courses) if courses else 1
@@ -645,8 +2182,8 @@ class EduHubDatabase:
             course_category = course.get("category", "Programming")
             
             # Get lesson content for this category
-            category_lessons = data_generator.lessons_content.get(course_category, 
-                                                                data_generator.lessons_content["Programming"])
+            category_lessons = self.data_generator.lessons_content.get(course_category, 
+                                                                self.data_generator.lessons_content["Programming"])
             
             # Generate lessons for this course
             course_lessons_count = min(lessons_per_course, len(category_lessons))
@@ -662,23 +2199,23 @@ class EduHubDatabase:
                     "courseId": course["courseId"],
                     "title": lesson_title,
                     "content": lesson_content,
-                    "duration": random.randint(20, 45),  # Realistic lesson duration
+                    "duration": self.data_generator.rng.randint(20, 45),  # Realistic lesson duration
                     "order": i + 1,
-                    "videoUrl": data_generator.get_video_url(lesson_title),
-                    "materials": data_generator.get_material_urls(random.randint(1, 3)),
-                    "createdAt": data_generator.get_random_date(90, 0)  # Within last 3 months
+                    "videoUrl": self.data_generator.get_video_url(lesson_title),
+                    "materials": self.data_generator.get_material_urls(self.data_generator.rng.randint(1, 3)),
+                    "createdAt": self.data_generator.get_random_date(90, 0)  # Within last 3 months
                 }
                 lessons.append(lesson)
                 lesson_counter += 1
         
         # Fill remaining lessons if needed
         while lesson_counter < count and courses:
-            course = random.choice(courses)
+            course = self.data_generator.rng.choice(courses)
             course_category = course.get("category", "Programming")
-            category_lessons = data_generator.lessons_content.get(course_category, 
-                                                                data_generator.lessons_content["Programming"])
+            category_lessons = self.data_generator.lessons_content.get(course_category, 
+                                                                self.data_generator.lessons_content["Programming"])
             
-            lesson_title = random.choice(category_lessons)
+            lesson_title = self.data_generator.rng.choice(category_lessons)
             lesson_content = self._generate_lesson_content(lesson_title, course_category)
             
             lesson = {
@@ -686,11 +2223,11 @@ class EduHubDatabase:
                 "courseId": course["courseId"],
                 "title": lesson_title,
                 "content": lesson_content,
-                "duration": random.randint(20, 45),
-                "order": random.randint(1, 10),
-                "videoUrl": data_generator.get_video_url(lesson_title),
-                "materials": data_generator.get_material_urls(random.randint(1, 3)),
-                "createdAt": data_generator.get_random_date(90, 0)
+                "duration": self.data_generator.rng.randint(20, 45),
+                "order": self.data_generator.rng.randint(1, 10),
+                "videoUrl": self.data_generator.get_video_url(lesson_title),
+                "materials": self.data_generator.get_material_urls(self.data_generator.rng.randint(1, 3)),
+                "createdAt": self.data_generator.get_random_date(90, 0)
             }
             lessons.append(lesson)
             lesson_counter += 1
@@ -699,31 +2236,28 @@ class EduHubDatabase:
     
     def _generate_lesson_content(self, title, category):
         """Generate detailed lesson content based on title and category"""
-        content_templates = {
-            "Programming": f"In this lesson, you'll learn about {title.lower()}. We'll cover the fundamental concepts, best practices, and provide hands-on examples to reinforce your understanding. By the end of this lesson, you'll be able to apply these concepts in real-world programming scenarios.",
-            "Data Science": f"This lesson focuses on {title.lower()} in the context of data science. You'll explore practical applications, work with real datasets, and understand how this concept fits into the broader data science workflow. We'll use Python libraries and tools to demonstrate key concepts.",
-            "Web Development": f"Learn {title.lower()} for modern web development. This lesson covers both theoretical concepts and practical implementation. You'll build interactive examples and understand how to integrate these concepts into full-stack applications.",
-            "AI/ML": f"Explore {title.lower()} in artificial intelligence and machine learning. This lesson combines theoretical foundations with practical implementation using popular frameworks like TensorFlow and PyTorch. You'll work on real AI projects and understand the mathematical concepts behind the algorithms.",
-            "Cloud Computing": f"Master {title.lower()} in cloud environments. This lesson covers AWS services, best practices for cloud architecture, and hands-on labs to reinforce learning. You'll understand how to implement scalable and cost-effective cloud solutions.",
-            "Cybersecurity": f"Understand {title.lower()} from a cybersecurity perspective. This lesson covers threat assessment, security protocols, and practical defense strategies. You'll learn to identify vulnerabilities and implement security measures to protect systems and data."
-        }
-        
-        return content_templates.get(category, content_templates["Programming"])
+        return self.data_generator.get_lesson_content(title, category)
     
-    def generate_sample_assignments(self, count):
-        """Generate sample assignments with realistic educational content"""
-        courses = list(self.db.courses.find())
+    def generate_sample_assignments(self, count, courses=None):
+        """Generate sample assignments with realistic educational content
+        
+        Args:
+            count: Number of assignments to generate
+            courses: Course documents already in memory (read from the database if omitted)
+        """
+        if courses is None:
+            courses = list(self.db.courses.find())
         assignments = []
         
         for i in range(count):
-            course = random.choice(courses)
+            course = self.data_generator.rng.choice(courses)
             course_category = course.get("category", "Programming")
             
             # Get assignment topics for this category
-            category_assignments = data_generator.assignment_topics.get(course_category, 
-                                                                       data_generator.assignment_topics["Programming"])
+            category_assignments = self.data_generator.assignment_topics.get(course_category, 
+                                                                       self.data_generator.assignment_topics["Programming"])
             
-            assignment_title = random.choice(category_assignments)
+            assignment_title = self.data_generator.rng.choice(category_assignments)
             assignment_description = self._generate_assignment_description(assignment_title, course_category)
             assignment_instructions = self._generate_assignment_instructions(assignment_title, course_category)
             
@@ -732,9 +2266,9 @@ class EduHubDatabase:
                 "courseId": course["courseId"],
                 "title": assignment_title,
                 "description": assignment_description,
-                "dueDate": data_generator.get_random_date(-7, -30),  # Due in 7-30 days (future dates)
-                "maxPoints": random.choice([100, 100, 100, 80, 90]),  # Most assignments worth 100 points
-                "createdAt": data_generator.get_random_date(60, 30),  # Created 30-60 days ago
+                "dueDate": self.data_generator.get_random_date(-7, -30),  # Due in 7-30 days (future dates)
+                "maxPoints": self.data_generator.rng.choice([100, 100, 100, 80, 90]),  # Most assignments worth 100 points
+                "createdAt": self.data_generator.get_random_date(60, 30),  # Created 30-60 days ago
                 "instructions": assignment_instructions
             }
             assignments.append(assignment)
@@ -743,122 +2277,95 @@ class EduHubDatabase:
     
     def _generate_assignment_description(self, title, category):
         """Generate detailed assignment description based on title and category"""
-        descriptions = {
-            "Programming": f"Complete a {title.lower()} project that demonstrates your understanding of programming concepts covered in class. This assignment will test your ability to write clean, efficient code and implement best practices.",
-            "Data Science": f"Your task is to {title.lower()} using the techniques and tools we've discussed. You'll need to clean data, perform analysis, create visualizations, and present your findings in a clear, professional manner.",
-            "Web Development": f"Develop a {title.lower()} that showcases modern web development practices. Focus on responsive design, user experience, and clean code architecture. Include both frontend and backend components.",
-            "AI/ML": f"Implement a {title.lower()} using machine learning techniques. Your solution should include data preprocessing, model selection, training, evaluation, and a clear explanation of your approach and results."
-        }
-        
-        return descriptions.get(category, descriptions["Programming"])
+        return self.data_generator.get_assignment_description(title, category)
     
     def _generate_assignment_instructions(self, title, category):
         """Generate detailed assignment instructions"""
-        instructions = {
-            "Programming": "Submit your code in a GitHub repository with a README file explaining your approach. Include unit tests and documentation. Code should follow PEP 8 style guidelines.",
-            "Data Science": "Submit a Jupyter notebook with your analysis, along with a PDF report summarizing your findings. Include data visualizations and statistical analysis. Ensure your code is well-commented.",
-            "Web Development": "Deploy your application and submit the live URL along with your source code. Include a README with setup instructions and a brief description of your architecture choices.",
-            "AI/ML": "Submit your trained model, source code, and a technical report explaining your methodology. Include performance metrics and a discussion of potential improvements."
-        }
-        
-        return instructions.get(category, instructions["Programming"])
+        return self.data_generator.get_assignment_instructions(title, category)
     
-    def generate_sample_enrollments(self, count):
-        """Generate sample enrollments"""
-        students = list(self.db.users.find({"role": "student"}))
-        courses = list(self.db.courses.find())
+    def generate_sample_enrollments(self, count, zipf_exponent=None, students=None, courses=None):
+        """Generate sample enrollments
+        
+        Unique (student, course) pairs are sampled directly, so generation is linear in count.
+        
+        Args:
+            count: Number of enrollments; must not exceed students x courses
+            zipf_exponent: Optional Zipf exponent for skewed course popularity (None for uniform)
+            students: User documents already in memory (read from the database if omitted)
+            courses: Course documents already in memory (read from the database if omitted)
+        """
+        if students is None:
+            students = list(self.db.users.find({"role": "student"}))
+        else:
+            students = [user for user in students if user.get("role") == "student"]
+        if courses is None:
+            courses = list(self.db.courses.find())
         enrollments = []
         
-        used_combinations = set()
+        pairs = self.data_generator.sample_enrollment_pairs(len(students), len(courses), count, zipf_exponent)
         
-        for i in range(count):
-            while True:
-                student = random.choice(students)
-                course = random.choice(courses)
-                combination = (student["userId"], course["courseId"])
-                
-                if combination not in used_combinations:
-                    used_combinations.add(combination)
-                    break
-            
+        for i, (student_index, course_index) in enumerate(pairs):
+            student = students[student_index]
+            course = courses[course_index]
             enrollment = {
                 "enrollmentId": f"EN_{str(i+1).zfill(3)}",
                 "studentId": student["userId"],
                 "courseId": course["courseId"],
-                "enrollmentDate": data_generator.get_random_date(60, 0),  # Within last 2 months
-                "status": random.choice(["active", "completed", "dropped"]),
-                "progress": random.randint(0, 100),
-                "completionDate": data_generator.get_random_date(30, 0) if random.choice([True, False]) else None
+                "enrollmentDate": self.data_generator.get_random_date(60, 0),  # Within last 2 months
+                "status": self.data_generator.rng.choice(["active", "completed", "dropped"]),
+                "progress": self.data_generator.rng.randint(0, 100),
+                "completionDate": self.data_generator.get_random_date(30, 0) if self.data_generator.rng.choice([True, False]) else None
             }
             enrollments.append(enrollment)
         
-        return enrollments
-    
-    def generate_sample_submissions(self, count):
-        """Generate sample submissions with realistic content"""
-        assignments = list(self.db.assignments.find())
-        enrollments = list(self.db.enrollments.find())
-        submissions = []
-        
-        # Realistic submission content templates
-        submission_content_templates = [
-            "Completed the assignment as requested. Implemented all required features and tested thoroughly. The solution follows best practices and includes proper documentation.",
-            "This project demonstrates my understanding of the concepts covered in class. I've included extensive comments and examples to show my thought process.",
-            "Successfully implemented the requirements with additional features for enhanced functionality. Spent extra time on optimization and user experience.",
-            "Encountered some challenges during implementation but found creative solutions. The final result meets all specifications and includes error handling.",
-            "Applied the techniques learned in lectures to solve this problem. The solution is scalable and well-structured with clean, readable code."
-        ]
-        
-        # Realistic feedback templates
-        feedback_templates = [
-            "Excellent work! Your solution demonstrates strong understanding of the concepts. Code is clean and well-documented.",
-            "Good effort. The implementation is correct but could benefit from better error handling and code organization.",
-            "Well done! Creative approach to the problem. Consider optimizing the algorithm for better performance.",
-            "Solid work. All requirements met. Nice use of design patterns and best practices.",
-            "Great attention to detail. The documentation and testing are particularly impressive.",
-            "Good solution overall. Some minor issues with edge cases, but the core logic is sound."
-        ]
-        
-        # Realistic attachment URLs
-        attachment_types = [
-            "https://github.com/student/assignment-repo",
-            "https://student-portfolio.herokuapp.com/project",
-            "https://colab.research.google.com/drive/assignment-notebook",
-            "https://eduhub-submissions.s3.amazonaws.com/project-demo.mp4",
-            "https://eduhub-submissions.s3.amazonaws.com/source-code.zip",
-            "https://eduhub-submissions.s3.amazonaws.com/report.pdf"
-        ]
+        return enrollments
+    
+    def generate_sample_submissions(self, count, assignments=None, enrollments=None):
+        """Generate sample submissions with realistic content
+        
+        Args:
+            count: Number of submissions to attempt
+            assignments: Assignment documents already in memory (read from the database if omitted)
+            enrollments: Enrollment documents already in memory (read from the database if omitted)
+        """
+        if assignments is None:
+            assignments = list(self.db.assignments.find())
+        if enrollments is None:
+            enrollments = list(self.db.enrollments.find())
+        submissions = []
+        
+        # courseId -> enrollments index, so each submission is matched in constant time
+        enrollments_by_course = defaultdict(list)
+        for enrollment in enrollments:
+            enrollments_by_course[enrollment["courseId"]].append(enrollment)
         
         for i in range(count):
-            assignment = random.choice(assignments)
+            assignment = self.data_generator.rng.choice(assignments)
             # Find enrollments for the same course
-            course_enrollments = [e for e in enrollments if e["courseId"] == assignment["courseId"]]
+            course_enrollments = enrollments_by_course.get(assignment["courseId"])
             
             if course_enrollments:
-                enrollment = random.choice(course_enrollments)
+                enrollment = self.data_generator.rng.choice(course_enrollments)
                 
                 # Determine if submission is graded (80% chance)
-                is_graded = random.random() < 0.8
+                is_graded = self.data_generator.rng.random() < 0.8
                 grade = None
                 feedback = None
                 graded_date = None
                 
                 if is_graded:
                     # Realistic grade distribution (mostly B+ to A)
-                    grade = random.choices(
-                        [95, 90, 85, 88, 92, 78, 82, 96, 87, 91],
-                        weights=[10, 15, 12, 13, 14, 8, 10, 12, 8, 15]
-                    )[0]
-                    feedback = random.choice(feedback_templates)
-                    graded_date = data_generator.get_random_date(14, 0)  # Graded within 2 weeks
+                    grade = self.data_generator.get_random_grade()
+                    feedback = self.data_generator.rng.choice(self.data_generator.feedback_templates)
+                    graded_date = self.data_generator.get_random_date(14, 0)  # Graded within 2 weeks
                 
                 submission = {
                     "submissionId": f"SU_{str(i+1).zfill(3)}",
                     "assignmentId": assignment["assignmentId"],
                     "studentId": enrollment["studentId"],
-                    "submissionDate": data_generator.get_random_date(30, 0),  # Within last month
-                    "content": random.choice(submission_content_templates),
-                    "attachments": random.sample(attachment_types, random.randint(1, 3)),
+                    "submissionDate": self.data_generator.get_random_date(30, 0),  # Within last month
+                    "content": self.data_generator.rng.choice(self.data_generator.submission_content_templates),
+                    "attachments": self.data_generator.rng.sample(self.data_generator.attachment_types, self.data_generator.rng.randint(1, 3)),
                     "grade": grade,
                     "feedback": feedback,
                     "gradedDate": graded_date
@@ -867,12 +2374,248 @@ class EduHubDatabase:
         
         return submissions      
     
-    def clear_all_data(self):
-        """Clear all data from collections"""
-        collections = ["users", "courses", "lessons", "assignments", "enrollments", "submissions"]
-        for collection_name in collections:
-            self.db[collection_name].delete_many({})
-        print("🗑️ All existing data cleared")
+    def populate_scaled_data(self, scale=1, batch_size=1000, seed=None, workers=1, zipf_exponent=None):
+        """Populate the database with a scale-factor dataset using constant memory
+        
+        The ID space of every collection is split into fixed shards, each generated from its own
+        RNG stream derived from the seed, so the output is identical for any number of workers.
+        
+        Args:
+            scale: Scale factor multiplying SCALE_FACTOR_COUNTS (scale=1000 gives ~1M enrollments)
+            batch_size: Maximum number of documents per insert_many call
+            seed: Seed for reproducible datasets. A random seed is chosen and printed when omitted
+            workers: Number of worker processes generating shards in parallel
+            zipf_exponent: Optional Zipf exponent for skewed course popularity (None for uniform)
+            
+        Returns:
+            dict: Number of documents inserted per collection
+        """
+        if scale <= 0:
+            raise ValueError("scale must be a positive number")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+        if seed is None:
+            seed = random.randrange(2**32)
+            print(f"ℹ️ No seed given, using seed={seed}")
+        
+        print(f"🔄 Starting scale-factor data population (scale={scale}, seed={seed}, workers={workers})...")
+        
+        # Clear existing data; dropping is much faster than deleting a large dataset
+        self.clear_all_data(fast=True)
+        
+        generator = EduHubDataGenerator(seed=seed)
+        plan = self._build_scale_plan(scale, generator, zipf_exponent)
+        stream = self._run_scale_tasks(self._iter_scale_tasks(plan), generator, workers)
+        totals = self._insert_stream(stream, batch_size)
+        
+        for collection_name in ["users", "courses", "lessons", "assignments", "enrollments", "submissions"]:
+            print(f"✅ Inserted {totals.get(collection_name, 0)} {collection_name}")
+        if self.denormalize_instructors:
+            self.sync_instructor_summaries()
+        self.reconcile_course_counters()
+        self.rebuild_instructor_revenue()
+        self._reload_course_indexes()
+        if self.enrollment_stats_enabled:
+            self.rebuild_enrollment_stats()
+        print("🎉 Scale-factor data population completed successfully!")
+        return totals
+    
+    def _build_scale_plan(self, scale, generator, zipf_exponent=None):
+        """Compute entity counts and the compact course catalogue for a scale factor
+        
+        Only per-course metadata (including ID offsets for child documents) is kept in memory;
+        every other entity is derived from its index inside its shard.
+        """
+        rng = generator.for_shard("plan", 0).rng
+        counts = {
+            "instructors": max(1, int(SCALE_FACTOR_COUNTS["instructors"] * scale)),
+            "students": max(1, int(SCALE_FACTOR_COUNTS["students"] * scale)),
+            "courses": max(1, int(SCALE_FACTOR_COUNTS["courses"] * scale)),
+            "enrollments": max(1, int(SCALE_FACTOR_COUNTS["enrollments"] * scale))
+        }
+        # Small fractional scales have fewer student x course pairs than enrollments; each student
+        # enrolls in a course at most once
+        counts["enrollments"] = min(counts["enrollments"], counts["students"] * counts["courses"])
+        
+        # Instructors cycle through the real instructor profiles
+        specializations = [generator.instructors_data[i % len(generator.instructors_data)]["specialization"]
+                           for i in range(counts["instructors"])]
+        
+        # Category -> suitable instructor indexes, built once per distinct category
+        instructors_by_category = {}
+        
+        courses = []
+        for i in range(counts["courses"]):
+            course_data = generator.courses_data[i % len(generator.courses_data)]
+            category = course_data["category"]
+            
+            # Match instructor specialization with course category when possible
+            if category not in instructors_by_category:
+                instructors_by_category[category] = [j for j, spec in enumerate(specializations)
+                                                     if category in spec or spec in category]
+            suitable = instructors_by_category[category]
+            if suitable:
+                instructor_index = suitable[(i // len(generator.courses_data)) % len(suitable)]
+            else:
+                instructor_index = rng.randrange(counts["instructors"])
+            
+            courses.append({
+                "index": i,
+                "courseId": f"CO_{str(i+1).zfill(3)}",
+                "category": category,
+                "instructorId": f"IN_{str(instructor_index+1).zfill(3)}",
+                "template": i % len(generator.courses_data),
+                "section": i // len(generator.courses_data) + 1
+            })
+        
+        # Spread enrollments across courses (evenly or Zipf-skewed), capped by the number of
+        # students, and record where each course's enrollment and submission IDs start
+        enrollment_counts = generator.for_shard("plan", 1).allocate_course_enrollments(
+            counts["enrollments"], counts["courses"], counts["students"], zipf_exponent)
+        enrollment_offset = 0
+        submission_offset = 0
+        for i, course in enumerate(courses):
+            course["enrollments"] = enrollment_counts[i]
+            course["submissions"] = int(round(course["enrollments"] * SCALE_FACTOR_COUNTS["submission_rate"]))
+            course["enrollmentOffset"] = enrollment_offset
+            course["submissionOffset"] = submission_offset
+            enrollment_offset += course["enrollments"]
+            submission_offset += course["submissions"]
+        
+        return {"scale": scale, "counts": counts, "courses": courses}
+    
+    def _iter_scale_tasks(self, plan):
+        """Split a scale plan into fixed shards of at most SHARD_SIZE documents"""
+        counts = plan["counts"]
+        courses = plan["courses"]
+        
+        user_total = counts["instructors"] + counts["students"]
+        for shard, start in enumerate(range(0, user_total, SHARD_SIZE)):
+            yield {"collection": "users", "shard": shard, "start": start,
+                   "stop": min(start + SHARD_SIZE, user_total), "counts": counts}
+        
+        for shard, start in enumerate(range(0, len(courses), SHARD_SIZE)):
+            yield {"collection": "courses", "shard": shard, "courses": courses[start:start + SHARD_SIZE], "counts": counts}
+        
+        # Course children are sharded by whole courses so every roster stays inside one shard
+        course_children = [
+            ("lessons", lambda course: SCALE_FACTOR_COUNTS["lessons_per_course"]),
+            ("assignments", lambda course: SCALE_FACTOR_COUNTS["assignments_per_course"]),
+            ("enrollments", lambda course: course["enrollments"] + course["submissions"])
+        ]
+        for collection_name, size_of in course_children:
+            shard = 0
+            group = []
+            group_size = 0
+            for course in courses:
+                if group and group_size + size_of(course) > SHARD_SIZE:
+                    yield {"collection": collection_name, "shard": shard, "courses": group, "counts": counts}
+                    shard += 1
+                    group = []
+                    group_size = 0
+                group.append(course)
+                group_size += size_of(course)
+            if group:
+                yield {"collection": collection_name, "shard": shard, "courses": group, "counts": counts}
+    
+    def _run_scale_tasks(self, tasks, generator, workers=1):
+        """Generate shards in order, in-process or across worker processes
+        
+        At most two shards per worker are in flight, which bounds memory regardless of scale.
+        """
+        worker = functools.partial(_generate_scaled_shard, generator.seed, generator.reference_date)
+        if workers <= 1:
+            for task in tasks:
+                for item in worker(task):
+                    yield item
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(worker, task))
+                if len(pending) >= workers * 2:
+                    for item in pending.popleft().result():
+                        yield item
+            while pending:
+                for item in pending.popleft().result():
+                    yield item
+    
+    def _insert_stream(self, stream, batch_size=1000):
+        """Insert (collection_name, document) pairs in bounded, unordered insert_many batches
+        
+        Returns:
+            dict: Number of documents inserted per collection
+        """
+        buffers = {}
+        totals = {}
+        for collection_name, document in stream:
+            buffer = buffers.setdefault(collection_name, [])
+            buffer.append(document)
+            if len(buffer) >= batch_size:
+                self.db[collection_name].insert_many(buffer, ordered=False)
+                totals[collection_name] = totals.get(collection_name, 0) + len(buffer)
+                buffers[collection_name] = []
+        
+        for collection_name, buffer in buffers.items():
+            if buffer:
+                self.db[collection_name].insert_many(buffer, ordered=False)
+                totals[collection_name] = totals.get(collection_name, 0) + len(buffer)
+        
+        return totals
+    
+    def clear_all_data(self, fast=False, collections=None):
+        """Clear all data from collections
+        
+        Args:
+            fast: Drop and recreate the collections (with validators and indexes) concurrently
+                instead of deleting documents one by one, so reset time does not grow with data size
+            collections: Optional list of collection names to truncate (defaults to all)
+        """
+        all_collections = ["users", "courses", "lessons", "assignments", "enrollments", "submissions"]
+        if collections is None:
+            collections = all_collections
+        unknown = set(collections) - set(all_collections)
+        if unknown:
+            raise ValueError(f"Unknown collections: {', '.join(sorted(unknown))}")
+        
+        if fast:
+            self.reset_collections(collections)
+        else:
+            for collection_name in collections:
+                self.db[collection_name].delete_many({})
+        
+        # ID counters restart from the (now empty) collections
+        prefixes = [prefix for prefix, (collection_name, _) in EduHubIdAllocator.ID_FIELDS.items()
+                    if collection_name in collections]
+        self.db.counters.delete_many({"_id": {"$in": prefixes}})
+        self.id_allocator.reset()
+        if self.cache is not None:
+            self.cache.clear()
+        if "courses" in collections:
+            for index in (self.autocomplete, self.tag_index):
+                if index is not None:
+                    index.build([])
+        if {"courses", "enrollments"} & set(collections):
+            # The next materialized read rebuilds the statistics
+            self.db.enrollment_stats.delete_many({})
+            self.db.metadata.delete_one({"_id": "enrollment_stats"})
+        if "enrollments" in collections:
+            self.db.instructor_revenue_daily.delete_many({})
+        
+        if len(collections) == len(all_collections):
+            print("🗑️ All existing data cleared")
+        else:
+            print(f"🗑️ Cleared collections: {', '.join(collections)}")
+    
+    def reset_collections(self, collection_names):
+        """Drop and recreate collections concurrently with their validators and indexes"""
+        def reset(collection_name):
+            self.db.drop_collection(collection_name)
+            self._bootstrap_collection(collection_name)
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(collection_names))) as executor:
+            list(executor.map(reset, collection_names))
 
     # PART 3: BASIC CRUD OPERATIONS
 
@@ -882,16 +2625,8 @@ class EduHubDatabase:
         if skills is None:
             skills = []
             
-        # Generate unique userId
-        last_student = self.db.users.find({"role": "student"}).sort("userId", -1).limit(1)
-        next_id = 1
-        for student in last_student:
-            current_id = int(student["userId"].split("_")[1])
-            next_id = current_id + 1
-            break
-        
         new_student = {
-            "userId": f"ST_{str(next_id).zfill(3)}",
+            "userId": self.id_allocator.next_id("ST"),
             "email": email,
             "firstName": first_name,
             "lastName": last_name,
@@ -899,7 +2634,7 @@ class EduHubDatabase:
             "dateJoined": datetime.now(),
             "profile": {
                 "bio": bio,
-                "avatar": data_generator.get_avatar_url(f"{first_name} {last_name}"),
+                "avatar": self.data_generator.get_avatar_url(f"{first_name} {last_name}"),
                 "skills": skills
             },
             "isActive": True
@@ -918,17 +2653,10 @@ class EduHubDatabase:
         if tags is None:
             tags = []
             
-        # Generate unique courseId
-        last_course = self.db.courses.find().sort("courseId", -1).limit(1)
-        next_id = 1
-        for course in last_course:
-            current_id = int(course["courseId"].split("_")[1])
-            next_id = current_id + 1
-            break
-        
         new_course = {
-            "courseId": f"CO_{str(next_id).zfill(3)}",
+            "courseId": self.id_allocator.next_id("CO"),
             "title": title,
+            **_title_search_keys(title),
             "description": description,
             "instructorId": instructor_id,
             "category": category,
@@ -939,36 +2667,52 @@ class EduHubDatabase:
             "createdAt": datetime.now(),
             "updatedAt": datetime.now(),
             "isPublished": False,
-            "rating": 0.0
+            "rating": 0.0,
+            "enrollmentCounts": {counter: 0 for counter in ENROLLMENT_COUNTERS}
         }
         
         try:
+            if self.denormalize_instructors:
+                instructor = self.db.users.find_one({"userId": instructor_id}, self.INSTRUCTOR_SUMMARY_FIELDS)
+                if instructor:
+                    new_course["instructor"] = self._instructor_summary(instructor)
             result = self.db.courses.insert_one(new_course)
+            for index in (self.autocomplete, self.tag_index):
+                if index is not None:
+                    index.upsert_course(new_course)
+            if self.enrollment_stats_enabled:
+                try:
+                    self._add_course_to_enrollment_stats(new_course)
+                except Exception as e:
+                    print(f"❌ Error updating enrollment statistics: {e}")
             print(f"✅ New course created with ID: {result.inserted_id}")
             return result.inserted_id
         except Exception as e:
             print(f"❌ Error creating course: {e}")
             return None
     
-    def enroll_student_in_course(self, student_id, course_id):
-        """Enroll a student in a course"""
+    def enroll_student_in_course(self, student_id, course_id, single_write=True):
+        """Enroll a student in a course
         
-        # Check if enrollment already exists
-        existing = self.db.enrollments.find_one({"studentId": student_id, "courseId": course_id})
-        if existing:
-            print("❌ Student is already enrolled in this course")
-            return None
+        Args:
+            student_id: Student userId
+            course_id: Course courseId
+            single_write: Enroll with one insert and let the unique (studentId, courseId) index
+                reject duplicates. When False, check for an existing enrollment first (one more round trip)
         
-        # Generate unique enrollmentId
-        last_enrollment = self.db.enrollments.find().sort("enrollmentId", -1).limit(1)
-        next_id = 1
-        for enrollment in last_enrollment:
-            current_id = int(enrollment["enrollmentId"].split("_")[1])
-            next_id = current_id + 1
-            break
+        The course price is recorded on the enrollment (pricePaid) and added to the instructor's
+        daily revenue rollup.
+        """
+        
+        # Check if enrollment already exists
+        if not single_write:
+            existing = self.db.enrollments.find_one({"studentId": student_id, "courseId": course_id})
+            if existing:
+                print("❌ Student is already enrolled in this course")
+                return None
         
         new_enrollment = {
-            "enrollmentId": f"EN_{str(next_id).zfill(3)}",
+            "enrollmentId": self.id_allocator.next_id("EN"),
             "studentId": student_id,
             "courseId": course_id,
             "enrollmentDate": datetime.now(),
@@ -978,26 +2722,34 @@ class EduHubDatabase:
         }
         
         try:
+            course = self.db.courses.find_one({"courseId": course_id}, self.REVENUE_COURSE_FIELDS)
+            if course and course.get("price") is not None:
+                new_enrollment["pricePaid"] = course["price"]
             result = self.db.enrollments.insert_one(new_enrollment)
+            self._record_enrollment_changes({course_id: {"total": 1, "active": 1}})
+            self._record_revenue([new_enrollment], courses={course_id: course} if course else {})
             print(f"✅ Student enrolled with enrollment ID: {result.inserted_id}")
             return result.inserted_id
+        except DuplicateKeyError as e:
+            if self._is_duplicate_enrollment(e):
+                print("❌ Student is already enrolled in this course")
+            else:
+                print(f"❌ Error enrolling student: {e}")
+            return None
         except Exception as e:
             print(f"❌ Error enrolling student: {e}")
             return None
     
+    def _is_duplicate_enrollment(self, error):
+        """Check whether a duplicate key error came from the unique (studentId, courseId) index"""
+        key_pattern = (error.details or {}).get("keyPattern", {})
+        return "studentId" in key_pattern or "studentId_1_courseId_1" in str(error)
+    
     def add_lesson_to_course(self, course_id, title, content, duration, video_url="", materials=None):
         """Add a new lesson to an existing course"""
         if materials is None:
             materials = []
             
-        # Generate unique lessonId
-        last_lesson = self.db.lessons.find().sort("lessonId", -1).limit(1)
-        next_id = 1
-        for lesson in last_lesson:
-            current_id = int(lesson["lessonId"].split("_")[1])
-            next_id = current_id + 1
-            break
-        
         # Get the next order number for this course
         last_order = self.db.lessons.find({"courseId": course_id}).sort("order", -1).limit(1)
         next_order = 1
@@ -1006,7 +2758,7 @@ class EduHubDatabase:
             break
         
         new_lesson = {
-            "lessonId": f"LE_{str(next_id).zfill(3)}",
+            "lessonId": self.id_allocator.next_id("LE"),
             "courseId": course_id,
             "title": title,
             "content": content,
@@ -1028,10 +2780,40 @@ class EduHubDatabase:
     # READ Operations
     def find_all_active_students(self):
         """Find all active students"""
-        return list(self.db.users.find({"role": "student", "isActive": True}))
+        return list(self.iter_active_students())
+    
+    def get_user_by_id(self, user_id):
+        """Retrieve a single user by userId"""
+        return self._read_through(
+            ("user", user_id),
+            lambda: self.db.users.find_one({"userId": user_id}),
+            lambda user: [("user", user_id)]
+        )
+    
+    def get_course_by_id(self, course_id):
+        """Retrieve a single course by courseId"""
+        return self._read_through(
+            ("course", course_id),
+            lambda: self.db.courses.find_one({"courseId": course_id}),
+            lambda course: [("course", course_id)]
+        )
     
     def get_course_with_instructor_info(self, course_id):
         """Retrieve course details with instructor information"""
+        return self._read_through(
+            ("course_with_instructor", course_id),
+            lambda: self._load_course_with_instructor_info(course_id),
+            lambda courses: [("course", course_id)] + [("user", course["instructorId"]) for course in courses]
+        )
+    
+    def _load_course_with_instructor_info(self, course_id):
+        """Fetch a course with its instructor (embedded summary or users $lookup)"""
+        if self.denormalize_instructors:
+            return list(self.db.courses.find(
+                {"courseId": course_id, "instructor": {"$exists": True}},
+                self.COURSE_WITH_INSTRUCTOR_FIELDS
+            ))
+        
         pipeline = [
             {"$match": {"courseId": course_id}},
             {"$lookup": {
@@ -1041,57 +2823,292 @@ class EduHubDatabase:
                 "as": "instructor"
             }},
             {"$unwind": "$instructor"},
-            {"$project": {
-                "courseId": 1,
-                "title": 1,
-                "description": 1,
-                "category": 1,
-                "level": 1,
-                "duration": 1,
-                "price": 1,
-                "tags": 1,
-                "rating": 1,
-                "instructor.firstName": 1,
-                "instructor.lastName": 1,
-                "instructor.email": 1,
-                "instructor.profile.bio": 1
-            }}
+            {"$project": self.COURSE_WITH_INSTRUCTOR_FIELDS}
         ]
         return list(self.db.courses.aggregate(pipeline))
     
     def get_courses_by_category(self, category):
         """Get all courses in a specific category"""
-        return list(self.db.courses.find({"category": category}))
+        return list(self.iter_courses_by_category(category))
     
     def find_students_in_course(self, course_id):
         """Find students enrolled in a particular course"""
         pipeline = [
             {"$match": {"courseId": course_id}},
-            {"$lookup": {
-                "from": "users",
-                "localField": "studentId",
-                "foreignField": "userId",
-                "as": "student"
-            }},
+            self._roster_student_lookup(self.ROSTER_STUDENT_FIELDS),
             {"$unwind": "$student"},
-            {"$project": {
-                "enrollmentId": 1,
-                "enrollmentDate": 1,
-                "status": 1,
-                "progress": 1,
-                "student.firstName": 1,
-                "student.lastName": 1,
-                "student.email": 1
-            }}
+            {"$project": self._roster_projection()}
         ]
         return list(self.db.enrollments.aggregate(pipeline))
     
-    def search_courses_by_title(self, search_term):
-        """Search courses by title (case-insensitive, partial match)"""
-        regex_pattern = re.compile(search_term, re.IGNORECASE)
-        return list(self.db.courses.find({"title": {"$regex": regex_pattern}}))
+    # Orders and default student fields of get_course_roster
+    ROSTER_SORT_FIELDS = ("enrollmentId", "progress", "enrollmentDate")
+    ROSTER_STUDENT_FIELDS = ("firstName", "lastName", "email")
+    
+    def get_course_roster(self, course_id, page_size=50, token=None, sort_by="enrollmentId",
+                          descending=False, student_fields=None):
+        """Return one page of a course roster and the token of the next page
+        
+        Pages seek past the last (sort value, enrollmentId) of the previous page, and only the
+        page's enrollments are joined with users, fetching just the requested user fields.
+        
+        Args:
+            course_id: Course courseId
+            page_size: Maximum number of enrollments per page
+            token: nextToken of the previous page (None for the first page)
+            sort_by: "enrollmentId", "progress" or "enrollmentDate"; ties are broken by enrollmentId
+            descending: Sort from highest to lowest
+            student_fields: User fields to return under "student" (defaults to name and email)
+            
+        Returns:
+            dict: {"items": [...], "nextToken": str or None}
+        """
+        if sort_by not in self.ROSTER_SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {', '.join(self.ROSTER_SORT_FIELDS)}")
+        if page_size <= 0:
+            raise ValueError("page_size must be a positive integer")
+        order = f"{sort_by}:{'desc' if descending else 'asc'}"
+        
+        match = {"courseId": course_id}
+        state = self._decode_page_token(token)
+        if state:
+            if state.get("order") != order:
+                raise ValueError("Page token was issued for a different roster order")
+            match = {"$and": [match, self._roster_seek_filter(sort_by, descending, state)]}
+        
+        direction = -1 if descending else 1
+        sort = {"enrollmentId": direction} if sort_by == "enrollmentId" else {sort_by: direction, "enrollmentId": direction}
+        student_fields = tuple(student_fields or self.ROSTER_STUDENT_FIELDS)
+        pipeline = [
+            {"$match": match},
+            {"$sort": sort},
+            # One extra enrollment tells whether another page exists
+            {"$limit": page_size + 1},
+            self._roster_student_lookup(student_fields),
+            {"$unwind": {"path": "$student", "preserveNullAndEmptyArrays": True}},
+            {"$project": self._roster_projection(student_fields)}
+        ]
+        items = list(self.db.enrollments.aggregate(pipeline))
+        
+        next_token = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            value = last.get(sort_by)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            next_token = self._encode_page_token(order=order, after=last["enrollmentId"], value=value)
+        return {"items": items, "nextToken": next_token}
+    
+    @staticmethod
+    def _roster_seek_filter(sort_by, descending, state):
+        """Filter selecting the enrollments after the (value, enrollmentId) recorded in a token"""
+        after_op = "$lt" if descending else "$gt"
+        if sort_by == "enrollmentId":
+            return {"enrollmentId": {after_op: state["after"]}}
+        value = state["value"]
+        if sort_by == "enrollmentDate":
+            value = datetime.fromisoformat(value)
+        return {"$or": [
+            {sort_by: {after_op: value}},
+            {sort_by: value, "enrollmentId": {after_op: state["after"]}}
+        ]}
+    
+    @staticmethod
+    def _roster_student_lookup(student_fields, local_field="studentId"):
+        """Pipeline-form $lookup fetching only the given fields of the student whose userId is in local_field"""
+        return {"$lookup": {
+            "from": "users",
+            "let": {"studentId": f"${local_field}"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$userId", "$$studentId"]}}},
+                {"$project": {"_id": 0, **{field: 1 for field in student_fields}}}
+            ],
+            "as": "student"
+        }}
+    
+    def _roster_projection(self, student_fields=None):
+        """Fields returned for each roster entry"""
+        projection = {"enrollmentId": 1, "studentId": 1, "enrollmentDate": 1, "status": 1, "progress": 1}
+        projection.update({f"student.{field}": 1 for field in student_fields or self.ROSTER_STUDENT_FIELDS})
+        return projection
+    
+    def search_courses_by_title(self, search_term, limit=None):
+        """Search courses by title (case-insensitive, partial match)
+        
+        Matches titles containing search_term at the start of a word ("pyth" finds "Introduction
+        to Python"; a fragment from the middle of a word such as "thon" does not match). The first
+        word bounds a scan of the multikey (titleWords, courseId) index; the whole term is then
+        checked against titleSearch.
+        
+        Args:
+            search_term: Text to look for in course titles
+            limit: Maximum number of results (None returns every match)
+        """
+        normalized = _normalize_search_text(search_term)
+        query = {}
+        if normalized:
+            query = {
+                "titleWords": {"$regex": f"^{re.escape(normalized.split(' ')[0])}"},
+                "titleSearch": {"$regex": f"(^| ){re.escape(normalized)}"}
+            }
+        cursor = self.db.courses.find(query)
+        if limit is not None:
+            if limit <= 0:
+                raise ValueError("limit must be a positive integer")
+            cursor = cursor.limit(limit)
+        return list(cursor)
+    
+    def search_courses(self, query, limit=20, token=None, projection=None):
+        """Full-text search over course titles and descriptions, best matches first
+        
+        Args:
+            query: Words to search for ($text syntax: "quoted phrases" and -negations are supported)
+            limit: Maximum number of results per page (capped at MAX_SEARCH_RESULTS)
+            token: nextToken of the previous page (None for the first page)
+            projection: Course fields to return (a relevance "score" is always added)
+            
+        Returns:
+            dict: {"items": [...], "nextToken": str or None}
+        """
+        limit = self._search_limit(limit)
+        state = self._decode_page_token(token)
+        if state and state.get("q") != query:
+            raise ValueError("Page token was issued for a different search")
+        if not query or not query.strip():
+            return {"items": [], "nextToken": None}
+        offset = state.get("offset", 0)
+        
+        projection = dict(projection or {})
+        projection["score"] = {"$meta": "textScore"}
+        items = list(self.db.courses
+                     .find({"$text": {"$search": query}}, projection)
+                     .sort([("score", {"$meta": "textScore"}), ("courseId", 1)])
+                     .skip(offset)
+                     .limit(limit + 1))
+        
+        next_token = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_token = self._encode_page_token(q=query, offset=offset + limit)
+        return {"items": items, "nextToken": next_token}
+    
+    def search_courses_by_prefix(self, prefix, limit=20, token=None, projection=None):
+        """Type-ahead search: courses whose title starts with prefix, in title order
+        
+        The prefix is normalized like titleSearch and escaped, so the anchored match is a
+        bounded scan of the (titleSearch, courseId) index whatever the input contains.
+        
+        Args:
+            prefix: Beginning of the title (case and accents are ignored)
+            limit: Maximum number of results per page (capped at MAX_SEARCH_RESULTS)
+            token: nextToken of the previous page (None for the first page)
+            projection: Course fields to return
+            
+        Returns:
+            dict: {"items": [...], "nextToken": str or None}
+        """
+        limit = self._search_limit(limit)
+        normalized = _normalize_search_text(prefix)
+        state = self._decode_page_token(token)
+        if state and state.get("q") != normalized:
+            raise ValueError("Page token was issued for a different search")
+        if not normalized:
+            return {"items": [], "nextToken": None}
+        
+        query = {"titleSearch": {"$regex": f"^{re.escape(normalized)}"}}
+        if state:
+            query = {"$and": [query, {"$or": [
+                {"titleSearch": {"$gt": state["title"]}},
+                {"titleSearch": state["title"], "courseId": {"$gt": state["after"]}}
+            ]}]}
+        
+        projection = self._with_key_field(projection, "courseId")
+        if projection is not None and any(value for field, value in projection.items() if field != "_id"):
+            projection["titleSearch"] = 1
+        items = list(self.db.courses
+                     .find(query, projection)
+                     .sort([("titleSearch", 1), ("courseId", 1)])
+                     .limit(limit + 1))
+        
+        next_token = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_token = self._encode_page_token(q=normalized, title=items[-1]["titleSearch"],
+                                                 after=items[-1]["courseId"])
+        return {"items": items, "nextToken": next_token}
+    
+    def _search_limit(self, limit):
+        """Validate a search page size and cap it at MAX_SEARCH_RESULTS"""
+        if limit <= 0:
+            raise ValueError("limit must be a positive integer")
+        return min(limit, MAX_SEARCH_RESULTS)
+    
+    def sync_course_search_keys(self, batch_size=1000):
+        """Backfill titleSearch and titleWords on courses created before they existed (or whose title changed)
+        
+        Returns:
+            int: Number of course documents modified
+        """
+        modified = 0
+        try:
+            courses = self.db.courses.find({}, {"_id": 0, "courseId": 1, "title": 1, "titleSearch": 1,
+                                                "titleWords": 1})
+            for chunk in _chunked(courses, batch_size):
+                updates = [(course["courseId"], _title_search_keys(course.get("title"))) for course in chunk]
+                current = {course["courseId"]: course for course in chunk}
+                operations = [UpdateOne({"courseId": course_id}, {"$set": keys})
+                              for course_id, keys in updates
+                              if any(current[course_id].get(field) != value for field, value in keys.items())]
+                if operations:
+                    modified += self.db.courses.bulk_write(operations, ordered=False).modified_count
+        except Exception as e:
+            print(f"❌ Error syncing course search keys: {e}")
+            return modified
+        print(f"✅ Course search keys synced. Modified courses: {modified}")
+        return modified
+    
+    def reconcile_course_counters(self):
+        """Rebuild every course's enrollmentCounts from the enrollments collection
+        
+        Counters are reset and then recounted by one $group over enrollments merged into
+        courses, repairing any drift (e.g. a failed counter update after an enrollment write).
+        
+        Returns:
+            int: Number of courses with enrollments, or 0 on error
+        """
+        zeros = {counter: 0 for counter in ENROLLMENT_COUNTERS}
+        pipeline = [
+            {"$group": {
+                "_id": {"courseId": "$courseId", "status": {"$ifNull": ["$status", "active"]}},
+                "count": {"$sum": 1}
+            }},
+            {"$group": {
+                "_id": "$_id.courseId",
+                "byStatus": {"$push": {"k": "$_id.status", "v": "$count"}},
+                "total": {"$sum": "$count"}
+            }},
+            {"$project": {
+                "_id": 0,
+                "courseId": "$_id",
+                "enrollmentCounts": {"$mergeObjects": [zeros, {"$arrayToObject": "$byStatus"}, {"total": "$total"}]}
+            }},
+            {"$merge": {"into": "courses", "on": "courseId", "whenMatched": "merge", "whenNotMatched": "discard"}}
+        ]
+        try:
+            self.db.courses.update_many({}, {"$set": {"enrollmentCounts": zeros}})
+            self.db.enrollments.aggregate(pipeline)
+            counted = self.db.courses.count_documents({"enrollmentCounts.total": {"$gt": 0}})
+        except Exception as e:
+            print(f"❌ Error reconciling course counters: {e}")
+            return 0
+        if self.cache is not None:
+            self.cache.clear()
+        print(f"✅ Enrollment counters reconciled for {counted} courses")
+        return counted
     
     # UPDATE Operations
+    
     def update_user_profile(self, user_id, bio=None, skills=None, avatar=None):
         """Update a user's profile information"""
         update_data = {}
@@ -1108,11 +3125,18 @@ class EduHubDatabase:
                     {"userId": user_id},
                     {"$set": update_data}
                 )
-                print(f"✅ Profile updated for user {user_id}. Modified count: {result.modified_count}")
-                return result.modified_count
             except Exception as e:
                 print(f"❌ Error updating profile: {e}")
                 return 0
+            self._invalidate_cache(("user", user_id))
+            if bio is not None:
+                try:
+                    self._fan_out_instructor_updates([(user_id, {"profile.bio": bio})])
+                except Exception as e:
+                    # The profile itself was updated; only the embedded course summaries are stale
+                    print(f"❌ Error updating instructor summaries: {e}")
+            print(f"✅ Profile updated for user {user_id}. Modified count: {result.modified_count}")
+            return result.modified_count
         else:
             print("❌ No update data provided")
             return 0
@@ -1124,6 +3148,8 @@ class EduHubDatabase:
                 {"courseId": course_id},
                 {"$set": {"isPublished": True, "updatedAt": datetime.now()}}
             )
+            self._invalidate_cache(("course", course_id))
+            self._refresh_course_indexes([course_id])
             print(f"✅ Course {course_id} marked as published. Modified count: {result.modified_count}")
             return result.modified_count
         except Exception as e:
@@ -1150,6 +3176,42 @@ class EduHubDatabase:
             print(f"❌ Error updating grade: {e}")
             return 0
     
+    def update_enrollment_status(self, enrollment_id, status, progress=None):
+        """Change an enrollment's status and move it between its course's status counters
+        
+        Args:
+            enrollment_id: Enrollment enrollmentId
+            status: "active", "completed" or "dropped"
+            progress: Optional new progress (completing an enrollment sets it to 100)
+        """
+        if status not in ENROLLMENT_COUNTERS[1:]:
+            print(f"❌ Invalid enrollment status: {status}")
+            return 0
+        update_data = {"status": status, "completionDate": datetime.now() if status == "completed" else None}
+        if status == "completed":
+            update_data["progress"] = 100
+        elif progress is not None:
+            update_data["progress"] = progress
+        
+        try:
+            # The previous status comes back in the same round trip
+            previous = self.db.enrollments.find_one_and_update(
+                {"enrollmentId": enrollment_id},
+                {"$set": update_data},
+                projection={"_id": 0, "courseId": 1, "status": 1}
+            )
+            if previous is None:
+                print(f"❌ Enrollment {enrollment_id} not found")
+                return 0
+            previous_status = previous.get("status", "active")
+            if previous_status != status:
+                self._record_enrollment_changes({previous["courseId"]: {previous_status: -1, status: 1}})
+            print(f"✅ Enrollment {enrollment_id} status set to {status}")
+            return 1
+        except Exception as e:
+            print(f"❌ Error updating enrollment status: {e}")
+            return 0
+    
     def add_tags_to_course(self, course_id, new_tags):
         """Add tags to an existing course"""
         try:
@@ -1157,6 +3219,8 @@ class EduHubDatabase:
                 {"courseId": course_id},
                 {"$addToSet": {"tags": {"$each": new_tags}}, "$set": {"updatedAt": datetime.now()}}
             )
+            self._invalidate_cache(("course", course_id))
+            self._refresh_course_indexes([course_id])
             print(f"✅ Tags added to course {course_id}. Modified count: {result.modified_count}")
             return result.modified_count
         except Exception as e:
@@ -1171,87 +3235,662 @@ class EduHubDatabase:
                 {"userId": user_id},
                 {"$set": {"isActive": False}}
             )
-            print(f"✅ User {user_id} soft deleted. Modified count: {result.modified_count}")
-            return result.modified_count
         except Exception as e:
             print(f"❌ Error soft deleting user: {e}")
             return 0
+        self._invalidate_cache(("user", user_id))
+        try:
+            self._fan_out_instructor_updates([(user_id, {"isActive": False})])
+        except Exception as e:
+            # The user itself was deactivated; only the embedded course summaries are stale
+            print(f"❌ Error updating instructor summaries: {e}")
+        print(f"✅ User {user_id} soft deleted. Modified count: {result.modified_count}")
+        return result.modified_count
+    
+    def delete_enrollment(self, enrollment_id):
+        """Delete an enrollment"""
+        try:
+            # Return the course, status and price paid in the same round trip so counters and
+            # revenue rollups can be adjusted
+            deleted = self.db.enrollments.find_one_and_delete(
+                {"enrollmentId": enrollment_id},
+                projection={"_id": 0, "courseId": 1, "status": 1, "enrollmentDate": 1, "pricePaid": 1}
+            )
+            deleted_count = 1 if deleted else 0
+            if deleted:
+                self._record_enrollment_changes({deleted["courseId"]: {"total": -1, deleted.get("status", "active"): -1}})
+                self._record_revenue([deleted], sign=-1)
+            print(f"✅ Enrollment {enrollment_id} deleted. Deleted count: {deleted_count}")
+            return deleted_count
+        except Exception as e:
+            print(f"❌ Error deleting enrollment: {e}")
+            return 0
+    
+    def remove_lesson_from_course(self, lesson_id):
+        """Remove a lesson from a course"""
+        try:
+            result = self.db.lessons.delete_one({"lessonId": lesson_id})
+            print(f"✅ Lesson {lesson_id} removed. Deleted count: {result.deleted_count}")
+            return result.deleted_count
+        except Exception as e:
+            print(f"❌ Error removing lesson: {e}")
+            return 0
+    
+    # BULK Operations
+    # Each method takes an iterable, sends it as chunked unordered bulk_write calls and returns
+    # one result per input item: {"index", "id", "status", "error"} where status is one of
+    # "ok", "duplicate", "not_found", "invalid" or "error". A failing item never aborts the batch.
+    
+    def bulk_enroll_students(self, enrollments, batch_size=1000):
+        """Enroll many students at once
+        
+        Args:
+            enrollments: Iterable of (student_id, course_id) pairs
+            batch_size: Maximum number of operations per bulk_write call
+        """
+        results = []
+        for chunk in _chunked(enrollments, batch_size):
+            # Prices of the chunk's courses (which also tells which exist) in one round trip
+            courses = {course["courseId"]: course for course in self.db.courses.find(
+                {"courseId": {"$in": list({course_id for _, course_id in chunk})}}, self.REVENUE_COURSE_FIELDS)}
+            existing_students = self._existing_ids("users", "userId", {student_id for student_id, _ in chunk},
+                                                   {"role": "student"})
+            operations = []
+            new_enrollments = {}
+            for student_id, course_id in chunk:
+                if course_id not in courses:
+                    self._new_bulk_result(results, None, "not_found", f"Course {course_id} not found")
+                    continue
+                if student_id not in existing_students:
+                    self._new_bulk_result(results, None, "not_found", f"Student {student_id} not found")
+                    continue
+                result = self._new_bulk_result(results, self.id_allocator.next_id("EN"))
+                enrollment = {
+                    "enrollmentId": result["id"],
+                    "studentId": student_id,
+                    "courseId": course_id,
+                    "enrollmentDate": datetime.now(),
+                    "status": "active",
+                    "progress": 0,
+                    "completionDate": None
+                }
+                if courses[course_id].get("price") is not None:
+                    enrollment["pricePaid"] = courses[course_id]["price"]
+                new_enrollments[result["index"]] = enrollment
+                operations.append((result["index"], InsertOne(enrollment)))
+            self._execute_bulk_chunk("enrollments", operations, results)
+            
+            inserted = [enrollment for index, enrollment in new_enrollments.items() if results[index]["status"] == "ok"]
+            counter_deltas = {}
+            for enrollment in inserted:
+                deltas = counter_deltas.setdefault(enrollment["courseId"], {"total": 0, "active": 0})
+                deltas["total"] += 1
+                deltas["active"] += 1
+            self._record_enrollment_changes(counter_deltas)
+            self._record_revenue(inserted, courses=courses)
+        
+        self._print_bulk_summary("Enrollments", results)
+        return results
+    
+    def bulk_add_lessons(self, lessons, batch_size=1000):
+        """Add many lessons at once, appending each after the existing lessons of its course
+        
+        Args:
+            lessons: Iterable of dicts with add_lesson_to_course's arguments
+                (course_id, title, content, duration, optional video_url and materials)
+            batch_size: Maximum number of operations per bulk_write call
+        """
+        results = []
+        for chunk in _chunked(lessons, batch_size):
+            course_ids = list({lesson["course_id"] for lesson in chunk})
+            existing_courses = self._existing_ids("courses", "courseId", course_ids)
+            
+            # One round trip for the current last lesson order of every course in the chunk
+            next_order = {course_id: 1 for course_id in course_ids}
+            for row in self.db.lessons.aggregate([
+                {"$match": {"courseId": {"$in": course_ids}}},
+                {"$group": {"_id": "$courseId", "lastOrder": {"$max": "$order"}}}
+            ]):
+                next_order[row["_id"]] = row["lastOrder"] + 1
+            
+            operations = []
+            for lesson in chunk:
+                if lesson["course_id"] not in existing_courses:
+                    self._new_bulk_result(results, None, "not_found", f"Course {lesson['course_id']} not found")
+                    continue
+                result = self._new_bulk_result(results, self.id_allocator.next_id("LE"))
+                operations.append((result["index"], InsertOne({
+                    "lessonId": result["id"],
+                    "courseId": lesson["course_id"],
+                    "title": lesson["title"],
+                    "content": lesson["content"],
+                    "duration": lesson["duration"],
+                    "order": next_order[lesson["course_id"]],
+                    "videoUrl": lesson.get("video_url", ""),
+                    "materials": lesson.get("materials") or [],
+                    "createdAt": datetime.now()
+                })))
+                next_order[lesson["course_id"]] += 1
+            self._execute_bulk_chunk("lessons", operations, results)
+        
+        self._print_bulk_summary("Lessons", results)
+        return results
+    
+    def bulk_update_grades(self, grades, batch_size=1000):
+        """Grade many submissions at once
+        
+        Args:
+            grades: Iterable of (submission_id, grade) or (submission_id, grade, feedback) tuples
+            batch_size: Maximum number of operations per bulk_write call
+        """
+        def build_update(item):
+            submission_id, grade = item[0], item[1]
+            feedback = item[2] if len(item) > 2 else None
+            update_data = {"grade": grade, "gradedDate": datetime.now()}
+            if feedback:
+                update_data["feedback"] = feedback
+            return submission_id, {"$set": update_data}
+        
+        results = self._bulk_update("submissions", "submissionId", grades, build_update, batch_size)
+        self._print_bulk_summary("Grades", results)
+        return results
+    
+    def bulk_update_profiles(self, updates, batch_size=1000):
+        """Update many user profiles at once
+        
+        Args:
+            updates: Iterable of dicts with user_id and any of bio, skills and avatar
+            batch_size: Maximum number of operations per bulk_write call
+        """
+        def build_update(item):
+            update_data = {f"profile.{field}": item[field] for field in ("bio", "skills", "avatar")
+                           if item.get(field) is not None}
+            return item["user_id"], ({"$set": update_data} if update_data else None)
+        
+        updates = list(updates)
+        results = self._bulk_update("users", "userId", updates, build_update, batch_size)
+        if self.denormalize_instructors:
+            try:
+                self._fan_out_instructor_updates([
+                    (item["user_id"], {"profile.bio": item["bio"]})
+                    for item, result in zip(updates, results)
+                    if result["status"] == "ok" and item.get("bio") is not None
+                ])
+            except Exception as e:
+                print(f"❌ Error updating instructor summaries: {e}")
+        self._print_bulk_summary("Profiles", results)
+        return results
+    
+    def bulk_add_tags(self, course_tags, batch_size=1000):
+        """Add tags to many courses at once
+        
+        Args:
+            course_tags: Iterable of (course_id, new_tags) pairs
+            batch_size: Maximum number of operations per bulk_write call
+        """
+        def build_update(item):
+            course_id, new_tags = item
+            if not new_tags:
+                return course_id, None
+            return course_id, {"$addToSet": {"tags": {"$each": list(new_tags)}}, "$set": {"updatedAt": datetime.now()}}
+        
+        results = self._bulk_update("courses", "courseId", course_tags, build_update, batch_size)
+        try:
+            self._refresh_course_indexes([result["id"] for result in results if result["status"] == "ok"])
+        except Exception as e:
+            print(f"❌ Error refreshing course indexes: {e}")
+        self._print_bulk_summary("Course tags", results)
+        return results
+    
+    def _bulk_update(self, collection_name, id_field, items, build_update, batch_size):
+        """Apply per-item updates by business ID, reporting missing targets instead of failing"""
+        results = []
+        for chunk in _chunked(items, batch_size):
+            updates = [build_update(item) for item in chunk]
+            existing = self._existing_ids(collection_name, id_field, [target for target, _ in updates])
+            
+            operations = []
+            for target, update in updates:
+                if update is None:
+                    self._new_bulk_result(results, target, "invalid", "No update data provided")
+                elif target not in existing:
+                    self._new_bulk_result(results, target, "not_found", f"{id_field} {target} not found")
+                else:
+                    result = self._new_bulk_result(results, target)
+                    operations.append((result["index"], UpdateOne({id_field: target}, update)))
+            self._execute_bulk_chunk(collection_name, operations, results)
+            if collection_name in self.CACHE_TAGS:
+                tag = self.CACHE_TAGS[collection_name]
+                self._invalidate_cache(*[(tag, results[index]["id"]) for index, _ in operations])
+        return results
+    
+    def _existing_ids(self, collection_name, id_field, ids, query=None):
+        """Return the subset of business IDs that exist (and match query), in one round trip"""
+        cursor = self.db[collection_name].find(dict(query or {}, **{id_field: {"$in": list(ids)}}),
+                                               {id_field: 1, "_id": 0})
+        return {doc[id_field] for doc in cursor}
+    
+    def _new_bulk_result(self, results, item_id, status="ok", error=None):
+        """Append and return the result entry for the next input item"""
+        result = {"index": len(results), "id": item_id, "status": status, "error": error}
+        results.append(result)
+        return result
+    
+    def _execute_bulk_chunk(self, collection_name, operations, results):
+        """Send (result_index, operation) pairs as one unordered bulk_write and record failures"""
+        if not operations:
+            return
+        try:
+            self.db[collection_name].bulk_write([operation for _, operation in operations], ordered=False)
+            return
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+        except Exception as e:
+            # The whole request failed (e.g. connection error), so no item can be trusted
+            write_errors = [{"index": position, "code": None, "errmsg": str(e)} for position in range(len(operations))]
+        
+        for error in write_errors:
+            result = results[operations[error["index"]][0]]
+            if error.get("code") in (11000, 11001):
+                result["status"] = "duplicate"
+            elif error.get("code") == 121:
+                result["status"] = "invalid"
+            else:
+                result["status"] = "error"
+            result["error"] = error.get("errmsg")
+    
+    def _print_bulk_summary(self, label, results):
+        """Print per-status counts for a bulk operation"""
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        ok = counts.pop("ok", 0)
+        details = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+        print(f"✅ {label}: {ok}/{len(results)} succeeded" + (f" ({details})" if details else ""))
+    
+    # STREAMING Reads and Keyset Pagination
+    # iter_* return cursors that fetch batch_size documents per round trip, so memory use does
+    # not grow with the result. page_* return {"items": [...], "nextToken": ...}; pages are ordered
+    # by the (filter field, ID) of an index and seek past the last key of the previous page instead
+    # of using skip(), so deep pages cost the same as the first
+    def iter_active_students(self, projection=None, batch_size=1000):
+        """Stream active students ordered by userId"""
+        return self._stream("users", "userId", self._active_students_query(), projection, batch_size)
+    
+    def page_active_students(self, page_size=50, token=None, projection=None):
+        """Return one page of active students and the token of the next page"""
+        return self._keyset_page("users", "userId", self._active_students_query(), page_size, token, projection)
+    
+    def iter_courses_by_category(self, category, projection=None, batch_size=1000):
+        """Stream the courses of a category ordered by courseId"""
+        return self._stream("courses", "courseId", {"category": category}, projection, batch_size)
+    
+    def page_courses_by_category(self, category, page_size=50, token=None, projection=None):
+        """Return one page of the courses of a category and the token of the next page"""
+        return self._keyset_page("courses", "courseId", {"category": category}, page_size, token, projection)
+    
+    def iter_courses_by_price_range(self, min_price, max_price, projection=None, batch_size=1000):
+        """Stream courses priced between min_price and max_price ordered by (price, courseId)"""
+        query = {"price": {"$gte": min_price, "$lte": max_price}}
+        return self._stream("courses", "courseId", query, projection, batch_size, sort_field="price")
+    
+    def page_courses_by_price_range(self, min_price, max_price, page_size=50, token=None, projection=None):
+        """Return one page of courses priced between min_price and max_price and the token of the next page
+        
+        Pages are ordered by (price, courseId).
+        """
+        query = {"price": {"$gte": min_price, "$lte": max_price}}
+        return self._keyset_page("courses", "courseId", query, page_size, token, projection, sort_field="price")
+    
+    def iter_recent_users(self, months=6, projection=None, batch_size=1000):
+        """Stream users who joined in the last N months ordered by (dateJoined, userId)"""
+        cutoff_date = self.clock() - timedelta(days=30 * months)
+        return self._stream("users", "userId", {"dateJoined": {"$gte": cutoff_date}}, projection, batch_size,
+                            sort_field="dateJoined")
+    
+    def page_recent_users(self, months=6, page_size=50, token=None, projection=None):
+        """Return one page of users who joined in the last N months and the token of the next page
+        
+        Pages are ordered by (dateJoined, userId). The cutoff date is fixed by the first page and
+        carried in the token, so later pages do not shift as time passes.
+        """
+        state = self._decode_page_token(token)
+        cutoff_date = datetime.fromisoformat(state["cutoff"]) if "cutoff" in state \
+            else self.clock() - timedelta(days=30 * months)
+        return self._keyset_page("users", "userId", {"dateJoined": {"$gte": cutoff_date}}, page_size, token,
+                                 projection, sort_field="dateJoined", cutoff=cutoff_date.isoformat())
+    
+    def iter_courses_with_tags(self, tag_list, projection=None, batch_size=1000):
+        """Stream courses having any of the given tags ordered by courseId"""
+        return self._stream("courses", "courseId", {"tags": {"$in": tag_list}}, projection, batch_size)
+    
+    def page_courses_with_tags(self, tag_list, page_size=50, token=None, projection=None):
+        """Return one page of courses having any of the given tags and the token of the next page
+        
+        Pages walk the tags in sorted order and the courses of each tag by courseId, so every read
+        is one range of the (tags, courseId) index. A course having several of the tags is listed
+        once, under the first of them.
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be a positive integer")
+        tags = sorted(set(tag_list))
+        state = self._decode_page_token(token)
+        if state and state.get("tag") not in tags:
+            raise ValueError("Page token was issued for different tags")
+        start = tags.index(state["tag"]) if state else 0
+        
+        projection = self._with_key_field(projection, "courseId")
+        rows = []
+        for position in range(start, len(tags)):
+            conditions = [{"tags": tags[position]}]
+            if position:
+                # Skip courses already listed under an earlier tag
+                conditions.append({"tags": {"$nin": tags[:position]}})
+            if position == start and "after" in state:
+                conditions.append({"courseId": {"$gt": state["after"]}})
+            # One extra course tells whether another page exists
+            courses = (self.db.courses
+                       .find({"$and": conditions} if len(conditions) > 1 else conditions[0], projection)
+                       .sort("courseId", 1)
+                       .limit(page_size + 1 - len(rows)))
+            rows.extend((tags[position], course) for course in courses)
+            if len(rows) > page_size:
+                break
+        
+        next_token = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            tag, last = rows[-1]
+            next_token = self._encode_page_token(tag=tag, after=last["courseId"])
+        return {"items": [course for _, course in rows], "nextToken": next_token}
+    
+    @staticmethod
+    def _active_students_query():
+        """Filter shared by the active student reads"""
+        return {"role": "student", "isActive": True}
+    
+    def _stream(self, collection_name, id_field, query, projection, batch_size, sort_field=None):
+        """Open a cursor ordered by (sort_field,) id_field that fetches batch_size documents per round trip
+        
+        As in _keyset_page, sort_field should be the range-filtered field, so that a
+        (sort_field, id_field) index serves both the filter and the order.
+        """
+        sort = [(id_field, 1)] if sort_field is None else [(sort_field, 1), (id_field, 1)]
+        return (self.db[collection_name]
+                .find(query, projection)
+                .sort(sort)
+                .batch_size(batch_size))
+    
+    def _keyset_page(self, collection_name, id_field, query, page_size, token, projection, sort_field=None,
+                     **state):
+        """Fetch the page after the (sort_field value, ID) recorded in token
+        
+        Args:
+            collection_name: Collection to read
+            id_field: Unique, indexed business ID the pages are ordered by
+            query: Filter of the read
+            page_size: Maximum number of documents per page
+            token: Continuation token from the previous page (None for the first page)
+            projection: Fields to return; id_field and sort_field are always included
+            sort_field: Field ordering the pages before id_field, normally the range-filtered field,
+                so that a (sort_field, id_field) index serves both the filter and the order
+            **state: Extra values carried in the next token
+        """
+        if page_size <= 0:
+            raise ValueError("page_size must be a positive integer")
+        previous = self._decode_page_token(token)
+        if "after" in previous:
+            query = {"$and": [query, self._keyset_seek_filter(id_field, sort_field, previous)]}
+        
+        sort = [(id_field, 1)] if sort_field is None else [(sort_field, 1), (id_field, 1)]
+        projection = self._with_key_field(projection, id_field)
+        if sort_field is not None:
+            projection = self._with_key_field(projection, sort_field)
+        # One extra document tells whether another page exists
+        items = list(self.db[collection_name]
+                     .find(query, projection)
+                     .sort(sort)
+                     .limit(page_size + 1))
+        
+        next_token = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            if sort_field is not None:
+                value = last.get(sort_field)
+                if isinstance(value, datetime):
+                    state.update(value=value.isoformat(), valueType="date")
+                else:
+                    state.update(value=value)
+            next_token = self._encode_page_token(after=last[id_field], **state)
+        return {"items": items, "nextToken": next_token}
+    
+    @staticmethod
+    def _keyset_seek_filter(id_field, sort_field, state):
+        """Filter selecting the documents after the (value, ID) recorded in a token"""
+        if sort_field is None:
+            return {id_field: {"$gt": state["after"]}}
+        value = state.get("value")
+        if state.get("valueType") == "date":
+            value = datetime.fromisoformat(value)
+        # The top-level bound narrows the index range; $or only settles ties on the value
+        return {sort_field: {"$gte": value}, "$or": [
+            {sort_field: {"$gt": value}},
+            {sort_field: value, id_field: {"$gt": state["after"]}}
+        ]}
+    
+    @staticmethod
+    def _with_key_field(projection, id_field):
+        """Make sure a projection returns a field pages are keyed on"""
+        if projection is None:
+            return None
+        if not isinstance(projection, dict):
+            projection = {field: 1 for field in projection}
+        projection = dict(projection)
+        if any(value for field, value in projection.items() if field != "_id"):
+            projection[id_field] = 1        # inclusion projection
+        else:
+            projection.pop(id_field, None)  # exclusion projection
+        return projection
     
-    def delete_enrollment(self, enrollment_id):
-        """Delete an enrollment"""
-        try:
-            result = self.db.enrollments.delete_one({"enrollmentId": enrollment_id})
-            print(f"✅ Enrollment {enrollment_id} deleted. Deleted count: {result.deleted_count}")
-            return result.deleted_count
-        except Exception as e:
-            print(f"❌ Error deleting enrollment: {e}")
-            return 0
+    @staticmethod
+    def _encode_page_token(**state):
+        """Serialize pagination state into an opaque, URL-safe token"""
+        payload = json.dumps(state, separators=(",", ":"), sort_keys=True).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
     
-    def remove_lesson_from_course(self, lesson_id):
-        """Remove a lesson from a course"""
+    @staticmethod
+    def _decode_page_token(token):
+        """Parse a token produced by _encode_page_token (None gives an empty state)"""
+        if token is None:
+            return {}
         try:
-            result = self.db.lessons.delete_one({"lessonId": lesson_id})
-            print(f"✅ Lesson {lesson_id} removed. Deleted count: {result.deleted_count}")
-            return result.deleted_count
-        except Exception as e:
-            print(f"❌ Error removing lesson: {e}")
-            return 0
+            state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid page token: {token!r}") from e
+        if not isinstance(state, dict):
+            raise ValueError(f"Invalid page token: {token!r}")
+        return state
     
     # PART 4: ADVANCED QUERIES AND AGGREGATION
     
     # Complex Queries
     def find_courses_by_price_range(self, min_price, max_price):
         """Find courses with price between min_price and max_price"""
-        return list(self.db.courses.find({"price": {"$gte": min_price, "$lte": max_price}}))
+        return list(self.iter_courses_by_price_range(min_price, max_price))
     
     def get_recent_users(self, months=6):
         """Get users who joined in the last N months"""
-        cutoff_date = datetime.now() - timedelta(days=30 * months)
-        return list(self.db.users.find({"dateJoined": {"$gte": cutoff_date}}))
+        return list(self.iter_recent_users(months))
     
     def find_courses_with_tags(self, tag_list):
         """Find courses that have specific tags using $in operator"""
-        return list(self.db.courses.find({"tags": {"$in": tag_list}}))
+        return list(self.iter_courses_with_tags(tag_list))
     
     def get_assignments_due_next_week(self):
         """Retrieve assignments with due dates in the next week"""
-        start_date = datetime.now()
+        start_date = self.clock()
         end_date = start_date + timedelta(weeks=1)
         return list(self.db.assignments.find({
             "dueDate": {"$gte": start_date, "$lte": end_date}
         }))
     
     # Aggregation Pipelines
-    def get_course_enrollment_statistics(self):
-        """Course Enrollment Statistics: Count total enrollments per course, calculate average course rating, group by course category"""
-        pipeline = [
-            # Join with enrollments to count enrollments per course
-            {"$lookup": {
-                "from": "enrollments",
-                "localField": "courseId",
-                "foreignField": "courseId",
-                "as": "enrollments"
-            }},
+    def get_course_enrollment_statistics(self, materialized=False, max_staleness=None, use_counters=False):
+        """Course Enrollment Statistics: Count total enrollments per course, calculate average course rating, group by course category
+        
+        Args:
+            materialized: Read the precomputed enrollment_stats collection (one document per
+                category) instead of joining every course with its enrollments
+            max_staleness: Seconds after which the materialized statistics are rebuilt before
+                being read (defaults to the bound given to enable_enrollment_stats)
+            use_counters: Count enrollments from each course's enrollmentCounts instead of
+                joining the enrollments collection
+        """
+        if materialized:
+            return self._read_enrollment_stats(max_staleness)
+        pipeline = self._enrollment_statistics_pipeline(use_counters)
+        # Sort by total enrollments descending
+        pipeline.append({"$sort": {"totalEnrollments": -1}})
+        return list(self.db.courses.aggregate(pipeline))
+    
+    def _enrollment_statistics_pipeline(self, use_counters=False):
+        """Per-category statistics stages shared by the live and materialized statistics"""
+        pipeline, enrollment_count = self._course_enrollment_count(use_counters)
+        return pipeline + [
             # Group by category and calculate statistics
             {"$group": {
                 "_id": "$category",
                 "totalCourses": {"$sum": 1},
-                "totalEnrollments": {"$sum": {"$size": "$enrollments"}},
+                "totalEnrollments": {"$sum": enrollment_count},
                 "averageRating": {"$avg": "$rating"},
                 "averagePrice": {"$avg": "$price"},
                 "courses": {
                     "$push": {
                         "courseId": "$courseId",
                         "title": "$title",
-                        "enrollmentCount": {"$size": "$enrollments"},
+                        "enrollmentCount": enrollment_count,
                         "rating": "$rating"
                     }
                 }
-            }},
-            # Sort by total enrollments descending
-            {"$sort": {"totalEnrollments": -1}}
+            }}
         ]
-        return list(self.db.courses.aggregate(pipeline))
+    
+    @staticmethod
+    def _course_enrollment_count(use_counters):
+        """Stages and expression giving each course's enrollment count in a courses pipeline
+        
+        Returns:
+            tuple: (stages to prepend, count expression)
+        """
+        if use_counters:
+            return [], {"$ifNull": ["$enrollmentCounts.total", 0]}
+        # Join with enrollments to count enrollments per course
+        return [{"$lookup": {
+            "from": "enrollments",
+            "localField": "courseId",
+            "foreignField": "courseId",
+            "as": "enrollments"
+        }}], {"$size": "$enrollments"}
+    
+    # MATERIALIZED Enrollment Statistics
+    # enrollment_stats holds get_course_enrollment_statistics() precomputed, one document per
+    # category. rebuild_enrollment_stats() recomputes it with $merge; while enabled, this
+    # instance's enrollment and course writes keep it current with $inc, and reads rebuild it
+    # once it is older than the staleness bound (covering writes made by other processes).
+    
+    def enable_enrollment_stats(self, max_staleness=ENROLLMENT_STATS_MAX_STALENESS):
+        """Maintain the materialized enrollment statistics on writes and rebuild them now
+        
+        Args:
+            max_staleness: Seconds after which a materialized read triggers a full rebuild
+                (None rebuilds only when the statistics are missing)
+            
+        Returns:
+            int: Number of categories in the rebuilt statistics
+        """
+        self.enrollment_stats_enabled = True
+        self.enrollment_stats_staleness = max_staleness
+        return self.rebuild_enrollment_stats()
+    
+    def disable_enrollment_stats(self):
+        """Stop maintaining the materialized enrollment statistics on writes
+        
+        Materialized reads then rebuild the statistics once they are older than
+        ENROLLMENT_STATS_MAX_STALENESS seconds.
+        """
+        self.enrollment_stats_enabled = False
+        self.enrollment_stats_staleness = ENROLLMENT_STATS_MAX_STALENESS
+    
+    def rebuild_enrollment_stats(self):
+        """Recompute the materialized enrollment statistics from courses and enrollments
+        
+        Returns:
+            int: Number of categories, or 0 on error
+        """
+        rebuilt_at = datetime.now()
+        pipeline = self._enrollment_statistics_pipeline() + [
+            {"$set": {"rebuiltAt": rebuilt_at}},
+            {"$merge": {"into": "enrollment_stats", "on": "_id", "whenMatched": "replace",
+                        "whenNotMatched": "insert"}}
+        ]
+        try:
+            self.db.courses.aggregate(pipeline)
+            # Categories that no longer have courses were not rewritten by this rebuild. Categories
+            # upserted by writes since it started are stamped later and kept
+            self.db.enrollment_stats.delete_many({"$or": [{"rebuiltAt": {"$lt": rebuilt_at}},
+                                                          {"rebuiltAt": {"$exists": False}}]})
+            self.db.metadata.update_one({"_id": "enrollment_stats"}, {"$set": {"rebuiltAt": rebuilt_at}},
+                                        upsert=True)
+            categories = self.db.enrollment_stats.count_documents({})
+        except Exception as e:
+            print(f"❌ Error rebuilding enrollment statistics: {e}")
+            return 0
+        print(f"✅ Enrollment statistics rebuilt for {categories} categories")
+        return categories
+    
+    def _read_enrollment_stats(self, max_staleness=None):
+        """Return the materialized statistics, rebuilding them first if missing or too old"""
+        if max_staleness is None:
+            max_staleness = self.enrollment_stats_staleness
+        metadata = self.db.metadata.find_one({"_id": "enrollment_stats"})
+        if metadata is None or (max_staleness is not None
+                                and datetime.now() - metadata["rebuiltAt"] > timedelta(seconds=max_staleness)):
+            self.rebuild_enrollment_stats()
+        return list(self.db.enrollment_stats.find({}, {"rebuiltAt": 0}).sort("totalEnrollments", -1))
+    
+    def _apply_enrollment_stats_deltas(self, course_deltas):
+        """$inc the category and course enrollment counts of the materialized statistics"""
+        categories = {course["courseId"]: course["category"] for course in self.db.courses.find(
+            {"courseId": {"$in": list(course_deltas)}}, {"_id": 0, "courseId": 1, "category": 1})}
+        operations = [UpdateOne({"_id": categories[course_id]},
+                                {"$inc": {"totalEnrollments": delta, "courses.$[course].enrollmentCount": delta}},
+                                array_filters=[{"course.courseId": course_id}])
+                      for course_id, delta in course_deltas.items() if course_id in categories]
+        if operations:
+            self.db.enrollment_stats.bulk_write(operations, ordered=False)
+    
+    def _add_course_to_enrollment_stats(self, course):
+        """Append a new course to its category in the materialized statistics"""
+        total_courses = {"$ifNull": ["$totalCourses", 0]}
+        
+        def running_average(field, value):
+            return {"$divide": [{"$add": [{"$multiply": [{"$ifNull": [f"${field}", 0]}, total_courses]},
+                                          {"$literal": value}]},
+                                {"$add": [total_courses, 1]}]}
+        
+        entry = {"courseId": course["courseId"], "title": course["title"], "enrollmentCount": 0,
+                 "rating": course["rating"]}
+        # All fields of one $set stage see the document before the update. A new category is
+        # stamped like a rebuilt one, so a rebuild running concurrently does not delete it
+        self.db.enrollment_stats.update_one({"_id": course["category"]}, [{"$set": {
+            "rebuiltAt": {"$ifNull": ["$rebuiltAt", {"$literal": datetime.now()}]},
+            "totalCourses": {"$add": [total_courses, 1]},
+            "totalEnrollments": {"$ifNull": ["$totalEnrollments", 0]},
+            "averageRating": running_average("averageRating", course["rating"]),
+            "averagePrice": running_average("averagePrice", course["price"]),
+            "courses": {"$concatArrays": [{"$ifNull": ["$courses", []]}, [{"$literal": entry}]]}
+        }}], upsert=True)
     
     def get_student_performance_analysis(self):
         """Student Performance Analysis: Average grade per student, completion rate by course, top-performing students"""
@@ -1289,38 +3928,110 @@ class EduHubDatabase:
         ]
         return list(self.db.submissions.aggregate(pipeline))
     
-    def get_instructor_analytics(self):
-        """Instructor Analytics: Total students taught by each instructor, average course rating per instructor, revenue generated per instructor"""
+    def iter_student_performance(self, course_id=None, start_date=None, end_date=None, top_n=None,
+                                 allow_disk_use=True, batch_size=1000):
+        """Stream per-student performance computed from graded submissions only
+        
+        Unlike get_student_performance_analysis, submissions are grouped by student before any
+        join, so users are looked up once per student (and only for the top_n students when a
+        limit is given) and assignments contribute just their courseId.
+        
+        Args:
+            course_id: Only count submissions to this course's assignments
+            start_date: Only count submissions made on or after this date (e.g. a term start)
+            end_date: Only count submissions made before this date
+            top_n: Return only the students with the highest average grade
+            allow_disk_use: Let the $group and $sort stages spill to disk instead of failing
+                at the 100 MB in-memory stage limit
+            batch_size: Students fetched per round trip
+            
+        Returns:
+            CommandCursor: Documents with _id (studentId), studentName, averageGrade,
+                totalSubmissions (graded), coursesParticipated and coursesCount, best first
+        """
+        match = {"grade": {"$ne": None}}
+        if course_id is not None:
+            match["assignmentId"] = {"$in": self.db.assignments.distinct("assignmentId", {"courseId": course_id})}
+        if start_date is not None or end_date is not None:
+            match["submissionDate"] = {}
+            if start_date is not None:
+                match["submissionDate"]["$gte"] = start_date
+            if end_date is not None:
+                match["submissionDate"]["$lt"] = end_date
+        
         pipeline = [
-            # Join courses with users to get instructor info
-            {"$lookup": {
-                "from": "users",
-                "localField": "instructorId",
-                "foreignField": "userId",
-                "as": "instructor"
+            {"$match": match},
+            {"$group": {
+                "_id": "$studentId",
+                "averageGrade": {"$avg": "$grade"},
+                "totalSubmissions": {"$sum": 1},
+                "assignmentIds": {"$addToSet": "$assignmentId"}
             }},
-            {"$unwind": "$instructor"},
-            # Join with enrollments to count students
+            {"$sort": {"averageGrade": -1, "_id": 1}}
+        ]
+        if top_n is not None:
+            # $sort + $limit keep only the top_n students in memory
+            pipeline.append({"$limit": top_n})
+        pipeline += [
+            # Course of each submitted assignment (localField with a pipeline needs MongoDB 5.0+)
             {"$lookup": {
-                "from": "enrollments",
-                "localField": "courseId",
-                "foreignField": "courseId",
-                "as": "enrollments"
+                "from": "assignments",
+                "localField": "assignmentIds",
+                "foreignField": "assignmentId",
+                "pipeline": [{"$project": {"_id": 0, "courseId": 1}}],
+                "as": "assignments"
+            }},
+            # After the $group the student ID is the _id
+            self._roster_student_lookup(["firstName", "lastName"], local_field="_id"),
+            {"$unwind": "$student"},
+            {"$project": {
+                "studentName": {"$concat": ["$student.firstName", " ", "$student.lastName"]},
+                "averageGrade": 1,
+                "totalSubmissions": 1,
+                "coursesParticipated": {"$setUnion": ["$assignments.courseId", []]}
             }},
+            {"$addFields": {"coursesCount": {"$size": "$coursesParticipated"}}}
+        ]
+        return self.db.submissions.aggregate(pipeline, allowDiskUse=allow_disk_use, batchSize=batch_size)
+    
+    def get_instructor_analytics(self, use_counters=False):
+        """Instructor Analytics: Total students taught by each instructor, average course rating per instructor, revenue generated per instructor
+        
+        Args:
+            use_counters: Count students from each course's enrollmentCounts instead of
+                joining the enrollments collection
+        """
+        if self.denormalize_instructors:
+            # Instructor info is embedded in each course
+            pipeline = [{"$match": {"instructor": {"$exists": True}}}]
+        else:
+            # Join courses with users to get instructor info
+            pipeline = [
+                {"$lookup": {
+                    "from": "users",
+                    "localField": "instructorId",
+                    "foreignField": "userId",
+                    "as": "instructor"
+                }},
+                {"$unwind": "$instructor"}
+            ]
+        # Count students per course
+        count_stages, enrollment_count = self._course_enrollment_count(use_counters)
+        pipeline += count_stages + [
             # Group by instructor
             {"$group": {
                 "_id": "$instructorId",
                 "instructorName": {"$first": {"$concat": ["$instructor.firstName", " ", "$instructor.lastName"]}},
                 "totalCourses": {"$sum": 1},
-                "totalStudents": {"$sum": {"$size": "$enrollments"}},
+                "totalStudents": {"$sum": enrollment_count},
                 "averageRating": {"$avg": "$rating"},
-                "totalRevenue": {"$sum": {"$multiply": ["$price", {"$size": "$enrollments"}]}},
+                "totalRevenue": {"$sum": {"$multiply": ["$price", enrollment_count]}},
                 "courses": {
                     "$push": {
                         "title": "$title",
-                        "enrollments": {"$size": "$enrollments"},
+                        "enrollments": enrollment_count,
                         "rating": "$rating",
-                        "revenue": {"$multiply": ["$price", {"$size": "$enrollments"}]}
+                        "revenue": {"$multiply": ["$price", enrollment_count]}
                     }
                 }
             }},
@@ -1329,11 +4040,157 @@ class EduHubDatabase:
         ]
         return list(self.db.courses.aggregate(pipeline))
     
-    def get_advanced_analytics(self):
-        """Advanced Analytics: Monthly enrollment trends, most popular course categories, student engagement metrics"""
+    # Instructor Revenue Rollups
+    # instructor_revenue_daily holds one document per instructor per day with the revenue and
+    # number of enrollments made that day, at the price paid. Enrollment writes $inc it, so
+    # windowed reports read at most one document per instructor per day in the window.
+    
+    # Course fields needed to attribute an enrollment's revenue
+    REVENUE_COURSE_FIELDS = {"_id": 0, "courseId": 1, "instructorId": 1, "price": 1}
+    
+    def get_instructor_revenue(self, days=30, start_date=None, end_date=None, instructor_id=None):
+        """Revenue and enrollments per instructor over a time window, read from the daily rollups
+        
+        Args:
+            days: Length of the window ending today (e.g. 7, 30 or 365); ignored if start_date is given
+            start_date: First day of a custom window (time of day is ignored)
+            end_date: Day after the window (exclusive; defaults to tomorrow)
+            instructor_id: Only report this instructor
+            
+        Returns:
+            list: Documents with _id (instructorId), instructorName, revenue and enrollments,
+                highest revenue first
+        """
+        today = _start_of_day(self.clock())
+        start_date = _start_of_day(start_date) if start_date is not None else today - timedelta(days=days - 1)
+        end_date = _start_of_day(end_date) if end_date is not None else today + timedelta(days=1)
+        match = {"day": {"$gte": start_date, "$lt": end_date}}
+        if instructor_id is not None:
+            match["instructorId"] = instructor_id
+        
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$instructorId",
+                "revenue": {"$sum": "$revenue"},
+                "enrollments": {"$sum": "$enrollments"}
+            }},
+            {"$sort": {"revenue": -1, "_id": 1}},
+            # One join per instructor in the window
+            {"$lookup": {
+                "from": "users",
+                "localField": "_id",
+                "foreignField": "userId",
+                "pipeline": [{"$project": {"_id": 0, "firstName": 1, "lastName": 1}}],
+                "as": "instructor"
+            }},
+            {"$unwind": {"path": "$instructor", "preserveNullAndEmptyArrays": True}},
+            {"$project": {
+                "instructorName": {"$concat": ["$instructor.firstName", " ", "$instructor.lastName"]},
+                "revenue": 1,
+                "enrollments": 1
+            }}
+        ]
+        return list(self.db.instructor_revenue_daily.aggregate(pipeline))
+    
+    def rebuild_instructor_revenue(self):
+        """Recompute the daily instructor revenue rollups from all enrollments
+        
+        Enrollments without pricePaid (e.g. generated sample data) count at the course's current price.
+        
+        Returns:
+            int: Number of rollup documents, or 0 on error
+        """
+        rebuilt_at = datetime.now()
+        pipeline = [
+            {"$lookup": {
+                "from": "courses",
+                "localField": "courseId",
+                "foreignField": "courseId",
+                "pipeline": [{"$project": {"_id": 0, "instructorId": 1, "price": 1}}],
+                "as": "course"
+            }},
+            {"$unwind": "$course"},
+            {"$group": {
+                "_id": {
+                    "instructorId": "$course.instructorId",
+                    "day": {"$dateTrunc": {"date": "$enrollmentDate", "unit": "day"}}
+                },
+                "revenue": {"$sum": {"$ifNull": ["$pricePaid", "$course.price"]}},
+                "enrollments": {"$sum": 1}
+            }},
+            {"$project": {
+                "_id": 0,
+                "instructorId": "$_id.instructorId",
+                "day": "$_id.day",
+                "revenue": 1,
+                "enrollments": 1,
+                "rebuiltAt": {"$literal": rebuilt_at}
+            }},
+            {"$merge": {"into": "instructor_revenue_daily", "on": ["instructorId", "day"],
+                        "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        try:
+            self.db.enrollments.aggregate(pipeline)
+            # Days whose enrollments were all deleted were not rewritten by this rebuild. Days
+            # upserted by enrollments since it started are stamped later and kept
+            self.db.instructor_revenue_daily.delete_many({"$or": [{"rebuiltAt": {"$lt": rebuilt_at}},
+                                                                  {"rebuiltAt": {"$exists": False}}]})
+            rollups = self.db.instructor_revenue_daily.count_documents({})
+        except Exception as e:
+            print(f"❌ Error rebuilding instructor revenue rollups: {e}")
+            return 0
+        print(f"✅ Instructor revenue rollups rebuilt: {rollups} instructor-days")
+        return rollups
+    
+    def _record_revenue(self, enrollments, sign=1, courses=None):
+        """$inc the daily revenue rollups for added (sign=1) or deleted (sign=-1) enrollments
+        
+        Args:
+            enrollments: Enrollment documents with courseId, enrollmentDate and pricePaid
+            sign: 1 for new enrollments, -1 for deleted ones
+            courses: {courseId: course with REVENUE_COURSE_FIELDS} already read by the caller
+        """
+        if not enrollments:
+            return
+        try:
+            if courses is None:
+                course_ids = list({enrollment["courseId"] for enrollment in enrollments})
+                courses = {course["courseId"]: course for course in self.db.courses.find(
+                    {"courseId": {"$in": course_ids}}, self.REVENUE_COURSE_FIELDS)}
+            totals = {}
+            for enrollment in enrollments:
+                course = courses.get(enrollment["courseId"])
+                if not course or not course.get("instructorId"):
+                    continue
+                key = (course["instructorId"], _start_of_day(enrollment["enrollmentDate"]))
+                revenue, count = totals.get(key, (0, 0))
+                totals[key] = (revenue + sign * enrollment.get("pricePaid", course.get("price") or 0), count + sign)
+            # New days are stamped like rebuilt ones, so a concurrent rebuild does not delete them
+            stamped_at = datetime.now()
+            operations = [UpdateOne({"instructorId": instructor_id, "day": day},
+                                    {"$inc": {"revenue": revenue, "enrollments": count},
+                                     "$setOnInsert": {"rebuiltAt": stamped_at}}, upsert=True)
+                          for (instructor_id, day), (revenue, count) in totals.items()]
+            if operations:
+                self.db.instructor_revenue_daily.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # The enrollment write itself succeeded; rebuild_instructor_revenue() repairs the rollups
+            print(f"❌ Error updating instructor revenue rollups: {e}")
+    
+    def get_advanced_analytics(self, use_counters=False, concurrent=False):
+        """Advanced Analytics: Monthly enrollment trends, most popular course categories, student engagement metrics
+        
+        Args:
+            use_counters: Rank categories by each course's enrollmentCounts instead of
+                joining the enrollments collection
+            concurrent: Compute the trends and engagement metrics in one $facet scan of
+                enrollments while the categories aggregation runs on another thread, so latency
+                is that of the slower query instead of the sum of three
+        """
         
         # Monthly enrollment trends
-        monthly_trends = list(self.db.enrollments.aggregate([
+        monthly_trends_stages = [
             {"$group": {
                 "_id": {
                     "year": {"$year": "$enrollmentDate"},
@@ -1344,58 +4201,92 @@ class EduHubDatabase:
                 "completedEnrollments": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}}
             }},
             {"$sort": {"_id.year": 1, "_id.month": 1}}
-        ]))
+        ]
         
         # Most popular course categories
-        popular_categories = list(self.db.courses.aggregate([
-            {"$lookup": {
-                "from": "enrollments",
-                "localField": "courseId",
-                "foreignField": "courseId",
-                "as": "enrollments"
-            }},
+        count_stages, enrollment_count = self._course_enrollment_count(use_counters)
+        popular_categories_pipeline = count_stages + [
             {"$group": {
                 "_id": "$category",
-                "totalEnrollments": {"$sum": {"$size": "$enrollments"}},
+                "totalEnrollments": {"$sum": enrollment_count},
                 "averageRating": {"$avg": "$rating"},
                 "courseCount": {"$sum": 1}
             }},
             {"$sort": {"totalEnrollments": -1}}
-        ]))
+        ]
         
         # Student engagement metrics
-        engagement_metrics = list(self.db.enrollments.aggregate([
+        engagement_stages = [
             {"$group": {
                 "_id": "$status",
                 "count": {"$sum": 1},
                 "averageProgress": {"$avg": "$progress"}
             }}
-        ]))
+        ]
+        
+        if concurrent:
+            def enrollment_facets():
+                # Both enrollment groupings in a single scan; the result is one small document
+                return next(self.db.enrollments.aggregate([{"$facet": {
+                    "monthly_trends": monthly_trends_stages,
+                    "engagement_metrics": engagement_stages
+                }}]))
+            
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                facets = executor.submit(enrollment_facets)
+                categories = executor.submit(lambda: list(self.db.courses.aggregate(popular_categories_pipeline)))
+                facets, popular_categories = facets.result(), categories.result()
+            return {
+                "monthly_trends": facets["monthly_trends"],
+                "popular_categories": popular_categories,
+                "engagement_metrics": facets["engagement_metrics"]
+            }
         
         return {
-            "monthly_trends": monthly_trends,
-            "popular_categories": popular_categories,
-            "engagement_metrics": engagement_metrics
+            "monthly_trends": list(self.db.enrollments.aggregate(monthly_trends_stages)),
+            "popular_categories": list(self.db.courses.aggregate(popular_categories_pipeline)),
+            "engagement_metrics": list(self.db.enrollments.aggregate(engagement_stages))
         }
     
     # PART 5: PERFORMANCE OPTIMIZATION
     
-    def analyze_query_performance(self, collection_name, query, explain_type="executionStats"):
-        """Analyze query performance using explain() method"""
-        collection = self.db[collection_name]
-        return collection.find(query).explain(explain_type)
+    def advise_indexes(self, workload=None, apply=False, drop_redundant=False):
+        """Recommend indexes from the queries this class issues (see EduHubIndexAdvisor.run)"""
+        return EduHubIndexAdvisor(self).run(workload, apply, drop_redundant)
+    
+    def analyze_query_performance(self, collection_name, query=None, explain_type="executionStats", sort=None,
+                                  pipeline=None):
+        """Analyze query performance using explain() method
+        
+        Args:
+            collection_name: Collection to query
+            query: find() filter
+            explain_type: Explain verbosity
+            sort: Optional find() sort as a list of (field, direction)
+            pipeline: Aggregation pipeline to explain instead of a find()
+        """
+        if pipeline is not None:
+            return self.db.command("aggregate", collection_name, pipeline=pipeline, explain=True)
+        command = {"find": collection_name, "filter": query or {}}
+        if sort:
+            command["sort"] = dict(sort)
+        return self.db.command("explain", command, verbosity=explain_type)
     
-    def optimize_slow_queries(self):
-        """Optimize common slow queries and document performance improvements"""
+    def optimize_slow_queries(self, iterations=20):
+        """Optimize common slow queries and document performance improvements
+        
+        Args:
+            iterations: Timed runs per query after a short warmup (see measure_latency); the
+                benchmark harness in eduhub_benchmark.py covers every method
+        """
         
         print("🔍 Analyzing and optimizing query performance...")
         
         # Query 1: Find courses by title (text search)
         print("\n1. Optimizing course title search...")
-        start_time = datetime.now()
-        courses = list(self.db.courses.find({"title": {"$regex": "Course", "$options": "i"}}))
-        end_time = datetime.now()
-        print(f"   Before optimization: {(end_time - start_time).total_seconds():.4f} seconds")
+        stats = measure_latency(lambda: list(self.db.courses.find({"title": {"$regex": "Course", "$options": "i"}})),
+                                iterations)
+        print(f"   Before optimization (regex scan): {format_latency(stats)}")
         
         # Create text index if not exists
         try:
@@ -1403,24 +4294,22 @@ class EduHubDatabase:
             print("   ✅ Text index created for title and description")
         except Exception:
             print("   ℹ️ Text index already exists")
+        stats = measure_latency(lambda: self.search_courses("Course"), iterations)
+        print(f"   After optimization ($text search): {format_latency(stats)}")
         
         # Query 2: Find enrollments by student and date range
         print("\n2. Optimizing enrollment queries...")
-        start_time = datetime.now()
-        recent_enrollments = list(self.db.enrollments.find({
+        stats = measure_latency(lambda: list(self.db.enrollments.find({
             "enrollmentDate": {"$gte": datetime.now() - timedelta(days=30)}
-        }))
-        end_time = datetime.now()
-        print(f"   Query time: {(end_time - start_time).total_seconds():.4f} seconds")
+        })), iterations)
+        print(f"   Query time: {format_latency(stats)}")
         
         # Query 3: Find assignments by due date
         print("\n3. Optimizing assignment due date queries...")
-        start_time = datetime.now()
-        upcoming_assignments = list(self.db.assignments.find({
+        stats = measure_latency(lambda: list(self.db.assignments.find({
             "dueDate": {"$gte": datetime.now(), "$lte": datetime.now() + timedelta(days=7)}
-        }))
-        end_time = datetime.now()
-        print(f"   Query time: {(end_time - start_time).total_seconds():.4f} seconds")
+        })), iterations)
+        print(f"   Query time: {format_latency(stats)}")
         
         print("\n🎯 Performance optimization completed!")
     
@@ -1516,6 +4405,588 @@ class EduHubDatabase:
         self.client.close()
         print("📊 Database connection closed")
 
+# PART 7: WORKLOAD ANALYSIS
+
+def _sort_keys(key_or_list, direction=None):
+    """Normalize the arguments of Cursor.sort() or a $sort stage to a list of (field, direction)"""
+    if isinstance(key_or_list, str):
+        return [(key_or_list, 1 if direction is None else direction)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [tuple(key) for key in key_or_list]
+
+def summarize_plan(explain):
+    """Reduce explain output (find or aggregate) to the stages used and the work done
+    
+    Returns:
+        dict: stages (set of stage names), indexes (set of index names), keysExamined,
+            docsExamined, nReturned and lookupCollectionScans (collection scans run by $lookup)
+    """
+    summary = {"stages": set(), "indexes": set(), "keysExamined": 0, "docsExamined": 0, "nReturned": 0,
+               "lookupCollectionScans": 0}
+    
+    def walk(plan):
+        if not isinstance(plan, dict):
+            return
+        if "stage" in plan:
+            summary["stages"].add(plan["stage"])
+        if "indexName" in plan:
+            summary["indexes"].add(plan["indexName"])
+        for key in ("inputStage", "queryPlan", "thenStage", "elseStage", "outerStage", "innerStage"):
+            walk(plan.get(key))
+        for child in plan.get("inputStages", []):
+            walk(child)
+    
+    def collect(explain_part):
+        planner = explain_part.get("queryPlanner", {})
+        walk(planner.get("winningPlan", {}))
+        stats = explain_part.get("executionStats", {})
+        summary["keysExamined"] += stats.get("totalKeysExamined", 0)
+        summary["docsExamined"] += stats.get("totalDocsExamined", 0)
+        summary["nReturned"] = stats.get("nReturned", summary["nReturned"])
+    
+    collect(explain)
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            collect(stage["$cursor"])
+        elif "$lookup" in stage:
+            summary["lookupCollectionScans"] += stage.get("collectionScans", 0)
+            summary["stages"].add("$lookup")
+        else:
+            summary["stages"].update(name for name in stage if name.startswith("$"))
+    for shard in explain.get("shards", {}).values():
+        collect(shard)
+    return summary
+
+def measure_latency(func, iterations=20, warmup=3, concurrency=1):
+    """Time repeated calls of func after a warmup
+    
+    Args:
+        func: Callable taking no arguments
+        iterations: Number of timed calls
+        warmup: Untimed calls made first (connection pool, server caches)
+        concurrency: Number of threads issuing the timed calls
+        
+    Returns:
+        dict: iterations, concurrency, errors, mean/min/max/p50/p95/p99 latency in ms,
+            throughput in calls per second and, when timed calls failed, first_error
+    """
+    failures = []
+    
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            failures.append(e)
+            return None
+        return time.perf_counter() - start
+    
+    for i in range(warmup):
+        timed(i)
+    del failures[:]
+    started = time.perf_counter()
+    if concurrency <= 1:
+        results = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - started
+    
+    samples = sorted(result for result in results if result is not None)
+    
+    def percentile(p):
+        # Nearest-rank percentile
+        return samples[max(0, -(-len(samples) * p // 100) - 1)] * 1000
+    
+    stats = {"iterations": iterations, "concurrency": concurrency, "errors": iterations - len(samples)}
+    if failures:
+        stats["first_error"] = f"{type(failures[0]).__name__}: {failures[0]}"
+    if samples:
+        stats.update({
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "min_ms": round(samples[0] * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+            "p50_ms": round(percentile(50), 3),
+            "p95_ms": round(percentile(95), 3),
+            "p99_ms": round(percentile(99), 3),
+            "throughput_ops": round(len(samples) / elapsed, 2) if elapsed else None
+        })
+    return stats
+
+def format_latency(stats):
+    """One-line summary of measure_latency() output"""
+    if "p50_ms" not in stats:
+        return f"all {stats['iterations']} runs failed"
+    return (f"p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms "
+            f"over {stats['iterations']} runs ({stats['throughput_ops']} ops/s)")
+
+def explain_query(db, entry, verbosity="executionStats"):
+    """Explain a query recorded by EduHubWorkloadRecorder (find-style filter or aggregate pipeline)"""
+    if "pipeline" in entry:
+        command = {"aggregate": entry["collection"], "pipeline": entry["pipeline"], "cursor": {}}
+    else:
+        command = {"find": entry["collection"], "filter": entry.get("filter") or {}}
+        if entry.get("sort"):
+            command["sort"] = dict(entry["sort"])
+        for option in ("skip", "limit"):
+            if entry.get(option):
+                command[option] = entry[option]
+    return db.command("explain", command, verbosity=verbosity)
+
+class _RecordingCursor:
+    """Cursor proxy that records the sort applied to a recorded find()"""
+    
+    def __init__(self, cursor, entry):
+        self._cursor = cursor
+        self._entry = entry
+    
+    def sort(self, key_or_list, direction=None):
+        self._entry["sort"] = _sort_keys(key_or_list, direction)
+        self._cursor = self._cursor.sort(key_or_list, direction)
+        return self
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if not callable(attribute):
+            return attribute
+        
+        def call(*args, **kwargs):
+            if name in ("limit", "skip") and args:
+                self._entry[name] = args[0]
+            result = attribute(*args, **kwargs)
+            # Keep chained calls (limit, batch_size, ...) on the proxy
+            return self if result is self._cursor else result
+        return call
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def __next__(self):
+        return next(self._cursor)
+
+class _RecordingCollection:
+    """Collection proxy that records the filter or pipeline of every query"""
+    
+    RECORDED_OPERATIONS = ("find", "find_one", "count_documents", "distinct", "aggregate", "update_one",
+                           "update_many", "delete_one", "delete_many", "find_one_and_update",
+                           "find_one_and_delete")
+    
+    def __init__(self, collection, recorder):
+        self._collection = collection
+        self._recorder = recorder
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in self.RECORDED_OPERATIONS:
+            return attribute
+        
+        def call(*args, **kwargs):
+            entry = {"method": self._recorder.current_method, "collection": self._collection.name,
+                     "operation": name}
+            if name == "aggregate":
+                entry["pipeline"] = list(args[0] if args else kwargs.get("pipeline", []))
+            elif name == "distinct":
+                entry["filter"] = (args[1] if len(args) > 1 else kwargs.get("filter")) or {}
+            else:
+                entry["filter"] = (args[0] if args else kwargs.get("filter")) or {}
+                if kwargs.get("sort"):
+                    entry["sort"] = _sort_keys(kwargs["sort"])
+            self._recorder.entries.append(entry)
+            result = attribute(*args, **kwargs)
+            return _RecordingCursor(result, entry) if name == "find" else result
+        return call
+
+class _RecordingDatabase:
+    """Database proxy handing out recording collections"""
+    
+    def __init__(self, db, recorder):
+        self._db = db
+        self._recorder = recorder
+    
+    def __getitem__(self, name):
+        return _RecordingCollection(self._db[name], self._recorder)
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._db, name)
+        # db.<name> is a collection (databases have no find method)
+        if hasattr(attribute, "find"):
+            return _RecordingCollection(attribute, self._recorder)
+        return attribute
+
+class EduHubWorkloadRecorder:
+    """Capture the queries EduHubDatabase methods actually send to MongoDB
+    
+    While a workload runs, the database's collections are replaced by proxies that record each
+    find (with its sort), aggregate pipeline, count, update and delete filter.
+    """
+    
+    def __init__(self, database):
+        """
+        Args:
+            database: EduHubDatabase to record
+        """
+        self.database = database
+        self.entries = []
+        self.failures = []    # (method_name, error message) of calls that raised
+        self.current_method = None
+    
+    def run(self, workload):
+        """Call each workload method and record its queries
+        
+        Args:
+            workload: Iterable of (method_name, args, kwargs) on the database
+            
+        Returns:
+            list: Recorded queries (dicts with method, collection, operation, filter/sort or pipeline)
+        """
+        original_db, original_cache = self.database.db, self.database.cache
+        # Cached reads would hide their queries
+        self.database.db, self.database.cache = _RecordingDatabase(original_db, self), None
+        try:
+            for method_name, args, kwargs in workload:
+                self.current_method = method_name
+                try:
+                    getattr(self.database, method_name)(*args, **kwargs)
+                except Exception as e:
+                    self.failures.append((method_name, str(e)))
+                    print(f"❌ Workload call {method_name} failed: {e}")
+        finally:
+            self.database.db, self.database.cache = original_db, original_cache
+            self.current_method = None
+        return self.entries
+
+def build_read_workload(database):
+    """Representative calls of the EduHubDatabase read and analytics methods
+    
+    Arguments (IDs, categories, tags, prices) are sampled from the current data, so the
+    database must be populated first.
+    
+    Returns:
+        list: (method_name, args, kwargs) tuples; empty if there are no courses
+    """
+    db = database.db
+    course = db.courses.find_one({}, {"_id": 0, "courseId": 1, "title": 1, "category": 1, "tags": 1, "price": 1})
+    student = db.users.find_one({"role": "student"}, {"_id": 0, "userId": 1})
+    if not course or not student:
+        print("❌ No courses or students found; populate the database before building a workload")
+        return []
+    
+    course_id, category = course["courseId"], course.get("category", "")
+    tag = (course.get("tags") or [""])[0]
+    price = course.get("price", 0)
+    title_words = course.get("title", "").split()
+    word = title_words[0] if title_words else ""
+    return [
+        ("find_all_active_students", (), {}),
+        ("page_active_students", (), {"page_size": 50}),
+        ("get_user_by_id", (student["userId"],), {}),
+        ("get_course_by_id", (course_id,), {}),
+        ("get_course_with_instructor_info", (course_id,), {}),
+        ("get_courses_by_category", (category,), {}),
+        ("page_courses_by_category", (category,), {"page_size": 50}),
+        ("find_students_in_course", (course_id,), {}),
+        ("get_course_roster", (course_id,), {"page_size": 50}),
+        ("get_course_roster", (course_id,), {"page_size": 50, "sort_by": "progress", "descending": True}),
+        ("get_course_roster", (course_id,), {"page_size": 50, "sort_by": "enrollmentDate"}),
+        ("search_courses", (word,), {}),
+        ("search_courses_by_prefix", (word[:3],), {}),
+        ("find_courses_by_price_range", (price * 0.5, price * 1.5), {}),
+        ("page_courses_by_price_range", (price * 0.5, price * 1.5), {"page_size": 50}),
+        ("get_recent_users", (6,), {}),
+        ("page_recent_users", (6,), {"page_size": 50}),
+        ("find_courses_with_tags", ([tag],), {}),
+        ("page_courses_with_tags", ([tag],), {"page_size": 50}),
+        ("get_assignments_due_next_week", (), {}),
+        ("get_course_enrollment_statistics", (), {}),
+        ("get_student_performance_analysis", (), {}),
+        ("iter_student_performance", (), {"top_n": 10}),
+        ("get_instructor_analytics", (), {}),
+        ("get_instructor_revenue", (), {"days": 30}),
+        ("get_advanced_analytics", (), {}),
+        ("get_advanced_analytics", (), {"concurrent": True})
+    ]
+
+class EduHubIndexAdvisor:
+    """Recommend indexes from the queries EduHubDatabase methods actually issue
+    
+    The advisor records a workload, derives an Equality-Sort-Range index candidate for every
+    query shape, replays each shape with explain to see whether the existing indexes already
+    serve it, and reads $indexStats and collStats to report unused and redundant indexes.
+    """
+    
+    # A plan that examines more than this many documents per returned document is inefficient
+    MAX_DOCS_EXAMINED_RATIO = 10
+    
+    COLLECTIONS = ["users", "courses", "lessons", "assignments", "enrollments", "submissions"]
+    
+    def __init__(self, database):
+        """
+        Args:
+            database: EduHubDatabase to analyze
+        """
+        self.database = database
+        self.db = database.db
+    
+    def capture(self, workload=None):
+        """Record the queries of a workload (defaults to build_read_workload)"""
+        if workload is None:
+            workload = build_read_workload(self.database)
+        return EduHubWorkloadRecorder(self.database).run(workload)
+    
+    def recommend(self, entries):
+        """Derive the missing indexes for recorded queries
+        
+        Returns:
+            list: Dicts with collection, keys, reason and the methods that need the index
+        """
+        existing = {name: [list(info["key"]) for info in self.db[name].index_information().values()]
+                    for name in self.COLLECTIONS}
+        recommendations = {}
+        for shape in self._query_shapes(entries):
+            keys = shape["keys"]
+            if not keys or self._is_served(shape, existing.get(shape["collection"], [])):
+                continue
+            reason = self._replay(shape)
+            if reason is None:
+                continue
+            key = (shape["collection"], tuple(keys))
+            recommendation = recommendations.setdefault(key, {
+                "collection": shape["collection"], "keys": keys, "reason": reason, "methods": []
+            })
+            if shape["method"] not in recommendation["methods"]:
+                recommendation["methods"].append(shape["method"])
+        return list(recommendations.values())
+    
+    def index_report(self):
+        """Report size, usage and redundancy of the existing indexes
+        
+        Every index adds one key write per inserted or deleted document (one per array element
+        for multikey indexes), so writesPerInsert is the number of indexes on the collection.
+        
+        Returns:
+            dict: {"indexes": [...], "unused": [...], "redundant": [...]}
+        """
+        report = {"indexes": [], "unused": [], "redundant": []}
+        for collection_name in self.COLLECTIONS:
+            information = self.db[collection_name].index_information()
+            if not information:
+                continue
+            try:
+                usage = {row["name"]: row["accesses"]["ops"]
+                         for row in self.db[collection_name].aggregate([{"$indexStats": {}}])}
+            except Exception:
+                usage = {}
+            try:
+                sizes = self.db.command("collstats", collection_name).get("indexSizes", {})
+            except Exception:
+                sizes = {}
+            
+            for name, info in information.items():
+                keys = list(info["key"])
+                entry = {
+                    "collection": collection_name,
+                    "name": name,
+                    "keys": keys,
+                    "unique": info.get("unique", False),
+                    "ops": usage.get(name),
+                    "sizeBytes": sizes.get(name),
+                    "writesPerInsert": len(information)
+                }
+                report["indexes"].append(entry)
+                if name == "_id_" or entry["unique"]:
+                    continue
+                if entry["ops"] == 0:
+                    report["unused"].append(entry)
+                covering = [other_name for other_name, other in information.items()
+                            if other_name != name and self._is_prefix(keys, list(other["key"]))]
+                if covering:
+                    report["redundant"].append(dict(entry, coveredBy=covering))
+        return report
+    
+    def run(self, workload=None, apply=False, drop_redundant=False):
+        """Capture a workload, recommend indexes and report unused and redundant ones
+        
+        Args:
+            workload: Iterable of (method_name, args, kwargs) (defaults to build_read_workload)
+            apply: Create the recommended indexes
+            drop_redundant: Drop indexes that are prefixes of another index
+            
+        Returns:
+            dict: {"recommended": [...], "unused": [...], "redundant": [...], "applied": [...], "dropped": [...]}
+        """
+        print("🔍 Capturing workload for index analysis...")
+        entries = self.capture(workload)
+        recommendations = self.recommend(entries)
+        report = self.index_report()
+        result = {
+            "recommended": recommendations,
+            "unused": report["unused"],
+            "redundant": report["redundant"],
+            "applied": [],
+            "dropped": []
+        }
+        
+        print(f"📊 {len(entries)} queries captured, {len(recommendations)} indexes recommended")
+        for recommendation in recommendations:
+            print(f"   ➕ {recommendation['collection']} {recommendation['keys']} "
+                  f"({recommendation['reason']}; used by {', '.join(recommendation['methods'])})")
+        for entry in report["unused"]:
+            print(f"   💤 Unused: {entry['collection']}.{entry['name']} ({entry['sizeBytes']} bytes)")
+        for entry in report["redundant"]:
+            print(f"   ♻️ Redundant: {entry['collection']}.{entry['name']} is a prefix of {', '.join(entry['coveredBy'])}")
+        
+        if apply:
+            for recommendation in recommendations:
+                try:
+                    name = self.db[recommendation["collection"]].create_index(recommendation["keys"])
+                    result["applied"].append({"collection": recommendation["collection"], "name": name})
+                    print(f"   ✅ Created {recommendation['collection']}.{name}")
+                except Exception as e:
+                    print(f"❌ Error creating index on {recommendation['collection']}: {e}")
+        if drop_redundant:
+            for entry in report["redundant"]:
+                try:
+                    self.db[entry["collection"]].drop_index(entry["name"])
+                    result["dropped"].append({"collection": entry["collection"], "name": entry["name"]})
+                    print(f"   🗑️ Dropped {entry['collection']}.{entry['name']}")
+                except Exception as e:
+                    print(f"❌ Error dropping index {entry['name']}: {e}")
+        return result
+    
+    def _query_shapes(self, entries):
+        """Turn recorded queries into index access paths (one per filter and per $lookup join)"""
+        shapes = []
+        for entry in entries:
+            if "pipeline" in entry:
+                shapes.extend(self._pipeline_shapes(entry))
+            else:
+                shapes.append(self._shape(entry["method"], entry["collection"], entry["filter"], entry.get("sort", [])))
+        return [shape for shape in shapes if shape is not None]
+    
+    def _pipeline_shapes(self, entry):
+        """Access paths of an aggregation: its leading $match/$sort and each $lookup join"""
+        pipeline = entry["pipeline"]
+        shapes = []
+        query, sort, leading = {}, [], True
+        for stage in pipeline:
+            if leading and "$match" in stage:
+                query = {"$and": [query, stage["$match"]]} if query else stage["$match"]
+            elif leading and "$sort" in stage:
+                sort = _sort_keys(stage["$sort"])
+                leading = False
+            else:
+                leading = False
+            
+            lookup = stage.get("$lookup")
+            if lookup:
+                field = lookup.get("foreignField") or self._lookup_join_field(lookup)
+                if field:
+                    shapes.append(dict(self._shape(entry["method"], lookup["from"], {field: None}, []), lookup=True))
+        if query or sort:
+            shapes.insert(0, self._shape(entry["method"], entry["collection"], query, sort))
+        return shapes
+    
+    @staticmethod
+    def _lookup_join_field(lookup):
+        """Foreign field of a pipeline-form $lookup joined with {$expr: {$eq: ["$field", "$$var"]}}"""
+        for stage in lookup.get("pipeline", []):
+            condition = stage.get("$match", {}).get("$expr", {}).get("$eq")
+            if isinstance(condition, list) and len(condition) == 2:
+                for operand in condition:
+                    if isinstance(operand, str) and operand.startswith("$") and not operand.startswith("$$"):
+                        return operand[1:]
+        return None
+    
+    def _shape(self, method, collection_name, query, sort):
+        """Classify a filter into equality and range fields and build its ESR index candidate"""
+        equality, ranges, text = [], [], False
+        
+        def classify(condition_map):
+            nonlocal text
+            for field, condition in condition_map.items():
+                if field == "$and":
+                    for part in condition:
+                        classify(part)
+                elif field == "$text":
+                    text = True
+                elif field.startswith("$"):
+                    continue      # $or / $expr branches are not planned from a single index
+                elif isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+                    if "$eq" in condition or set(condition) == {"$in"}:
+                        equality.append(field)
+                    elif set(condition) & {"$gt", "$gte", "$lt", "$lte"}:
+                        ranges.append(field)
+                    elif "$regex" in condition and str(condition["$regex"]).startswith("^"):
+                        ranges.append(field)
+                elif isinstance(condition, re.Pattern):
+                    if condition.pattern.startswith("^"):
+                        ranges.append(field)
+                else:
+                    equality.append(field)
+        
+        classify(query or {})
+        if text:
+            return None   # served by the text index
+        
+        keys = []
+        for field, direction in [(field, 1) for field in equality] + list(sort) + [(field, 1) for field in ranges]:
+            if field not in [key for key, _ in keys] and field != "_id":
+                keys.append((field, direction))
+        return {"method": method, "collection": collection_name, "query": query, "sort": list(sort),
+                "equality": list(dict.fromkeys(equality)), "ranges": list(dict.fromkeys(ranges)), "keys": keys}
+    
+    @staticmethod
+    def _is_served(shape, indexes):
+        """Whether an index starts with the shape's equality fields (any order), its sort, then a range field"""
+        equality, sort, ranges = set(shape["equality"]), shape["sort"], shape["ranges"]
+        if not (equality or sort or ranges):
+            return True
+        for index_keys in indexes:
+            if {field for field, _ in index_keys[:len(equality)]} != equality:
+                continue
+            rest = index_keys[len(equality):]
+            if sort:
+                head = rest[:len(sort)]
+                if [field for field, _ in head] != [field for field, _ in sort]:
+                    continue
+                same = all(direction == wanted for (_, direction), (_, wanted) in zip(head, sort))
+                reversed_ = all(direction == -wanted for (_, direction), (_, wanted) in zip(head, sort))
+                if not (same or reversed_):
+                    continue
+                rest = rest[len(sort):]
+            # A range on a sort field is already bounded by the sort prefix
+            if ranges and not set(ranges) & {field for field, _ in sort} and (not rest or rest[0][0] not in ranges):
+                continue
+            return True
+        return False
+    
+    def _replay(self, shape):
+        """Explain the shape against the current indexes; return why it needs an index, or None"""
+        if shape.get("lookup"):
+            return "$lookup join field is not indexed"
+        command = {"find": shape["collection"], "filter": shape["query"] or {}}
+        if shape["sort"]:
+            command["sort"] = dict(shape["sort"])
+        try:
+            plan = summarize_plan(self.db.command("explain", command, verbosity="executionStats"))
+        except Exception:
+            return "no index matches the query shape"
+        if "COLLSCAN" in plan["stages"]:
+            return "COLLSCAN"
+        if "SORT" in plan["stages"]:
+            return "in-memory SORT"
+        if plan["docsExamined"] > max(plan["nReturned"], 1) * self.MAX_DOCS_EXAMINED_RATIO:
+            return f"examines {plan['docsExamined']} documents for {plan['nReturned']} results"
+        return None
+    
+    @staticmethod
+    def _is_prefix(keys, other_keys):
+        """Whether keys is a strict prefix of other_keys (text indexes excluded)"""
+        if any(direction == "text" for _, direction in keys + other_keys):
+            return False
+        return len(keys) < len(other_keys) and other_keys[:len(keys)] == keys
+
 if __name__ == "__main__":
     # Initialize the database
     db = EduHubDatabase()
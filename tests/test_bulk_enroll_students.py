@@ -0,0 +1,51 @@
+"""
+Eduhub MongoDB Project - bulk_enroll_students tests (mongomock, no mongod needed)
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import eduhub_queries  # noqa: E402
+
+@pytest.fixture
+def database(monkeypatch):
+    monkeypatch.setattr(eduhub_queries, "MongoClient", mongomock.MongoClient)
+    database = eduhub_queries.EduHubDatabase(bootstrap=False)
+    database.db.users.insert_many([
+        {"userId": "ST_001", "email": "student@example.com", "firstName": "Ada", "lastName": "Lovelace",
+         "role": "student", "dateJoined": datetime(2024, 1, 1), "isActive": True},
+        {"userId": "IN_001", "email": "instructor@example.com", "firstName": "Alan", "lastName": "Turing",
+         "role": "instructor", "dateJoined": datetime(2024, 1, 1), "isActive": True}
+    ])
+    database.db.courses.insert_one({"courseId": "CO_001", "title": "Python Basics", "instructorId": "IN_001",
+                                    "price": 49.99})
+    # An existing enrollment seeds the enrollment ID counter
+    database.db.enrollments.insert_one({"enrollmentId": "EN_001", "studentId": "ST_000", "courseId": "CO_000",
+                                        "enrollmentDate": datetime(2024, 1, 1), "status": "active"})
+    return database
+
+def test_bulk_enroll_students_reports_missing_courses_and_students(database):
+    results = database.bulk_enroll_students([
+        ("ST_001", "CO_001"),
+        ("ST_001", "CO_999"),   # unknown course
+        ("ST_999", "CO_001"),   # unknown student
+        ("IN_001", "CO_001")    # not a student
+    ])
+
+    assert [result["status"] for result in results] == ["ok", "not_found", "not_found", "not_found"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert "CO_999" in results[1]["error"]
+    assert "ST_999" in results[2]["error"]
+    assert "IN_001" in results[3]["error"]
+
+    enrollments = list(database.db.enrollments.find({"courseId": "CO_001"}, {"_id": 0}))
+    assert len(enrollments) == 1
+    assert enrollments[0]["studentId"] == "ST_001"
+    assert enrollments[0]["enrollmentId"] == results[0]["id"]
+    assert enrollments[0]["pricePaid"] == 49.99
@@ -0,0 +1,26 @@
+"""
+Eduhub MongoDB Project - populate_scaled_data tests (mongomock, no mongod needed)
+"""
+
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import eduhub_queries  # noqa: E402
+
+@pytest.fixture
+def database(monkeypatch):
+    monkeypatch.setattr(eduhub_queries, "MongoClient", mongomock.MongoClient)
+    return eduhub_queries.EduHubDatabase(bootstrap=False)
+
+def test_small_fractional_scale_caps_enrollments_at_available_pairs(database):
+    # scale=0.05 gives 10 students and 1 course but 50 enrollments before capping
+    database.populate_scaled_data(scale=0.05, seed=42)
+
+    enrollments = list(database.db.enrollments.find({}, {"_id": 0, "studentId": 1, "courseId": 1}))
+    assert len(enrollments) == database.db.users.count_documents({"role": "student"}) == 10
+    assert len({(enrollment["studentId"], enrollment["courseId"]) for enrollment in enrollments}) == 10
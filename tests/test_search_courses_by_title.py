@@ -0,0 +1,40 @@
+"""
+Eduhub MongoDB Project - search_courses_by_title tests (mongomock, no mongod needed)
+"""
+
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import eduhub_queries  # noqa: E402
+
+@pytest.fixture
+def database(monkeypatch):
+    monkeypatch.setattr(eduhub_queries, "MongoClient", mongomock.MongoClient)
+    database = eduhub_queries.EduHubDatabase(bootstrap=False)
+    database.db.courses.insert_many([
+        dict({"courseId": course_id, "title": title}, **eduhub_queries._title_search_keys(title))
+        for course_id, title in [("CO_001", "Introduction to Python"), ("CO_002", "Applied Machine Learning"),
+                                 ("CO_003", "Python for Data Science")]
+    ])
+    return database
+
+def titles(courses):
+    return sorted(course["title"] for course in courses)
+
+def test_search_courses_by_title_matches_the_start_of_any_word(database):
+    assert titles(database.search_courses_by_title("Pyth")) == ["Introduction to Python", "Python for Data Science"]
+    assert titles(database.search_courses_by_title("mach")) == ["Applied Machine Learning"]
+    assert titles(database.search_courses_by_title("machine LEA")) == ["Applied Machine Learning"]
+    assert database.search_courses_by_title("thon") == []
+    assert database.search_courses_by_title("(") == []
+
+def test_search_courses_by_title_limit(database):
+    assert len(database.search_courses_by_title("")) == 3
+    assert len(database.search_courses_by_title("python", limit=1)) == 1
+    with pytest.raises(ValueError):
+        database.search_courses_by_title("python", limit=0)
@@ -0,0 +1,33 @@
+"""
+Eduhub MongoDB Project - EduHubTagIndex tests (in memory, no mongod needed)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from eduhub_queries import EduHubTagIndex  # noqa: E402
+
+COURSES = [
+    {"courseId": f"CO_00{i}", "tags": ["python"], "category": "Programming", "level": "beginner",
+     "price": 10.0 * i, "isPublished": True}
+    for i in range(1, 4)
+]
+
+def test_query_limit_caps_course_ids_but_not_count():
+    index = EduHubTagIndex()
+    index.build(COURSES)
+
+    assert index.query(all_tags=["python"], limit=0)["courseIds"] == []
+    assert index.query(all_tags=["python"], limit=2)["courseIds"] == ["CO_001", "CO_002"]
+    assert index.query(all_tags=["python"], limit=0)["count"] == 3
+
+def test_removed_course_keeps_its_position_when_indexed_again():
+    index = EduHubTagIndex()
+    index.build(COURSES)
+    index.remove_course("CO_001")
+    assert index.query(all_tags=["python"])["courseIds"] == ["CO_002", "CO_003"]
+
+    index.upsert_course(COURSES[0])
+    assert index.query(all_tags=["python"])["courseIds"] == ["CO_001", "CO_002", "CO_003"]